@@ -9,12 +9,20 @@ enterprise integration patterns.
 """
 
 import os
+import re
 import json
+import mmap
+import asyncio
+import time
+import hashlib
 import yaml
 import logging
+import statistics
 import subprocess
-from typing import Dict, List, Any, Optional, Tuple
-from dataclasses import dataclass, asdict
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Tuple, Union
+from dataclasses import dataclass, asdict, field
 from pathlib import Path
 from datetime import datetime
 import tempfile
@@ -48,14 +56,353 @@ class SpecificationPhase:
     outputs: List[str]
     validation_criteria: List[str]
     ai_prompts: Dict[str, str]
+    fan_out_input: Optional[str] = None  # list input whose items run as independent jobs
+
+@dataclass
+class ProjectInitialization:
+    """Outcome and timing of one project in a bulk initialization"""
+    project_name: str
+    project_path: str
+    seconds: float
+    config: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+@dataclass
+class PhaseTiming:
+    """When one phase of a workflow run started and finished, relative to the run"""
+    phase: str
+    status: str  # executed, skipped
+    dependencies: List[str]
+    started: float
+    finished: float
+    jobs: int = 1
+    
+    @property
+    def seconds(self) -> float:
+        return self.finished - self.started
+
+@dataclass
+class WorkflowReport:
+    """Phase results and critical-path timing from one execute_workflow run"""
+    phase_results: Dict[str, Dict[str, Any]]
+    timings: Dict[str, PhaseTiming]
+    critical_path: List[str]
+    critical_path_seconds: float
+    wall_seconds: float
+    
+    @property
+    def skipped(self) -> List[str]:
+        return [name for name, timing in self.timings.items() if timing.status == "skipped"]
+    
+    def format_timing(self) -> str:
+        """Human-readable timing table, marking phases on the critical path"""
+        lines = [f"Workflow finished in {self.wall_seconds:.3f}s; critical path "
+                 f"{' -> '.join(self.critical_path) or 'empty'} ({self.critical_path_seconds:.3f}s)"]
+        for name, timing in self.timings.items():
+            marker = "*" if name in self.critical_path else " "
+            jobs = f", {timing.jobs} jobs" if timing.jobs > 1 else ""
+            lines.append(f"{marker} {name:<12} {timing.status:<8} {timing.started:8.3f}s -> {timing.finished:8.3f}s "
+                         f"({timing.seconds:.3f}s{jobs}) after {', '.join(timing.dependencies) or 'nothing'}")
+        return "\n".join(lines)
+
+@dataclass
+class SpecificationDiagnostic:
+    """A validation finding at a 1-based line and column of a specification"""
+    line: int
+    column: int
+    severity: str  # error, warning
+    rule: str
+    message: str
+    
+    def __str__(self) -> str:
+        return f"{self.line}:{self.column}: {self.severity}: {self.message} [{self.rule}]"
+
+@dataclass
+class SpecificationSection:
+    """A Markdown heading and everything nested beneath it"""
+    title: str
+    level: int
+    line: int
+    column: int
+    children: List["SpecificationSection"] = field(default_factory=list)
+    user_stories: int = 0
+    checkboxes: int = 0
+    has_content: bool = False
+    
+    def walk(self) -> Iterator["SpecificationSection"]:
+        """This section and its descendants in document order"""
+        stack = [self]
+        while stack:
+            section = stack.pop()
+            yield section
+            stack.extend(reversed(section.children))
+    
+    def total(self, counter: str) -> int:
+        """Sum of a counter such as user_stories over this section's subtree"""
+        return sum(getattr(section, counter) for section in self.walk())
+
+@dataclass
+class ParsedSpecification:
+    """Section tree of a specification plus problems found while parsing it"""
+    root: SpecificationSection
+    sections: Dict[str, List[SpecificationSection]]  # keyed by lower-cased title
+    syntax_diagnostics: List[SpecificationDiagnostic]
+    text: Union[str, bytes, mmap.mmap]
+    
+    def find(self, title: str) -> Optional[SpecificationSection]:
+        """First section whose title contains title, ignoring case, so "1. Project Overview" counts"""
+        key = title.lower()
+        matches = self.sections.get(key)
+        if matches:
+            return matches[0]
+        return next((matches[0] for name, matches in self.sections.items() if key in name), None)
+    
+    def mentions(self, title: str) -> bool:
+        """Whether a section matches title or the text contains it anywhere, e.g. as a bold label"""
+        if self.find(title) is not None:
+            return True
+        return self.text.find(title if isinstance(self.text, str) else title.encode()) != -1
+    
+    def position(self, title: str) -> Tuple[int, int]:
+        """Line and column of the first section matching title, or the document start"""
+        section = self.find(title)
+        return (section.line, section.column) if section else (1, 1)
+
+class SpecificationValidator:
+    """Single-pass Markdown specification validator driven by named rule sets
+    
+    One compiled pattern scans the specification once into a section tree, and each
+    rule set then inspects the tree, so validation is linear in the specification's
+    size. Accepts str, bytes or an mmap; columns count bytes for the latter two.
+    
+    Required sections are matched as leniently as the substring check this replaced:
+    a heading containing the name, such as "## 1. Project Overview", or any mention
+    of it, such as a bold "**In Scope**" line, counts. Code fences may be indented.
+    """
+    
+    # Rule set names accepted in SpecificationConfig.validation_rules
+    RULES = {
+        "syntax": "_check_syntax",
+        "completeness": "_check_completeness",
+        "consistency": "_check_consistency"
+    }
+    
+    REQUIRED_SECTIONS = (
+        "Project Overview", "User Stories", "Success Criteria",
+        "Scope and Boundaries", "Technical Constraints"
+    )
+    SCOPE_SECTIONS = ("In Scope", "Out of Scope")
+    
+    # Each match starts by consuming one of a few trigger characters and lookbehinds pick
+    # the construct; this runs several times faster than anchored alternatives tried
+    # at every position
+    _SCAN = (r"[`~#A\[](?:"
+             r"(?<=^#)(?P<hashes>#{0,5})(?!#)(?P<space>[ \t]*)(?P<title>[^\r\n]*)"
+             r"|(?P<fence>(?<=`)``|(?<=~)~~)"
+             r"|(?P<story>(?<=\bA)s a)"
+             r"|(?P<checkbox>(?<=\[)[ xX]\]))")
+    _PATTERNS = {
+        str: (re.compile(_SCAN, re.MULTILINE), re.compile(r"\S"), "\n"),
+        bytes: (re.compile(_SCAN.encode(), re.MULTILINE), re.compile(rb"\S"), b"\n")
+    }
+    
+    def __init__(self, rules: Optional[List[str]] = None,
+                 required_sections: Iterable[str] = REQUIRED_SECTIONS):
+        rules = list(rules) if rules is not None else list(self.RULES)
+        unknown = [rule for rule in rules if rule not in self.RULES]
+        if unknown:
+            logger.warning(f"Ignoring unknown validation rules: {', '.join(unknown)}")
+        self.rules = [rule for rule in rules if rule in self.RULES]
+        self.required_sections = tuple(required_sections)
+    
+    def validate(self, specification: Union[str, bytes, mmap.mmap]) -> List[SpecificationDiagnostic]:
+        """Diagnostics from every configured rule set, in document order"""
+        document = self.parse(specification)
+        diagnostics = []
+        for rule in self.rules:
+            diagnostics.extend(getattr(self, self.RULES[rule])(document))
+        diagnostics.sort(key=lambda diagnostic: (diagnostic.line, diagnostic.column))
+        return diagnostics
+    
+    def parse(self, specification: Union[str, bytes, mmap.mmap]) -> ParsedSpecification:
+        """Build the section tree in one scan over the specification"""
+        text = specification
+        is_text = isinstance(text, str)
+        scan, non_space, newline = self._PATTERNS[str if is_text else bytes]
+        if isinstance(text, (str, bytes)):
+            count_newlines = text.count
+        else:
+            # mmap has no count(); each slice is counted once, keeping the scan linear
+            count_newlines = lambda sub, start, end: text[start:end].count(sub)
+        
+        root = SpecificationSection("", 0, 1, 1)
+        sections: Dict[str, List[SpecificationSection]] = {}
+        syntax: List[SpecificationDiagnostic] = []
+        stack = [root]
+        line, line_start, last = 1, 0, 0
+        body_start = 0  # where the innermost open section's own text begins
+        fence: Optional[Tuple[int, int, Any]] = None
+        
+        for match in scan.finditer(text):
+            start = match.start()
+            newlines = count_newlines(newline, last, start)
+            if newlines:
+                line += newlines
+                line_start = text.rfind(newline, last, start) + 1
+            last = start
+            column = start - line_start + 1
+            kind = match.lastgroup
+            
+            if kind == "fence":
+                # Only a marker with nothing but indentation before it opens or closes a fence
+                if non_space.search(text, line_start, start):
+                    continue
+                marker = match.group()
+                if fence is None:
+                    fence = (line, column, marker)
+                elif marker == fence[2]:
+                    fence = None
+                continue
+            if fence is not None:
+                continue
+            if kind == "story":
+                stack[-1].user_stories += 1
+                continue
+            if kind == "checkbox":
+                stack[-1].checkboxes += 1
+                continue
+            
+            title = match.group("title")
+            title = (title if is_text else title.decode("utf-8", "replace")).strip().rstrip("#").strip()
+            level = len(match.group("hashes")) + 1
+            if title and not match.group("space"):
+                syntax.append(SpecificationDiagnostic(
+                    line, column, "warning", "syntax",
+                    f"Heading marker needs a space after it; treated as text: {title}"
+                ))
+                continue
+            
+            if non_space.search(text, body_start, start):
+                stack[-1].has_content = True
+            while stack[-1].level >= level:
+                stack.pop()
+            parent = stack[-1]
+            if parent.level and level > parent.level + 1:
+                syntax.append(SpecificationDiagnostic(
+                    line, column, "warning", "syntax",
+                    f"Heading level jumps from {parent.level} to {level}"
+                ))
+            if not title:
+                syntax.append(SpecificationDiagnostic(line, column, "warning", "syntax", "Empty heading"))
+            
+            section = SpecificationSection(title, level, line, column)
+            parent.children.append(section)
+            sections.setdefault(title.lower(), []).append(section)
+            stack.append(section)
+            body_start = match.end()
+        
+        if non_space.search(text, body_start):
+            stack[-1].has_content = True
+        if fence is not None:
+            syntax.append(SpecificationDiagnostic(fence[0], fence[1], "error", "syntax", "Code fence is never closed"))
+        return ParsedSpecification(root, sections, syntax, text)
+    
+    def _check_syntax(self, document: ParsedSpecification) -> List[SpecificationDiagnostic]:
+        return document.syntax_diagnostics
+    
+    def _check_completeness(self, document: ParsedSpecification) -> List[SpecificationDiagnostic]:
+        diagnostics = []
+        for title in self.required_sections:
+            if not document.mentions(title):
+                diagnostics.append(SpecificationDiagnostic(
+                    1, 1, "error", "completeness", f"Missing required section: {title}"
+                ))
+        
+        if not document.root.total("user_stories"):
+            diagnostics.append(SpecificationDiagnostic(
+                *document.position("User Stories"), "error", "completeness",
+                "No user stories found (should contain 'As a' patterns)"
+            ))
+        
+        criteria = document.find("Success Criteria")
+        if not (criteria or document.root).total("checkboxes"):
+            diagnostics.append(SpecificationDiagnostic(
+                *document.position("Success Criteria"), "error", "completeness",
+                "No checkboxes found for success criteria"
+            ))
+        
+        if not all(document.mentions(title) for title in self.SCOPE_SECTIONS):
+            diagnostics.append(SpecificationDiagnostic(
+                *document.position("Scope and Boundaries"), "error", "completeness",
+                "Missing scope boundaries definition"
+            ))
+        
+        for section in document.root.walk():
+            if section.level and not section.has_content and not section.children:
+                diagnostics.append(SpecificationDiagnostic(
+                    section.line, section.column, "warning", "completeness",
+                    f"Section has no content: {section.title}"
+                ))
+        return diagnostics
+    
+    def _check_consistency(self, document: ParsedSpecification) -> List[SpecificationDiagnostic]:
+        diagnostics = []
+        titles = [section for section in document.root.children if section.level == 1]
+        for section in titles[1:]:
+            diagnostics.append(SpecificationDiagnostic(
+                section.line, section.column, "warning", "consistency",
+                f"Additional top-level title: {section.title} (first at line {titles[0].line})"
+            ))
+        
+        for parent in document.root.walk():
+            seen: Dict[str, SpecificationSection] = {}
+            for section in parent.children:
+                first = seen.setdefault(section.title.lower(), section)
+                if first is not section:
+                    diagnostics.append(SpecificationDiagnostic(
+                        section.line, section.column, "warning", "consistency",
+                        f"Duplicate section: {section.title} (first at line {first.line})"
+                    ))
+        return diagnostics
+
+def _initialize_project_job(config: SpecificationConfig, requirements: str) -> ProjectInitialization:
+    """Initialize one project for a worker pool, capturing failures instead of raising"""
+    started = time.perf_counter()
+    try:
+        project_config = SpecKitImplementationToolkit(config).initialize_project(requirements)
+    except Exception as e:
+        # Any one project's failure, e.g. an unwritable output_directory, must not abort the batch
+        return ProjectInitialization(config.project_name, config.output_directory,
+                                     time.perf_counter() - started, error=f"{type(e).__name__}: {e}")
+    return ProjectInitialization(config.project_name, config.output_directory,
+                                 time.perf_counter() - started, config=project_config)
+
+def _initialize_project_batch(batch: List[Tuple[SpecificationConfig, str]]) -> List[ProjectInitialization]:
+    return [_initialize_project_job(config, requirements) for config, requirements in batch]
 
 class SpecKitImplementationToolkit:
     """Comprehensive toolkit for SpecKit implementation"""
     
+    # Project subdirectories created by initialize_project
+    PROJECT_DIRECTORIES = [
+        "specifications",
+        "architecture", 
+        "tasks",
+        "implementation",
+        "tests",
+        "documentation",
+        "templates",
+        "validation"
+    ]
+    
+    # Phase fingerprints and results from the last execute_workflow run
+    WORKFLOW_MANIFEST = "workflow-manifest.json"
+    
     def __init__(self, config: SpecificationConfig):
         self.config = config
         self.project_path = Path(config.output_directory)
-        self.project_path.mkdir(exist_ok=True)
+        self.project_path.mkdir(parents=True, exist_ok=True)
+        self.validator = SpecificationValidator(config.validation_rules)
         
         # Define the four phases of SpecKit workflow
         self.phases = self._define_workflow_phases()
@@ -231,7 +578,8 @@ class SpecKitImplementationToolkit:
                     - Documentation completeness
                     - Performance considerations
                     """
-                }
+                },
+                fan_out_input="tasks"
             )
         }
     
@@ -245,8 +593,32 @@ class SpecKitImplementationToolkit:
         # Generate initial specification
         specification = self._generate_initial_specification(requirements)
         
-        # Create project configuration
-        project_config = {
+        # Create and save project configuration
+        project_config = self._build_project_config()
+        self._write_json(self.project_path / "speckit-config.json", project_config)
+        
+        logger.info(f"Project initialized at: {self.project_path}")
+        return project_config
+    
+    async def ainitialize_project(self, requirements: str) -> Dict[str, Any]:
+        """Initialize a new SpecKit project without blocking the event loop on file I/O"""
+        logger.info(f"Initializing SpecKit project: {self.config.project_name}")
+        
+        await asyncio.to_thread(self._create_project_structure)
+        
+        logger.info("Generating initial specification")
+        specification = self._render_initial_specification(requirements)
+        project_config = self._build_project_config()
+        await asyncio.gather(
+            asyncio.to_thread(self._write_text, self.project_path / "specifications" / "initial-spec.md", specification),
+            asyncio.to_thread(self._write_json, self.project_path / "speckit-config.json", project_config)
+        )
+        
+        logger.info(f"Project initialized at: {self.project_path}")
+        return project_config
+    
+    def _build_project_config(self) -> Dict[str, Any]:
+        return {
             "project_name": self.config.project_name,
             "created_at": datetime.now().isoformat(),
             "specification_format": self.config.specification_format,
@@ -254,38 +626,79 @@ class SpecKitImplementationToolkit:
             "phases": list(self.phases.keys()),
             "current_phase": "specify"
         }
+    
+    @staticmethod
+    def _write_text(path: Path, text: str):
+        with open(path, 'w') as f:
+            f.write(text)
+    
+    @staticmethod
+    def _write_json(path: Path, data: Any):
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
+    
+    @classmethod
+    def initialize_projects(cls, projects: Iterable[Tuple[SpecificationConfig, str]],
+                            max_workers: Optional[int] = None,
+                            use_processes: bool = False) -> List[ProjectInitialization]:
+        """Initialize many projects concurrently, returning per-project timing in input order
         
-        # Save configuration
-        config_path = self.project_path / "speckit-config.json"
-        with open(config_path, 'w') as f:
-            json.dump(project_config, f, indent=2)
+        Project writes are dominated by filesystem latency, so a thread pool is the
+        default; use_processes spreads CPU-heavy specification generation across cores.
+        Either pool receives projects in a few batches per worker, keeping submission
+        and inter-process overhead low.
+        A failed project is reported with its error rather than aborting the rest.
+        """
+        projects = list(projects)
+        output_directories = [Path(config.output_directory).resolve() for config, _ in projects]
+        if len(set(output_directories)) != len(output_directories):
+            raise ValueError("Each project in a bulk initialization needs its own output_directory")
+        if not projects:
+            return []
         
-        logger.info(f"Project initialized at: {self.project_path}")
-        return project_config
+        started = time.perf_counter()
+        executor: Executor
+        if use_processes:
+            max_workers = max_workers or os.cpu_count() or 1
+            executor = ProcessPoolExecutor(max_workers=max_workers)
+        else:
+            max_workers = max_workers or min(32, (os.cpu_count() or 1) * 4)
+            executor = ThreadPoolExecutor(max_workers=max_workers)
+        # A few batches per worker balances load without a round trip per project
+        batch_size = max(1, len(projects) // (max_workers * 4))
+        batches = [projects[i:i + batch_size] for i in range(0, len(projects), batch_size)]
+        with executor:
+            results = [result for batch in executor.map(_initialize_project_batch, batches) for result in batch]
+        elapsed = time.perf_counter() - started
+        
+        failures = [result for result in results if result.error]
+        timings = [result.seconds for result in results]
+        logger.info(f"Initialized {len(results) - len(failures)} of {len(results)} projects in {elapsed:.2f}s "
+                    f"({len(results) / elapsed:.0f} projects/s; per project median "
+                    f"{statistics.median(timings) * 1000:.1f} ms, max {max(timings) * 1000:.1f} ms)")
+        for failure in failures:
+            logger.error(f"Project initialization failed: {failure.project_name}: {failure.error}")
+        return results
     
     def _create_project_structure(self):
         """Create the project directory structure"""
-        directories = [
-            "specifications",
-            "architecture", 
-            "tasks",
-            "implementation",
-            "tests",
-            "documentation",
-            "templates",
-            "validation"
-        ]
-        
-        for directory in directories:
+        for directory in self.PROJECT_DIRECTORIES:
             (self.project_path / directory).mkdir(exist_ok=True)
     
     def _generate_initial_specification(self, requirements: str) -> str:
         """Generate initial specification from requirements"""
         logger.info("Generating initial specification")
+        specification = self._render_initial_specification(requirements)
         
+        # Save specification
+        self._write_text(self.project_path / "specifications" / "initial-spec.md", specification)
+        return specification
+    
+    def _render_initial_specification(self, requirements: str) -> str:
+        """Build the initial specification text from requirements"""
         # This would typically use AI agent integration
         # For now, creating a template-based specification
-        specification = f"""
+        return f"""
 # {self.config.project_name} - Project Specification
 
 ## Project Overview
@@ -323,45 +736,15 @@ class SpecKitImplementationToolkit:
 3. Break down into implementable tasks
 4. Execute with AI-assisted development
 """
-        
-        # Save specification
-        spec_path = self.project_path / "specifications" / "initial-spec.md"
-        with open(spec_path, 'w') as f:
-            f.write(specification)
-        
-        return specification
     
     def validate_specification(self, specification: str) -> Tuple[bool, List[str]]:
         """Validate specification against SpecKit criteria"""
         logger.info("Validating specification")
         
-        validation_results = []
-        is_valid = True
-        
-        # Check for required sections
-        required_sections = [
-            "Project Overview", "User Stories", "Success Criteria", 
-            "Scope and Boundaries", "Technical Constraints"
-        ]
-        
-        for section in required_sections:
-            if section not in specification:
-                validation_results.append(f"Missing required section: {section}")
-                is_valid = False
-        
-        # Check for specific content patterns
-        if "As a" not in specification:
-            validation_results.append("No user stories found (should contain 'As a' patterns)")
-            is_valid = False
-        
-        if "[ ]" not in specification and "- [ ]" not in specification:
-            validation_results.append("No checkboxes found for success criteria")
-            is_valid = False
-        
-        # Check for scope definition
-        if "In Scope" not in specification or "Out of Scope" not in specification:
-            validation_results.append("Missing scope boundaries definition")
-            is_valid = False
+        # Diagnostics render as "line:column: severity: message [rule]"
+        diagnostics = self.validator.validate(specification)
+        validation_results = [str(diagnostic) for diagnostic in diagnostics]
+        is_valid = not any(diagnostic.severity == "error" for diagnostic in diagnostics)
         
         if is_valid:
             validation_results.append("Specification validation passed")
@@ -382,11 +765,28 @@ class SpecKitImplementationToolkit:
         
         # Execute phase-specific logic
         results = self._execute_phase_logic(phase, inputs)
+        return self._complete_phase(phase_name, results)
+    
+    async def aexecute_phase(self, phase_name: str, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute a phase with its logic and result writes off the event loop"""
+        if phase_name not in self.phases:
+            raise ValueError(f"Invalid phase: {phase_name}")
+        
+        phase = self.phases[phase_name]
+        logger.info(f"Executing phase: {phase.name}")
+        
+        # Phase logic would call out to AI agents, so it runs in a worker thread too
+        results = await asyncio.to_thread(self._execute_phase_logic, phase, inputs)
+        return await asyncio.to_thread(self._complete_phase, phase_name, results)
+    
+    def _complete_phase(self, phase_name: str, results: Dict[str, Any]) -> Dict[str, Any]:
+        """Save and validate a phase's results"""
+        phase = self.phases[phase_name]
+        phase_path = self.project_path / phase_name
+        phase_path.mkdir(exist_ok=True)
         
         # Save phase results
-        results_path = phase_path / f"{phase_name}-results.json"
-        with open(results_path, 'w') as f:
-            json.dump(results, f, indent=2)
+        self._write_json(phase_path / f"{phase_name}-results.json", results)
         
         # Validate phase completion
         validation_results = self._validate_phase_completion(phase, results)
@@ -398,8 +798,209 @@ class SpecKitImplementationToolkit:
             "completed_at": datetime.now().isoformat()
         }
     
-    def _execute_phase_logic(self, phase: SpecificationPhase, inputs: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute the core logic for a specific phase"""
+    def build_phase_graph(self) -> Dict[str, List[str]]:
+        """Map each phase to the phases producing its declared inputs, in definition order"""
+        producers: Dict[str, List[str]] = {}
+        for name, phase in self.phases.items():
+            for output in phase.outputs:
+                producers.setdefault(output, []).append(name)
+        
+        graph = {}
+        for name, phase in self.phases.items():
+            dependencies = {producer for item in phase.inputs for producer in producers.get(item, []) if producer != name}
+            graph[name] = [other for other in self.phases if other in dependencies]
+        
+        # Kahn's algorithm doubles as a cycle check
+        remaining = {name: len(dependencies) for name, dependencies in graph.items()}
+        ready = deque(name for name, count in remaining.items() if count == 0)
+        ordered = 0
+        while ready:
+            current = ready.popleft()
+            ordered += 1
+            for name, dependencies in graph.items():
+                if current in dependencies:
+                    remaining[name] -= 1
+                    if remaining[name] == 0:
+                        ready.append(name)
+        if ordered != len(graph):
+            cyclic = sorted(name for name, count in remaining.items() if count)
+            raise ValueError(f"Phase dependencies form a cycle: {', '.join(cyclic)}")
+        return graph
+    
+    def execute_workflow(self, phase_inputs: Optional[Dict[str, Dict[str, Any]]] = None,
+                         max_workers: Optional[int] = None, force: bool = False) -> WorkflowReport:
+        """Execute every phase, running phases with no dependency between them concurrently
+        
+        phase_inputs maps phase names to the inputs execute_phase would take; each phase
+        also receives, apart from those inputs, the results of the phases producing its
+        declared inputs. A phase with a fan_out_input list runs one job per item, and the
+        job results are merged into one. Phases whose inputs, definition
+        and upstream phases are unchanged since the last run are skipped and their
+        recorded results reused, unless force is set.
+        """
+        phase_inputs = phase_inputs or {}
+        unknown = sorted(set(phase_inputs) - set(self.phases))
+        if unknown:
+            raise ValueError(f"Invalid phase: {', '.join(unknown)}")
+        
+        graph = self.build_phase_graph()
+        dependents: Dict[str, List[str]] = {name: [] for name in graph}
+        for name, dependencies in graph.items():
+            for dependency in dependencies:
+                dependents[dependency].append(name)
+        waiting = {name: len(dependencies) for name, dependencies in graph.items()}
+        
+        manifest_path = self.project_path / self.WORKFLOW_MANIFEST
+        manifest: Dict[str, Any] = {}
+        if manifest_path.exists():
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+        
+        fingerprints: Dict[str, str] = {}
+        phase_results: Dict[str, Dict[str, Any]] = {}
+        timings: Dict[str, PhaseTiming] = {}
+        job_results: Dict[str, List[Optional[Dict[str, Any]]]] = {}
+        pending: Dict[Future, Tuple[str, int]] = {}
+        ready = deque(name for name, count in waiting.items() if count == 0)
+        started = time.perf_counter()
+        
+        def finish(name: str, status: str, result: Dict[str, Any]):
+            phase_results[name] = result
+            manifest[name] = {"fingerprint": fingerprints[name], "result": result}
+            timing = timings[name]
+            timing.status, timing.finished = status, time.perf_counter() - started
+            for dependent in dependents[name]:
+                waiting[dependent] -= 1
+                if waiting[dependent] == 0:
+                    ready.append(dependent)
+        
+        max_workers = max_workers or min(32, (os.cpu_count() or 1) * 4)
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                while ready or pending:
+                    while ready:
+                        name = ready.popleft()
+                        phase = self.phases[name]
+                        inputs = dict(phase_inputs.get(name, {}))
+                        fingerprints[name] = self._phase_fingerprint(
+                            phase, inputs, [fingerprints[dependency] for dependency in graph[name]]
+                        )
+                        timings[name] = PhaseTiming(name, "running", graph[name], time.perf_counter() - started, 0.0)
+                        
+                        previous = manifest.get(name)
+                        results_path = self.project_path / name / f"{name}-results.json"
+                        if (not force and previous and previous["fingerprint"] == fingerprints[name]
+                                and results_path.exists()):
+                            logger.info(f"Skipping phase: {phase.name} (inputs unchanged)")
+                            finish(name, "skipped", previous["result"])
+                            continue
+                        
+                        # Upstream results fill the declared inputs the caller did not supply
+                        upstream = {
+                            output: phase_results[dependency]["results"]
+                            for dependency in graph[name]
+                            for output in self.phases[dependency].outputs
+                            if output in phase.inputs and output not in inputs
+                        }
+                        
+                        jobs = [inputs]
+                        items = inputs.get(phase.fan_out_input) if phase.fan_out_input else None
+                        if isinstance(items, list) and len(items) > 1:
+                            jobs = [{**inputs, phase.fan_out_input: [item]} for item in items]
+                        logger.info(f"Executing phase: {phase.name}" + (f" as {len(jobs)} jobs" if len(jobs) > 1 else ""))
+                        timings[name].jobs = len(jobs)
+                        job_results[name] = [None] * len(jobs)
+                        for index, inputs_for_job in enumerate(jobs):
+                            pending[executor.submit(self._execute_phase_logic, phase, inputs_for_job,
+                                                    upstream)] = (name, index)
+                    
+                    if not pending:
+                        break
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        name, index = pending.pop(future)
+                        job_results[name][index] = future.result()
+                        if all(result is not None for result in job_results[name]):
+                            results = job_results[name][0]
+                            if len(job_results[name]) > 1:
+                                results = self._merge_job_results(self.phases[name], phase_inputs[name],
+                                                                  job_results[name])
+                            finish(name, "executed", self._complete_phase(name, results))
+        finally:
+            # Record whatever completed so a rerun after a failure skips it
+            with open(manifest_path, 'w') as f:
+                json.dump(manifest, f, indent=2)
+        wall_seconds = time.perf_counter() - started
+        
+        # Longest chain of measured phase durations through the dependency graph
+        chain_seconds: Dict[str, float] = {}
+        chain_previous: Dict[str, Optional[str]] = {}
+        for name in timings:
+            previous = max(graph[name], key=lambda dependency: chain_seconds[dependency], default=None)
+            chain_seconds[name] = timings[name].seconds + (chain_seconds[previous] if previous else 0.0)
+            chain_previous[name] = previous
+        critical_path: List[str] = []
+        current = max(chain_seconds, key=chain_seconds.get, default=None)
+        critical_path_seconds = chain_seconds[current] if current else 0.0
+        while current:
+            critical_path.insert(0, current)
+            current = chain_previous[current]
+        
+        report = WorkflowReport(
+            phase_results={name: phase_results[name] for name in graph},
+            timings={name: timings[name] for name in graph},
+            critical_path=critical_path,
+            critical_path_seconds=critical_path_seconds,
+            wall_seconds=wall_seconds
+        )
+        logger.info(f"Workflow executed {len(graph) - len(report.skipped)} phases, skipped "
+                    f"{len(report.skipped)} in {wall_seconds:.3f}s (critical path "
+                    f"{' -> '.join(critical_path)}: {critical_path_seconds:.3f}s)")
+        return report
+    
+    def _phase_fingerprint(self, phase: SpecificationPhase, inputs: Dict[str, Any],
+                           upstream: List[str]) -> str:
+        """Hash of everything a phase's results depend on"""
+        payload = json.dumps({"phase": asdict(phase), "inputs": inputs, "upstream": upstream},
+                             sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def _merge_job_results(self, phase: SpecificationPhase, inputs: Dict[str, Any],
+                           job_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Combine fanned-out job results into one phase result
+        
+        Every other key the jobs report is kept: numbers are summed, values all jobs
+        agree on are kept as is, and anything else becomes a list in job order.
+        """
+        merged = {
+            "phase_name": phase.name,
+            "description": phase.description,
+            "inputs_processed": list(inputs.keys()),
+            "outputs_generated": phase.outputs,
+            "timestamp": datetime.now().isoformat()
+        }
+        for key in dict.fromkeys(key for result in job_results for key in result):
+            if key in merged:
+                continue
+            values = [result[key] for result in job_results if key in result]
+            if all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in values):
+                merged[key] = sum(values)
+            elif all(value == values[0] for value in values):
+                merged[key] = values[0]
+            else:
+                merged[key] = values
+        merged["jobs"] = [
+            {phase.fan_out_input: item, **result}
+            for item, result in zip(inputs[phase.fan_out_input], job_results)
+        ]
+        return merged
+    
+    def _execute_phase_logic(self, phase: SpecificationPhase, inputs: Dict[str, Any],
+                             upstream: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Execute the core logic for a specific phase
+        
+        upstream holds results of earlier phases keyed by the declared input they produce.
+        """
         # This is a template implementation
         # In a real implementation, this would integrate with AI agents
         
@@ -410,6 +1011,8 @@ class SpecKitImplementationToolkit:
             "outputs_generated": phase.outputs,
             "timestamp": datetime.now().isoformat()
         }
+        if upstream:
+            results["upstream_inputs"] = list(upstream.keys())
         
         # Add phase-specific processing
         if phase.name == "Specify":
@@ -457,7 +1060,20 @@ class SpecKitImplementationToolkit:
     def generate_implementation_report(self) -> str:
         """Generate comprehensive implementation report"""
         logger.info("Generating implementation report")
+        report = self._render_implementation_report()
         
+        # Save report
+        self._write_text(self.project_path / "implementation-report.md", report)
+        return report
+    
+    async def agenerate_implementation_report(self) -> str:
+        """Generate the implementation report, saving it from a worker thread"""
+        logger.info("Generating implementation report")
+        report = self._render_implementation_report()
+        await asyncio.to_thread(self._write_text, self.project_path / "implementation-report.md", report)
+        return report
+    
+    def _render_implementation_report(self) -> str:
         report = f"""
 # {self.config.project_name} - Implementation Report
 
@@ -512,12 +1128,6 @@ class SpecKitImplementationToolkit:
 
 *This report was generated by the SpecKit Implementation Toolkit*
 """
-        
-        # Save report
-        report_path = self.project_path / "implementation-report.md"
-        with open(report_path, 'w') as f:
-            f.write(report)
-        
         return report
 
 def create_sample_project():
@@ -541,37 +1151,28 @@ def create_sample_project():
     
     project_config = toolkit.initialize_project(requirements)
     
-    # Execute phases
-    phase_results = []
-    
-    # Specify phase
-    specify_results = toolkit.execute_phase("specify", {"requirements": requirements})
-    phase_results.append(specify_results)
-    
-    # Plan phase
-    plan_results = toolkit.execute_phase("plan", {
-        "specification": "Generated specification",
-        "constraints": ["Web-based", "Responsive design", "Modern browser support"]
-    })
-    phase_results.append(plan_results)
-    
-    # Tasks phase
-    task_results = toolkit.execute_phase("tasks", {
-        "architecture": "MVC architecture with REST API",
-        "strategy": "Iterative development with AI assistance"
-    })
-    phase_results.append(task_results)
-    
-    # Implement phase
-    implement_results = toolkit.execute_phase("implement", {
-        "tasks": ["UI components", "API endpoints", "Database schema"],
-        "tests": ["Unit tests", "Integration tests"]
+    # Execute phases in dependency order; implement tasks run as parallel jobs
+    workflow = toolkit.execute_workflow({
+        "specify": {"requirements": requirements},
+        "plan": {
+            "specification": "Generated specification",
+            "constraints": ["Web-based", "Responsive design", "Modern browser support"]
+        },
+        "tasks": {
+            "architecture": "MVC architecture with REST API",
+            "strategy": "Iterative development with AI assistance"
+        },
+        "implement": {
+            "tasks": ["UI components", "API endpoints", "Database schema"],
+            "tests": ["Unit tests", "Integration tests"]
+        }
     })
-    phase_results.append(implement_results)
+    phase_results = list(workflow.phase_results.values())
     
     # Generate report
     report = toolkit.generate_implementation_report()
     
+    print(workflow.format_timing())
     print(f"Sample project created at: {toolkit.project_path}")
     print(f"Implementation report: {toolkit.project_path}/implementation-report.md")
     
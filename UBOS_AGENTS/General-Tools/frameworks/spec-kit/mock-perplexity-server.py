@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Mock Perplexity Server
+Local stand-in for the Perplexity /chat/completions endpoint
+
+This server answers research requests with synthetic completions so the
+research agent's HTTP layer can be exercised and benchmarked offline.
+"""
+
+import json
+import logging
+import random
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+@dataclass
+class MockServerConfig:
+    """Behaviour knobs for the mock server"""
+    latency: float = 0.0  # seconds added to every response
+    latency_jitter: float = 0.0  # extra uniformly distributed seconds
+    error_rate: float = 0.0  # probability of a 502 response
+    rate_limit_rate: float = 0.0  # probability of a 429 response
+    retry_after: float = 1.0  # Retry-After seconds sent with 429 responses
+    response_size: int = 0  # minimum characters of completion content
+    model_latency: Dict[str, float] = field(default_factory=dict)  # extra seconds per backend model
+    slow_rate: float = 0.0  # probability of a tail-latency response
+    slow_latency: float = 0.0  # extra seconds added to tail-latency responses
+    seed: Optional[int] = None
+
+class MockServerStats:
+    """Thread-safe counters of what the server has answered"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.rate_limited = 0
+
+    def record(self, status: int):
+        with self._lock:
+            self.requests += 1
+            if status == 429:
+                self.rate_limited += 1
+            elif status >= 500:
+                self.errors += 1
+
+def build_completion(payload: Dict[str, Any], response_size: int = 0) -> Dict[str, Any]:
+    """Build a chat completion response shaped like Perplexity's"""
+    messages = payload.get("messages", [])
+    prompt = messages[-1].get("content", "") if messages else ""
+    content = f"# Mock Analysis\n\n{prompt.strip()[:500]}"
+    if len(content) < response_size:
+        filler = "Mock analysis paragraph with synthetic research findings. "
+        content += "\n\n" + (filler * (response_size // len(filler) + 1))[:response_size - len(content)]
+
+    return {
+        "id": f"mock-{int(time.time() * 1000)}",
+        "model": payload.get("model", ""),
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "choices": [
+            {
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {
+                    "role": "assistant",
+                    "content": content
+                }
+            }
+        ],
+        "citations": [
+            {
+                "url": "https://github.com/github/spec-kit",
+                "title": "Mock Source",
+                "text": "Mock source content"
+            }
+        ],
+        "usage": {
+            "prompt_tokens": len(prompt.split()),
+            "completion_tokens": len(content.split()),
+            "total_tokens": len(prompt.split()) + len(content.split())
+        }
+    }
+
+class MockPerplexityHandler(BaseHTTPRequestHandler):
+    """Request handler serving /chat/completions"""
+
+    # HTTP/1.1 keeps connections alive between requests
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length) if length else b""
+
+        if self.path.rstrip("/") != "/chat/completions":
+            self._send_json(404, {"error": {"message": f"Unknown path: {self.path}"}})
+            return
+
+        try:
+            payload = json.loads(body or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": {"message": "Invalid JSON body"}})
+            return
+
+        config: MockServerConfig = self.server.config
+        rng: random.Random = self.server.rng
+        with self.server.rng_lock:
+            delay = config.latency + rng.uniform(0, config.latency_jitter)
+            if rng.random() < config.slow_rate:
+                delay += config.slow_latency
+            roll = rng.random()
+        delay += config.model_latency.get(payload.get("model", ""), 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+        if roll < config.rate_limit_rate:
+            self._send_json(429, {"error": {"message": "Rate limit exceeded"}},
+                            headers={"Retry-After": f"{config.retry_after:g}"})
+            return
+        if roll < config.rate_limit_rate + config.error_rate:
+            self._send_json(502, {"error": {"message": "Bad gateway"}})
+            return
+
+        completion = build_completion(payload, config.response_size)
+        if payload.get("stream"):
+            self._send_event_stream(completion)
+        else:
+            self._send_json(200, completion)
+
+    def _send_json(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        data = json.dumps(body).encode("utf-8")
+        self.server.stats.record(status)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_event_stream(self, completion: Dict[str, Any], chunk_size: int = 64):
+        """Send a completion as server-sent events, one content delta per event"""
+        self.server.stats.record(200)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        content = completion["choices"][0]["message"]["content"]
+        for start in range(0, len(content), chunk_size):
+            event = {
+                "id": completion["id"],
+                "model": completion["model"],
+                "object": "chat.completion.chunk",
+                "citations": completion["citations"],
+                "choices": [{"index": 0, "delta": {"content": content[start:start + chunk_size]}}]
+            }
+            self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def log_message(self, format: str, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+class _MockHTTPServer(ThreadingHTTPServer):
+    # A deep accept backlog keeps concurrent benchmark connections from stalling on SYN retries
+    request_queue_size = 128
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients abandoning cancelled or hedged requests is expected, not a server fault
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            logger.debug(f"Client {client_address} disconnected before the response was sent")
+            return
+        super().handle_error(request, client_address)
+
+class MockPerplexityServer:
+    """Threaded mock server usable as a context manager"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, config: Optional[MockServerConfig] = None):
+        self.config = config or MockServerConfig()
+        self.stats = MockServerStats()
+        self.httpd = _MockHTTPServer((host, port), MockPerplexityHandler)
+        # The handler reads its behaviour from the server instance
+        self.httpd.config = self.config
+        self.httpd.stats = self.stats
+        self.httpd.rng = random.Random(self.config.seed)
+        self.httpd.rng_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockPerplexityServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "MockPerplexityServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve a mock Perplexity /chat/completions endpoint")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--latency-jitter", type=float, default=0.0, help="Extra random seconds per response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of a 502 response")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Probability of a 429 response")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds for 429 responses")
+    parser.add_argument("--response-size", type=int, default=0, help="Minimum completion length in characters")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Probability of a tail-latency response")
+    parser.add_argument("--slow-latency", type=float, default=0.0, help="Extra seconds for tail-latency responses")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    server = MockPerplexityServer(args.host, args.port, MockServerConfig(
+        latency=args.latency,
+        latency_jitter=args.latency_jitter,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        response_size=args.response_size,
+        slow_rate=args.slow_rate,
+        slow_latency=args.slow_latency,
+        seed=args.seed
+    ))
+    print(f"🧪 Mock Perplexity server listening on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
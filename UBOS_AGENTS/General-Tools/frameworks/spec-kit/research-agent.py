@@ -7,20 +7,40 @@ This agent provides comprehensive research capabilities for SpecKit methodology
 using Perplexity Sonar's deep research and reasoning models.
 """
 
+import argparse
 import asyncio
+import bisect
+import contextvars
+import hashlib
+import importlib.util
+import io
 import json
 import os
+import sqlite3
+import time
 import logging
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass, asdict
-from datetime import datetime
+import math
+import random
+import re
+from collections import deque
+from contextlib import aclosing, contextmanager, nullcontext
+from typing import AsyncIterator, Callable, Dict, Iterable, Iterator, List, Any, Mapping, Optional, Sequence, TextIO, Tuple, Union
+from dataclasses import dataclass, asdict, replace
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
 import httpx
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-@dataclass
+def content_fingerprint(data: Any) -> str:
+    """SHA-256 of the canonical JSON form of data"""
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+@dataclass(slots=True)
 class ResearchQuery:
     """Research query configuration"""
     query: str
@@ -33,24 +53,1215 @@ class ResearchQuery:
         if self.follow_up_queries is None:
             self.follow_up_queries = []
 
-@dataclass
+class SourceList(Sequence):
+    """Compact source table that materialises source dicts only when accessed
+    
+    Each source is held as a (url, title, snippet) tuple, or as an integer reference
+    into a SourceIndex when one is given; indexing or iterating yields the
+    {"url", "title", "snippet"} dicts the rest of the agent expects.
+    """
+    __slots__ = ("_entries", "_index")
+    
+    SNIPPET_LENGTH = 200
+    
+    def __init__(self, entries: Iterable[Union[Tuple[str, str, str], int]] = (),
+                 index: Optional["SourceIndex"] = None):
+        self._entries = tuple(entries)
+        self._index = index
+    
+    @classmethod
+    def from_citations(cls, citations: Iterable[Union[Dict[str, Any], str]]) -> "SourceList":
+        """Build from Perplexity citations, which may be dicts or bare URLs"""
+        entries = []
+        for citation in citations:
+            if isinstance(citation, str):
+                entries.append((citation, citation, ""))
+                continue
+            text = citation.get("text", "")
+            snippet = text[:cls.SNIPPET_LENGTH] + "..." if len(text) > cls.SNIPPET_LENGTH else text
+            entries.append((citation.get("url", ""), citation.get("title", ""), snippet))
+        return cls(entries)
+    
+    @classmethod
+    def from_sources(cls, sources: Iterable[Dict[str, Any]]) -> "SourceList":
+        """Build from already formatted source dicts"""
+        return cls(
+            (source.get("url", ""), source.get("title", ""), source.get("snippet", ""))
+            for source in sources
+        )
+    
+    def entries(self) -> Iterator[Tuple[str, str, str]]:
+        """(url, title, snippet) tuples, resolving index references"""
+        if self._index is None:
+            return iter(self._entries)
+        return map(self._index.entry, self._entries)
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __getitem__(self, index):
+        if self._index is not None:
+            if isinstance(index, slice):
+                return [self._as_dict(self._index.entry(source_id)) for source_id in self._entries[index]]
+            return self._as_dict(self._index.entry(self._entries[index]))
+        if isinstance(index, slice):
+            return [self._as_dict(entry) for entry in self._entries[index]]
+        return self._as_dict(self._entries[index])
+    
+    def __eq__(self, other) -> bool:
+        if isinstance(other, SourceList):
+            if self._index is other._index:
+                return self._entries == other._entries
+            return list(self.entries()) == list(other.entries())
+        return list(self) == other
+    
+    def __repr__(self) -> str:
+        return f"SourceList({len(self._entries)} sources)"
+    
+    @staticmethod
+    def _as_dict(entry: Tuple[str, str, str]) -> Dict[str, str]:
+        url, title, snippet = entry
+        return {"url": url, "title": title, "snippet": snippet}
+
+class SourceIndex:
+    """Interned URL table shared by every result, with hit counts and citing topics
+    
+    Results hold integer references into the table instead of their own copies, and
+    sources are kept ranked by hits as they are cited, so the most cited sources are
+    always the head of the ranking.
+    """
+    
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._entries: List[Tuple[str, str, str]] = []
+        self._hits: List[int] = []
+        self._topics: List[Dict[str, None]] = []  # insertion-ordered set per source
+        # Source ids by descending hits; _block_start[n] is the first rank holding n hits
+        self._ranking: List[int] = []
+        self._rank: List[int] = []
+        self._block_start: Dict[int, int] = {}
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __contains__(self, url: str) -> bool:
+        return url in self._ids
+    
+    def intern(self, url: str, title: str = "", snippet: str = "") -> int:
+        """Id of the source for url, adding it on first sight
+        
+        The first title and snippet seen for a URL are kept; later citations only fill in blanks.
+        """
+        source_id = self._ids.get(url)
+        if source_id is None:
+            source_id = self._ids[url] = len(self._entries)
+            self._entries.append((url, title, snippet))
+            self._hits.append(0)
+            self._topics.append({})
+            self._rank.append(len(self._ranking))
+            self._block_start.setdefault(0, len(self._ranking))
+            self._ranking.append(source_id)
+        else:
+            _, known_title, known_snippet = self._entries[source_id]
+            if (title and not known_title) or (snippet and not known_snippet):
+                self._entries[source_id] = (url, known_title or title, known_snippet or snippet)
+        return source_id
+    
+    def cite(self, source_id: int, topic: Optional[str] = None):
+        """Count one citation of a source, keeping the ranking sorted in constant time"""
+        hits = self._hits[source_id]
+        # Swap the source to the front of its hit block, which then becomes the tail of the next block up
+        block_start = self._block_start[hits]
+        rank = self._rank[source_id]
+        displaced = self._ranking[block_start]
+        self._ranking[block_start], self._ranking[rank] = source_id, displaced
+        self._rank[source_id], self._rank[displaced] = block_start, rank
+        
+        next_rank = block_start + 1
+        if next_rank < len(self._ranking) and self._hits[self._ranking[next_rank]] == hits:
+            self._block_start[hits] = next_rank
+        else:
+            del self._block_start[hits]
+        self._block_start.setdefault(hits + 1, block_start)
+        self._hits[source_id] = hits + 1
+        
+        if topic is not None:
+            self._topics[source_id][topic] = None
+    
+    def add(self, entries: Iterable[Tuple[str, str, str]], topic: Optional[str] = None) -> SourceList:
+        """Intern and cite (url, title, snippet) entries, returning a SourceList of references"""
+        source_ids = []
+        for url, title, snippet in entries:
+            source_id = self.intern(url, title, snippet)
+            self.cite(source_id, topic)
+            source_ids.append(source_id)
+        return SourceList(source_ids, index=self)
+    
+    def entry(self, source_id: int) -> Tuple[str, str, str]:
+        return self._entries[source_id]
+    
+    def hits(self, url: str) -> int:
+        source_id = self._ids.get(url)
+        return 0 if source_id is None else self._hits[source_id]
+    
+    def topics(self, url: str) -> List[str]:
+        source_id = self._ids.get(url)
+        return [] if source_id is None else list(self._topics[source_id])
+    
+    def top_sources(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Most cited sources, read straight off the head of the ranking"""
+        top = []
+        for source_id in self._ranking[:limit]:
+            url, title, snippet = self._entries[source_id]
+            top.append({
+                "url": url,
+                "title": title,
+                "snippet": snippet,
+                "hits": self._hits[source_id],
+                "topics": list(self._topics[source_id])
+            })
+        return top
+
+@dataclass(slots=True)
+class FollowUpInsight:
+    """Follow-up answer reduced to what documentation needs"""
+    query: str
+    content: str
+    latency: float = 0.0
+
+@dataclass(slots=True)
 class ResearchResult:
     """Research result structure"""
     query: str
     response: str
-    sources: List[Dict[str, Any]]
-    timestamp: datetime
+    sources: Sequence[Dict[str, Any]]
+    timestamp: float  # epoch seconds; datetime values are converted
     model_used: str
-    follow_up_insights: List[Dict[str, Any]] = None
+    follow_up_insights: List[FollowUpInsight] = None
+    latency: float = 0.0  # seconds spent on the main request
+    is_mock: bool = False  # True for placeholder results produced without the API
     
     def __post_init__(self):
         if self.follow_up_insights is None:
             self.follow_up_insights = []
+        if not isinstance(self.sources, SourceList):
+            self.sources = SourceList.from_sources(self.sources)
+        if isinstance(self.timestamp, datetime):
+            self.timestamp = self.timestamp.timestamp()
+    
+    @property
+    def generated_at(self) -> datetime:
+        return datetime.fromtimestamp(self.timestamp)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serialisable form of the result"""
+        return {
+            "query": self.query,
+            "response": self.response,
+            "sources": list(self.sources),
+            "timestamp": self.timestamp,
+            "model_used": self.model_used,
+            "follow_up_insights": [asdict(insight) for insight in self.follow_up_insights],
+            "latency": self.latency,
+            "is_mock": self.is_mock
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ResearchResult":
+        return cls(
+            query=data["query"],
+            response=data["response"],
+            sources=SourceList.from_sources(data.get("sources", [])),
+            timestamp=data["timestamp"],
+            model_used=data["model_used"],
+            follow_up_insights=[FollowUpInsight(**insight) for insight in data.get("follow_up_insights", [])],
+            latency=data.get("latency", 0.0),
+            is_mock=data.get("is_mock", False)
+        )
+
+@dataclass(slots=True)
+class SearchHit:
+    """One search result; higher scores are better matches
+    
+    The fingerprint identifies the full result, as content_fingerprint([query, response]),
+    in a history spill file or JSON results written by the same sweep.
+    """
+    score: float
+    fingerprint: str
+    query: str
+    response: str
+    model_used: str
+    timestamp: float
+    
+    @property
+    def generated_at(self) -> datetime:
+        return datetime.fromtimestamp(self.timestamp)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "score": self.score,
+            "fingerprint": self.fingerprint,
+            "query": self.query,
+            "response": self.response,
+            "model_used": self.model_used,
+            "timestamp": self.timestamp
+        }
+
+class ResearchSearchIndex:
+    """Full-text index over research responses and source snippets
+    
+    Backed by an SQLite FTS5 table ranked with BM25, in memory by default or in a
+    file that persists across runs so past research can be found before paying for
+    a new request. Results are indexed as they are added; placeholder results and
+    results already indexed (same query and response) are skipped.
+    
+    Only the searchable text is stored, with each result's fingerprint, model and
+    timestamp; sources beyond their text and follow-up insights are not kept.
+    """
+    
+    # BM25 column weights: matches in the query text count most, source snippets least
+    COLUMN_WEIGHTS = (2.0, 1.0, 0.5)
+    # Words found in more than this share of results are left out of the match unless nothing else is left
+    COMMON_WORD_RATIO = 0.5
+    # Candidate results scored when falling back to partial matches; the rarest word is always included
+    MAX_FALLBACK_CANDIDATES = 1000
+    
+    def __init__(self, path: Optional[str] = None):
+        if path is not None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # One long-lived connection keeps lookups free of connection setup
+        self._conn = sqlite3.connect(path or ":memory:")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS results (
+                id INTEGER PRIMARY KEY,
+                fingerprint TEXT UNIQUE NOT NULL,
+                model_used TEXT NOT NULL,
+                timestamp REAL NOT NULL
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS results_fts USING fts5(query, response, sources);
+            CREATE VIRTUAL TABLE IF NOT EXISTS temp.results_vocab USING fts5vocab(main, results_fts, row);
+        """)
+        self._count = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    def add(self, result: ResearchResult):
+        self.add_many([result])
+    
+    def add_many(self, results: Iterable[ResearchResult]):
+        """Index results in one transaction"""
+        with self._conn:
+            for result in results:
+                if result.is_mock:
+                    continue
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO results (fingerprint, model_used, timestamp) VALUES (?, ?, ?)",
+                    (content_fingerprint([result.query, result.response]), result.model_used, result.timestamp)
+                )
+                if not cursor.rowcount:
+                    continue
+                source_text = "\n".join(
+                    f"{title} {snippet} {url}" for url, title, snippet in result.sources.entries()
+                )
+                self._conn.execute(
+                    "INSERT INTO results_fts (rowid, query, response, sources) VALUES (?, ?, ?, ?)",
+                    (cursor.lastrowid, result.query, result.response, source_text)
+                )
+                self._count += 1
+    
+    def search(self, query: str, top_k: int = 10) -> List[SearchHit]:
+        """Best BM25 matches for the words in query
+        
+        Results containing every indexed word rank first. Words no result contains are
+        ignored, as are words most results contain, which barely move BM25 scores but
+        multiply the results to score. If fewer than top_k results contain every word,
+        results containing the rarest words fill the remaining places.
+        """
+        document_frequency = {}
+        for word in re.findall(r"\w+", query.lower()):
+            row = self._conn.execute("SELECT doc FROM results_vocab WHERE term = ?", (word,)).fetchone()
+            if row is not None:
+                document_frequency[word] = row[0]
+        if not document_frequency:
+            return []
+        words = sorted(document_frequency, key=document_frequency.get)
+        words = [
+            word for word in words if document_frequency[word] <= self._count * self.COMMON_WORD_RATIO
+        ] or words[:1]
+        
+        # Quoting each word keeps FTS5 query syntax out of free text
+        terms = [f'"{word}"' for word in words]
+        # Matching every word keeps the candidate set, and so the BM25 scoring, small
+        rows = self._ranked_matches(" ".join(terms), top_k)
+        if len(rows) < top_k and len(terms) > 1:
+            # Fill with results containing any of the rarest words, as many as the candidate budget allows
+            fallback_terms, candidates = terms[:1], document_frequency[words[0]]
+            for word, term in zip(words[1:], terms[1:]):
+                candidates += document_frequency[word]
+                if candidates > self.MAX_FALLBACK_CANDIDATES:
+                    break
+                fallback_terms.append(term)
+            found = {row[0] for row in rows}
+            for row in self._ranked_matches(" OR ".join(fallback_terms), top_k + len(rows)):
+                if row[0] not in found:
+                    rows.append(row)
+                    if len(rows) == top_k:
+                        break
+        
+        # bm25() is lower for better matches
+        return [SearchHit(-rank, *fields) for _, rank, *fields in rows]
+    
+    def _ranked_matches(self, match: str, limit: int) -> List[Tuple[Any, ...]]:
+        # Rank inside the full-text table first so only the winners are joined and loaded
+        return self._conn.execute(
+            "SELECT hits.rowid, hits.rank, results.fingerprint, results_fts.query, results_fts.response,"
+            "  results.model_used, results.timestamp FROM ("
+            "  SELECT rowid, bm25(results_fts, ?, ?, ?) AS rank FROM results_fts"
+            "  WHERE results_fts MATCH ? ORDER BY rank LIMIT ?"
+            ") AS hits JOIN results ON results.id = hits.rowid"
+            " JOIN results_fts ON results_fts.rowid = hits.rowid ORDER BY hits.rank",
+            (*self.COLUMN_WEIGHTS, match, limit)
+        ).fetchall()
+    
+    def close(self):
+        self._conn.close()
+
+class ResearchHistory:
+    """Research results kept in memory up to a limit, with older ones spilled to disk
+    
+    Without a limit this behaves like the plain list it replaces. With a limit, the
+    oldest results are appended to spill_path as JSON lines, or discarded if no
+    spill path is given. The spill file belongs to this history and is truncated
+    when the history is created. Every result is also added to search_index, if
+    given, whether or not it stays in memory.
+    """
+    
+    def __init__(self, max_in_memory: Optional[int] = None, spill_path: Optional[str] = None,
+                 search_index: Optional[ResearchSearchIndex] = None):
+        self.max_in_memory = max_in_memory
+        self.spill_path = Path(spill_path) if spill_path else None
+        self.search_index = search_index
+        self._recent: deque = deque()
+        self._spilled = 0
+        if self.spill_path is not None:
+            self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+            self.spill_path.write_text("")
+    
+    def search(self, query: str, top_k: int = 10) -> List[SearchHit]:
+        """Best matches for query among indexed results"""
+        if self.search_index is None:
+            raise ValueError("ResearchHistory was created without a search index")
+        return self.search_index.search(query, top_k)
+    
+    def append(self, result: ResearchResult):
+        if self.search_index is not None:
+            self.search_index.add(result)
+        self._keep(result)
+    
+    def extend(self, results: Iterable[ResearchResult]):
+        results = list(results)
+        if self.search_index is not None:
+            self.search_index.add_many(results)
+        for result in results:
+            self._keep(result)
+    
+    def _keep(self, result: ResearchResult):
+        self._recent.append(result)
+        if self.max_in_memory is None or len(self._recent) <= self.max_in_memory:
+            return
+        
+        oldest = self._recent.popleft()
+        if self.spill_path is not None:
+            with open(self.spill_path, 'a') as f:
+                f.write(json.dumps(oldest.to_dict()) + "\n")
+            self._spilled += 1
+    
+    
+    def __len__(self) -> int:
+        return self._spilled + len(self._recent)
+    
+    def __iter__(self) -> Iterator[ResearchResult]:
+        """Yield results oldest first, reading spilled ones back from disk"""
+        if self._spilled:
+            with open(self.spill_path) as f:
+                for line in f:
+                    yield ResearchResult.from_dict(json.loads(line))
+        yield from self._recent
+
+class CheckpointJournal:
+    """Append-only JSON lines journal of completed research topics and follow-ups
+    
+    Each record is flushed and fsynced as soon as its work finishes, so a sweep that
+    is killed part way can resume without repeating completed requests. Records are
+    matched by a fingerprint of their query, so edited queries are researched again.
+    """
+    
+    def __init__(self, path: str, resume: bool = False):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._topics: Dict[str, Dict[str, Any]] = {}
+        self._follow_ups: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        if resume and self.path.exists():
+            self._load()
+        else:
+            self.path.write_text("")
+    
+    def _load(self):
+        with open(self.path, 'rb+') as f:
+            data = f.read()
+            # Drop a torn final line from an interrupted write so new records start cleanly
+            complete_length = data.rfind(b"\n") + 1
+            if complete_length < len(data):
+                f.truncate(complete_length)
+        
+        for line in data[:complete_length].decode("utf-8").splitlines():
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("type") == "topic":
+                self._topics[record["topic"]] = record
+            elif record.get("type") == "follow_up":
+                self._follow_ups[(record["topic"], record["query_fingerprint"])] = record
+        logger.info(f"Loaded checkpoint journal: {len(self._topics)} topics, "
+                    f"{len(self._follow_ups)} follow-ups completed")
+    
+    def _append(self, record: Dict[str, Any]):
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+    
+    def completed_result(self, topic: str, query: ResearchQuery) -> Optional[ResearchResult]:
+        """Result recorded for topic, if it was produced by the same query"""
+        record = self._topics.get(topic)
+        if record is None or record["query_fingerprint"] != content_fingerprint(asdict(query)):
+            return None
+        return ResearchResult.from_dict(record["result"])
+    
+    def completed_follow_ups(self, topic: str, follow_up_queries: List[ResearchQuery]) -> Dict[str, FollowUpInsight]:
+        """Recorded insights for topic, keyed by follow-up query text"""
+        completed = {}
+        for follow_up_query in follow_up_queries:
+            record = self._follow_ups.get((topic, content_fingerprint(asdict(follow_up_query))))
+            if record is not None:
+                completed[follow_up_query.query] = FollowUpInsight(**record["insight"])
+        return completed
+    
+    def record_topic(self, topic: str, query: ResearchQuery, result: ResearchResult):
+        record = {
+            "type": "topic",
+            "topic": topic,
+            "query_fingerprint": content_fingerprint(asdict(query)),
+            "result": result.to_dict()
+        }
+        self._topics[topic] = record
+        self._append(record)
+    
+    def record_follow_up(self, topic: str, follow_up_query: ResearchQuery, insight: FollowUpInsight):
+        record = {
+            "type": "follow_up",
+            "topic": topic,
+            "query_fingerprint": content_fingerprint(asdict(follow_up_query)),
+            "insight": asdict(insight)
+        }
+        self._follow_ups[(topic, record["query_fingerprint"])] = record
+        self._append(record)
+
+class CircuitOpenError(Exception):
+    """Raised when the circuit breaker is rejecting requests"""
+
+class DeadlineExceededError(Exception):
+    """Raised when the sweep deadline budget has been spent"""
+
+@dataclass
+class ReliabilityMetrics:
+    """Counters describing retries, timeouts and fail-fast behaviour"""
+    requests: int = 0
+    retries: int = 0
+    rate_limited: int = 0
+    server_errors: int = 0
+    timeouts: int = 0
+    circuit_rejections: int = 0
+    deadline_exceeded: int = 0
+    fallbacks_to_mock: int = 0
+    coalesced_requests: int = 0  # duplicate calls served by an identical in-flight request
+    budget_downgrades: int = 0
+    budget_rejections: int = 0
+    routed_follow_ups: int = 0  # follow-ups sent to a different backend tier than requested
+    hedged_requests: int = 0
+    hedge_wins: int = 0  # hedges that answered before the original request
+
+class ModelRouter:
+    """Rolling latency and error statistics per backend model, used to route and hedge requests
+    
+    Aliases that share a backend model are one tier. Healthy tiers with too few
+    samples are explored before the fastest measured tier is trusted, and a small
+    share of routed requests keeps exploring so old measurements are refreshed.
+    """
+    
+    # Model aliases whose output is acceptable for each depth level
+    DEPTH_TIERS = {
+        "shallow": ["sonar-small", "sonar-large", "sonar-reasoning", "sonar-huge"],
+        "medium": ["sonar-small", "sonar-large", "sonar-reasoning", "sonar-huge"],
+        "deep": ["sonar-large", "sonar-reasoning", "sonar-huge"],
+        "comprehensive": ["sonar-reasoning", "sonar-huge"]
+    }
+    
+    def __init__(self, models: Dict[str, str], window_size: int = 50, min_samples: int = 5,
+                 max_error_rate: float = 0.2, explore_rate: float = 0.05, seed: Optional[int] = None):
+        self.models = models
+        self.window_size = window_size
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self.explore_rate = explore_rate
+        self._rng = random.Random(seed)
+        self._latencies: Dict[str, deque] = {}
+        self._outcomes: Dict[str, deque] = {}
+        self._trials: Dict[str, int] = {}  # exploratory requests sent but not yet recorded
+    
+    def record(self, backend_model: str, latency: float, success: bool):
+        if self._trials.get(backend_model):
+            self._trials[backend_model] -= 1
+        outcomes = self._outcomes.setdefault(backend_model, deque(maxlen=self.window_size))
+        outcomes.append(success)
+        if success:
+            self._latencies.setdefault(backend_model, deque(maxlen=self.window_size)).append(latency)
+    
+    def latency_percentile(self, backend_model: str, percentile: float) -> Optional[float]:
+        """Latency percentile over the window, or None until enough samples exist"""
+        latencies = self._latencies.get(backend_model)
+        if not latencies or len(latencies) < self.min_samples:
+            return None
+        ordered = sorted(latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percentile / 100))]
+    
+    def error_rate(self, backend_model: str) -> float:
+        outcomes = self._outcomes.get(backend_model)
+        if not outcomes:
+            return 0.0
+        return outcomes.count(False) / len(outcomes)
+    
+    def is_healthy(self, backend_model: str) -> bool:
+        outcomes = self._outcomes.get(backend_model)
+        if not outcomes or len(outcomes) < self.min_samples:
+            return True
+        return self.error_rate(backend_model) <= self.max_error_rate
+    
+    def _eligible_backends(self, query: ResearchQuery) -> Dict[str, str]:
+        """Alias to send for each backend model acceptable at the query's depth
+        
+        The query's own alias stands for its backend, so a request is never moved
+        between aliases of the same model.
+        """
+        backends = {self.models.get(query.model, query.model): query.model}
+        for alias in self.DEPTH_TIERS.get(query.depth_level, []):
+            if alias in self.models:
+                backends.setdefault(self.models[alias], alias)
+        return backends
+    
+    def _fastest_healthy(self, backend_models: Iterable[str]) -> Optional[Tuple[float, str]]:
+        measured = []
+        for backend_model in backend_models:
+            median = self.latency_percentile(backend_model, 50)
+            if median is not None and self.is_healthy(backend_model):
+                measured.append((median, backend_model))
+        return min(measured) if measured else None
+    
+    def _unexplored(self, backend_models: Iterable[str]) -> List[str]:
+        """Healthy backends still short of min_samples, counting exploratory requests in flight"""
+        return [
+            backend_model for backend_model in backend_models
+            if len(self._latencies.get(backend_model, ())) + self._trials.get(backend_model, 0) < self.min_samples
+            and self.is_healthy(backend_model)
+        ]
+    
+    def _explore(self, candidates: List[str]) -> str:
+        backend_model = self._rng.choice(candidates)
+        self._trials[backend_model] = self._trials.get(backend_model, 0) + 1
+        return backend_model
+    
+    def route(self, query: ResearchQuery) -> str:
+        """Model alias for the fastest healthy backend that satisfies the query's depth level"""
+        backends = self._eligible_backends(query)
+        candidates = self._unexplored(backends)
+        if not candidates and self._rng.random() < self.explore_rate:
+            candidates = [backend_model for backend_model in backends if self.is_healthy(backend_model)]
+        if candidates:
+            return backends[self._explore(candidates)]
+        fastest = self._fastest_healthy(backends)
+        return backends[fastest[1]] if fastest else query.model
+    
+    def hedge_target(self, query: ResearchQuery) -> Optional[Tuple[str, float]]:
+        """Alias to hedge with and the delay (the current backend's p95) before doing so
+        
+        A faster measured backend is preferred, then a healthy unmeasured one. Failing
+        both the hedge goes to the same backend, since tail latency is mostly per request.
+        """
+        backend_model = self.models.get(query.model, query.model)
+        hedge_after = self.latency_percentile(backend_model, 95)
+        if hedge_after is None:
+            return None
+        
+        backends = self._eligible_backends(query)
+        alternatives = [alternative for alternative in backends if alternative != backend_model]
+        fastest = self._fastest_healthy(alternatives)
+        if fastest is not None and fastest[0] < self.latency_percentile(backend_model, 50):
+            return backends[fastest[1]], hedge_after
+        unexplored = self._unexplored(alternatives)
+        if unexplored:
+            return backends[self._explore(unexplored)], hedge_after
+        return query.model, hedge_after
+    
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Current p50/p95 latency and error rate per backend model"""
+        return {
+            backend_model: {
+                "p50": self.latency_percentile(backend_model, 50),
+                "p95": self.latency_percentile(backend_model, 95),
+                "error_rate": round(self.error_rate(backend_model), 3),
+                "samples": len(self._outcomes[backend_model])
+            }
+            for backend_model in self._outcomes
+        }
+
+class BudgetExceededError(Exception):
+    """Raised when the token or cost budget has been spent"""
+
+@dataclass
+class ResearchBudget:
+    """Token and cost limits for a research client
+    
+    Once the remaining share of either limit drops below downgrade_threshold, queries
+    are switched to the cheapest model tier and one step shallower depth.
+    """
+    max_tokens: Optional[int] = None
+    max_cost: Optional[float] = None  # USD
+    downgrade_threshold: float = 0.25
+    downgrade_model: str = "sonar-small"
+
+@dataclass(slots=True)
+class UsageRecord:
+    """Token usage and estimated cost of one API request"""
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+    cost: float
+    latency: float
+
+class UsageTracker:
+    """Running token and cost accounting, overall and for the current sweep
+    
+    Records are folded into totals as they arrive rather than kept, so a
+    long-running agent accounts for any number of requests in constant memory.
+    """
+    
+    # USD per million tokens plus a flat per-request fee
+    DEFAULT_PRICING = {
+        "llama-3.1-sonar-small-128k-online": {"prompt": 0.2, "completion": 0.2, "request": 0.005},
+        "llama-3.1-sonar-large-128k-online": {"prompt": 1.0, "completion": 1.0, "request": 0.005},
+        "llama-3.1-sonar-huge-128k-online": {"prompt": 5.0, "completion": 5.0, "request": 0.005}
+    }
+    
+    def __init__(self, pricing: Optional[Dict[str, Dict[str, float]]] = None):
+        self.pricing = pricing or self.DEFAULT_PRICING
+        self.total_tokens = 0
+        self.total_cost = 0.0
+        self._sweep_totals = self._empty_totals()
+    
+    def record(self, model_alias: str, payload: Dict[str, Any], response: Dict[str, Any],
+               latency: float) -> UsageRecord:
+        """Account for one response, estimating tokens when the usage block is missing"""
+        usage = response.get("usage") or {}
+        prompt_tokens = usage.get("prompt_tokens")
+        if prompt_tokens is None:
+            prompt_chars = sum(len(message.get("content", "")) for message in payload.get("messages", []))
+            prompt_tokens = prompt_chars // 4
+        completion_tokens = usage.get("completion_tokens")
+        if completion_tokens is None:
+            content = response.get("choices", [{}])[0].get("message", {}).get("content", "")
+            completion_tokens = len(content) // 4
+        
+        prices = self.pricing.get(payload.get("model"), {})
+        cost = (
+            prompt_tokens * prices.get("prompt", 0.0) / 1_000_000
+            + completion_tokens * prices.get("completion", 0.0) / 1_000_000
+            + prices.get("request", 0.0)
+        )
+        
+        record = UsageRecord(model_alias, prompt_tokens, completion_tokens, cost, latency)
+        self.total_tokens += prompt_tokens + completion_tokens
+        self.total_cost += cost
+        self._accumulate(self._sweep_totals, record)
+        return record
+    
+    def start_sweep(self):
+        """Reset the per-sweep totals reported by sweep_summary()"""
+        self._sweep_totals = self._empty_totals()
+    
+    def sweep_summary(self) -> Dict[str, Any]:
+        """Totals overall and per model alias since the last start_sweep()"""
+        return self._finish(self._sweep_totals)
+    
+    @staticmethod
+    def _empty_totals() -> Dict[str, Any]:
+        return {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0, "by_model": {}}
+    
+    @staticmethod
+    def _accumulate(summary: Dict[str, Any], record: UsageRecord):
+        by_model = summary["by_model"].setdefault(record.model, {
+            "requests": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0, "latency": 0.0
+        })
+        for totals in (summary, by_model):
+            totals["requests"] += 1
+            totals["prompt_tokens"] += record.prompt_tokens
+            totals["completion_tokens"] += record.completion_tokens
+            totals["cost"] += record.cost
+        by_model["latency"] += record.latency
+    
+    @staticmethod
+    def _finish(totals: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy of running totals with mean latency in place of summed latency"""
+        summary = {**totals, "by_model": {}}
+        for model, by_model in totals["by_model"].items():
+            by_model = dict(by_model)
+            by_model["mean_latency"] = by_model.pop("latency") / by_model["requests"]
+            summary["by_model"][model] = by_model
+        return summary
+
+class CircuitBreaker:
+    """Fails fast once the error rate over recent requests crosses a threshold"""
+    
+    def __init__(self, failure_threshold: float = 0.5, window_size: int = 20,
+                 min_requests: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.min_requests = min_requests
+        self.reset_timeout = reset_timeout
+        self.state = "closed"  # closed, open, half_open
+        self.trips = 0
+        self._outcomes = deque(maxlen=window_size)
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+    
+    def allow_request(self) -> bool:
+        """Whether a request may be sent; half-open admits a single probe"""
+        if self.state == "open":
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self.state = "half_open"
+        if self.state == "half_open":
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+        return True
+    
+    def record_success(self):
+        if self.state == "half_open":
+            self.state = "closed"
+            self._outcomes.clear()
+        self._probe_in_flight = False
+        self._outcomes.append(True)
+    
+    def record_failure(self):
+        self._probe_in_flight = False
+        self._outcomes.append(False)
+        failures = self._outcomes.count(False)
+        if self.state == "half_open" or (
+            len(self._outcomes) >= self.min_requests
+            and failures / len(self._outcomes) >= self.failure_threshold
+        ):
+            self._trip()
+    
+    def release_probe(self):
+        """Let a new probe through after one ended with no verdict (429, cancellation, deadline)"""
+        if self.state == "half_open":
+            self._probe_in_flight = False
+    
+    def _trip(self):
+        if self.state != "open":
+            self.trips += 1
+            logger.warning(f"Circuit breaker opened after {self._outcomes.count(False)} recent failures")
+        self.state = "open"
+        self._opened_at = time.monotonic()
+
+class TokenBucketRateLimiter:
+    """Token-bucket limiter bounding both request rate and requests in flight"""
+    
+    def __init__(self, requests_per_second: Optional[float] = 1.0, max_in_flight: int = 4,
+                 burst: Optional[int] = None):
+        self.requests_per_second = requests_per_second
+        self.max_in_flight = max(1, max_in_flight)
+        self.capacity = float(burst or self.max_in_flight)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+        self._in_flight = asyncio.Semaphore(self.max_in_flight)
+    
+    async def __aenter__(self) -> "TokenBucketRateLimiter":
+        await self.acquire()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.release()
+    
+    async def acquire(self):
+        """Reserve an in-flight slot and wait for a request token"""
+        await self._in_flight.acquire()
+        try:
+            await self.throttle()
+        except BaseException:
+            self._in_flight.release()
+            raise
+    
+    def release(self):
+        """Free the in-flight slot reserved by acquire()"""
+        self._in_flight.release()
+    
+    async def throttle(self):
+        """Wait until a token is available, honouring any active backoff"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+                if not self.requests_per_second or self.requests_per_second <= 0:
+                    return
+                
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.requests_per_second)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.requests_per_second)
+    
+    def backoff(self, delay: float):
+        """Pause all dispatch for delay seconds (e.g. after a 429 response)"""
+        now = time.monotonic()
+        self._blocked_until = max(self._blocked_until, now + delay)
+        self._tokens = 0.0
+        self._updated = max(now, self._blocked_until)
+
+class ResponseCache:
+    """Persistent content-addressed cache of Perplexity responses
+    
+    Entries are keyed by a SHA-256 of the canonical request payload and stored in
+    SQLite, which serialises writers so several agent processes can share one cache.
+    """
+    
+    # Results filtered to a recency window go stale once that window has moved on
+    RECENCY_TTL_SECONDS = {
+        "hour": 3600,
+        "day": 86400,
+        "week": 7 * 86400,
+        "month": 30 * 86400,
+        "year": 365 * 86400
+    }
+    
+    def __init__(self, cache_dir: str, max_entries: int = 1000, default_ttl: float = 86400):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.cache_dir / "perplexity-responses.sqlite3"
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        
+        with self._connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access)")
+    
+    @contextmanager
+    def _connection(self):
+        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+    
+    @staticmethod
+    def payload_key(payload: Dict[str, Any]) -> str:
+        """Hash the canonical JSON form of a request payload"""
+        return content_fingerprint(payload)
+    
+    def ttl_for(self, payload: Dict[str, Any]) -> float:
+        """Time-to-live derived from the payload's search_recency_filter"""
+        return self.RECENCY_TTL_SECONDS.get(payload.get("search_recency_filter"), self.default_ttl)
+    
+    def get(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return the cached response for payload, or None if missing or expired"""
+        key = self.payload_key(payload)
+        now = time.time()
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT response, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+    
+    def put(self, payload: Dict[str, Any], response: Dict[str, Any]):
+        """Store a response and evict expired and least recently used entries"""
+        key = self.payload_key(payload)
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created_at, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, json.dumps(response), now, now + self.ttl_for(payload), now)
+            )
+            conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+            conn.execute(
+                "DELETE FROM responses WHERE key NOT IN "
+                "(SELECT key FROM responses ORDER BY last_access DESC LIMIT ?)",
+                (self.max_entries,)
+            )
+
+class Instrumentation:
+    """Instrumentation hooks that do nothing; the default when metrics are disabled
+    
+    Subclasses receive span timings, counter increments and histogram observations
+    from the research agent. Every hook here returns immediately, so an agent
+    without a recorder pays only for the method call.
+    """
+    
+    enabled = False
+    
+    def span(self, name: str, **attributes: Any):
+        """Context manager timing one operation"""
+        return _NULL_SPAN
+    
+    def increment(self, name: str, value: float = 1, **labels: str):
+        """Add value to a monotonically increasing counter"""
+    
+    def observe(self, name: str, value: float, **labels: str):
+        """Record one observation in a histogram"""
+
+_NULL_SPAN = nullcontext()
+
+# The innermost open span in the current task, so spans nest across awaits and gathered tasks
+_current_span: contextvars.ContextVar[Optional["_Span"]] = contextvars.ContextVar("speckit_current_span", default=None)
+
+class _Span:
+    """One timed operation, recorded by MetricsRecorder when it ends"""
+    
+    __slots__ = ("recorder", "name", "attributes", "trace_id", "span_id", "parent_span_id",
+                 "start_unix_nano", "end_unix_nano", "_started", "_token", "error")
+    
+    def __init__(self, recorder: "MetricsRecorder", name: str, attributes: Dict[str, Any]):
+        self.recorder = recorder
+        self.name = name
+        self.attributes = attributes
+        self.error = False
+    
+    def __enter__(self) -> "_Span":
+        parent = _current_span.get()
+        self.trace_id = parent.trace_id if parent is not None else os.urandom(16).hex()
+        self.parent_span_id = parent.span_id if parent is not None else ""
+        self.span_id = os.urandom(8).hex()
+        self.start_unix_nano = time.time_ns()
+        self._started = time.perf_counter()
+        self._token = _current_span.set(self)
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self._started
+        self.end_unix_nano = self.start_unix_nano + int(duration * 1e9)
+        self.error = exc_type is not None and not issubclass(exc_type, asyncio.CancelledError)
+        _current_span.reset(self._token)
+        self.recorder._finish_span(self, duration)
+
+class MetricsRecorder(Instrumentation):
+    """In-process counters, histograms and spans with Prometheus and OTLP file exporters"""
+    
+    enabled = True
+    
+    # Histogram bucket upper bounds, by metric name suffix
+    LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+    SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+    
+    def __init__(self, namespace: str = "speckit_research", max_spans: int = 10000):
+        self.namespace = namespace
+        self.started_unix_nano = time.time_ns()
+        self.counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+        # name and labels -> [bucket counts..., +Inf count], sum
+        self.histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], List[Any]] = {}
+        # Finished spans kept for trace export; the oldest are dropped past max_spans
+        self.spans: deque = deque(maxlen=max_spans)
+    
+    def span(self, name: str, **attributes: Any) -> _Span:
+        return _Span(self, name, attributes)
+    
+    def increment(self, name: str, value: float = 1, **labels: str):
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + value
+    
+    def observe(self, name: str, value: float, **labels: str):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self.histograms.get(key)
+        bounds = self.buckets_for(name)
+        if histogram is None:
+            histogram = self.histograms[key] = [[0] * (len(bounds) + 1), 0.0]
+        histogram[0][bisect.bisect_left(bounds, value)] += 1
+        histogram[1] += value
+    
+    def buckets_for(self, name: str) -> Tuple[float, ...]:
+        return self.SIZE_BUCKETS if name.endswith("_bytes") else self.LATENCY_BUCKETS
+    
+    def _finish_span(self, span: _Span, duration: float):
+        self.spans.append(span)
+        self.observe("span_duration_seconds", duration, span=span.name)
+        if span.error:
+            self.increment("span_errors_total", span=span.name)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Counter totals and histogram counts and sums, keyed by metric name and labels"""
+        def label_key(name, labels):
+            return name + "".join(f"[{key}={value}]" for key, value in labels)
+        return {
+            "counters": {label_key(name, labels): value for (name, labels), value in self.counters.items()},
+            "histograms": {
+                label_key(name, labels): {"count": sum(counts), "sum": total}
+                for (name, labels), (counts, total) in self.histograms.items()
+            }
+        }
+    
+    def write_prometheus(self, path: str):
+        """Write every metric in the Prometheus text exposition format, for node_exporter's textfile collector"""
+        def render(name, labels, extra=()):
+            pairs = [*labels, *extra]
+            if not pairs:
+                return name
+            escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+            return name + "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+        
+        lines: List[str] = []
+        for name in sorted({name for name, _ in self.counters}):
+            metric = f"{self.namespace}_{name}"
+            lines.append(f"# TYPE {metric} counter")
+            for (counter_name, labels), value in sorted(self.counters.items()):
+                if counter_name == name:
+                    lines.append(f"{render(metric, labels)} {value:g}")
+        for name in sorted({name for name, _ in self.histograms}):
+            metric = f"{self.namespace}_{name}"
+            bounds = self.buckets_for(name)
+            lines.append(f"# TYPE {metric} histogram")
+            for (histogram_name, labels), (counts, total) in sorted(self.histograms.items()):
+                if histogram_name != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip((*bounds, "+Inf"), counts):
+                    cumulative += count
+                    lines.append(f"{render(metric + '_bucket', labels, [('le', f'{bound:g}' if bound != '+Inf' else bound)])} {cumulative}")
+                lines.append(f"{render(metric + '_sum', labels)} {total:g}")
+                lines.append(f"{render(metric + '_count', labels)} {cumulative}")
+        self._write_atomically(path, "\n".join(lines) + "\n")
+    
+    def write_otlp(self, path: str):
+        """Append metrics and spans as OTLP/JSON lines, the OpenTelemetry Collector file format"""
+        now = str(time.time_ns())
+        start = str(self.started_unix_nano)
+        resource = {"attributes": [{"key": "service.name", "value": {"stringValue": self.namespace}}]}
+        scope = {"name": self.namespace}
+        
+        def attributes(pairs):
+            return [{"key": key, "value": {"stringValue": str(value)}} for key, value in pairs]
+        
+        metrics: Dict[str, Dict[str, Any]] = {}
+        for (name, labels), value in sorted(self.counters.items()):
+            metric = metrics.setdefault(name, {
+                "name": f"{self.namespace}_{name}",
+                "sum": {"dataPoints": [], "aggregationTemporality": 2, "isMonotonic": True}
+            })
+            metric["sum"]["dataPoints"].append({
+                "attributes": attributes(labels), "startTimeUnixNano": start, "timeUnixNano": now, "asDouble": value
+            })
+        for (name, labels), (counts, total) in sorted(self.histograms.items()):
+            metric = metrics.setdefault(name, {
+                "name": f"{self.namespace}_{name}",
+                "histogram": {"dataPoints": [], "aggregationTemporality": 2}
+            })
+            metric["histogram"]["dataPoints"].append({
+                "attributes": attributes(labels), "startTimeUnixNano": start, "timeUnixNano": now,
+                "count": str(sum(counts)), "sum": total,
+                "bucketCounts": [str(count) for count in counts],
+                "explicitBounds": list(self.buckets_for(name))
+            })
+        
+        spans = [
+            {
+                "traceId": span.trace_id,
+                "spanId": span.span_id,
+                "parentSpanId": span.parent_span_id,
+                "name": span.name,
+                "kind": 1,
+                "startTimeUnixNano": str(span.start_unix_nano),
+                "endTimeUnixNano": str(span.end_unix_nano),
+                "attributes": attributes(span.attributes.items()),
+                "status": {"code": 2 if span.error else 1}
+            }
+            for span in self.spans
+        ]
+        
+        with open(path, 'a') as f:
+            f.write(json.dumps({"resourceMetrics": [{
+                "resource": resource,
+                "scopeMetrics": [{"scope": scope, "metrics": list(metrics.values())}]
+            }]}) + "\n")
+            if spans:
+                f.write(json.dumps({"resourceSpans": [{
+                    "resource": resource,
+                    "scopeSpans": [{"scope": scope, "spans": spans}]
+                }]}) + "\n")
+        # Exported spans are not written again on the next export
+        self.spans.clear()
+    
+    def export(self, path: str):
+        """Write to path as OTLP/JSON if it ends in .json or .jsonl, otherwise as Prometheus text"""
+        if path.endswith((".json", ".jsonl")):
+            self.write_otlp(path)
+        else:
+            self.write_prometheus(path)
+    
+    @staticmethod
+    def _write_atomically(path: str, content: str):
+        # Scrapers must never read a half-written file
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w') as f:
+            f.write(content)
+        os.replace(temp_path, path)
 
 class EnhancedPerplexityResearch:
     """Enhanced Perplexity research agent with Sonar integration"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    RETRYABLE_STATUS_CODES = {500, 502, 503, 504}
+    DEPTH_LEVELS = ["shallow", "medium", "deep", "comprehensive"]
+    
+    def __init__(self, api_key: Optional[str] = None, max_concurrency: int = 4,
+                 overlap_main_request: bool = True, requests_per_second: Optional[float] = 1.0,
+                 max_retries: int = 3, cache_dir: Optional[str] = None,
+                 cache_max_entries: int = 1000, enable_cache: bool = True,
+                 max_connections: int = 20, max_keepalive_connections: int = 10,
+                 keepalive_expiry: float = 30.0, http2: bool = False,
+                 request_timeout: float = 120.0, retry_base_delay: float = 0.5,
+                 retry_max_delay: float = 30.0, circuit_breaker: Optional[CircuitBreaker] = None,
+                 budget: Optional[ResearchBudget] = None,
+                 pricing: Optional[Dict[str, Dict[str, float]]] = None,
+                 adaptive_routing: bool = False, instrumentation: Optional[Instrumentation] = None):
         self.api_key = api_key or os.getenv('PERPLEXITY_API_KEY')
         if not self.api_key:
             logger.warning("No Perplexity API key found. Using mock responses for demonstration.")
@@ -63,57 +1274,658 @@ class EnhancedPerplexityResearch:
             "sonar-huge": "llama-3.1-sonar-huge-128k-online"
         }
         
-    async def conduct_research(self, query: ResearchQuery) -> ResearchResult:
-        """Conduct comprehensive research using Perplexity Sonar"""
-        logger.info(f"Starting research: {query.query}")
+        # Upper bound on requests in flight across main and follow-up queries
+        self.max_concurrency = max(1, max_concurrency)
+        self.overlap_main_request = overlap_main_request
+        self.rate_limiter = TokenBucketRateLimiter(requests_per_second, self.max_concurrency)
         
-        if not self.api_key:
-            return self._mock_research_result(query)
+        # Retries, per-sweep deadline and circuit breaker bound how long a degraded provider can stall a run
+        self.max_retries = max_retries
+        self.request_timeout = request_timeout
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.metrics = ReliabilityMetrics()
+        self._deadline: Optional[float] = None
+        self._outstanding_requests = 0
+        self._in_flight_requests: Dict[str, asyncio.Future] = {}
+        self._in_flight_waiters: Dict[asyncio.Future, int] = {}
+        
+        # Token and cost accounting, with automatic downgrades as the budget runs low
+        self.budget = budget
+        self.usage = UsageTracker(pricing)
+        
+        # Latency statistics are always kept; routing and hedging are opt-in
+        self.adaptive_routing = adaptive_routing
+        self.model_router = ModelRouter(self.models)
+        
+        # Span timings, counters and histograms; the default discards everything
+        self.instrumentation = instrumentation or Instrumentation()
+        
+        # Every cited source is interned once; results keep references into this table
+        self.source_index = SourceIndex()
+        
+        # Prompts are deterministic, so identical payloads can be served from disk
+        self.response_cache = None
+        if enable_cache:
+            cache_dir = cache_dir or os.getenv(
+                'SPECKIT_RESEARCH_CACHE_DIR', str(Path.home() / ".cache" / "speckit-research")
+            )
+            self.response_cache = ResponseCache(cache_dir, max_entries=cache_max_entries)
+        
+        # One pooled client is shared by every request so connections are reused
+        self.pool_limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.http2 = http2
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("HTTP/2 requested but the 'h2' package is not installed. Falling back to HTTP/1.1.")
+            self.http2 = False
+        self._client: Optional[httpx.AsyncClient] = None
+        
+    async def __aenter__(self) -> "EnhancedPerplexityResearch":
+        self._get_client()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the shared HTTP client, creating it on first use"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                limits=self.pool_limits,
+                http2=self.http2,
+                timeout=httpx.Timeout(self.request_timeout)
+            )
+        return self._client
+    
+    async def aclose(self):
+        """Close the shared HTTP client and release pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    @contextmanager
+    def sweep_deadline(self, seconds: Optional[float]):
+        """Bound every request issued inside the block by a shared deadline"""
+        previous = self._deadline
+        self._deadline = time.monotonic() + seconds if seconds else None
+        try:
+            yield
+        finally:
+            self._deadline = previous
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """Snapshot of reliability counters, circuit breaker state and spend"""
+        return {
+            **asdict(self.metrics),
+            "circuit_trips": self.circuit_breaker.trips,
+            "circuit_state": self.circuit_breaker.state,
+            "total_tokens": self.usage.total_tokens,
+            "total_cost": round(self.usage.total_cost, 6),
+            "unique_sources": len(self.source_index),
+            "models": self.model_router.snapshot()
+        }
         
+    async def conduct_research_batch(self, queries: Iterable[ResearchQuery]) -> AsyncIterator[ResearchResult]:
+        """Research many queries concurrently, yielding results in completion order
+        
+        Identical queries are researched once and yield a single result. Follow-ups
+        shared across the batch are dispatched together, so request coalescing sends
+        each of them once. Every request goes through this instance's concurrency and
+        rate limits.
+        """
+        unique_queries: Dict[str, ResearchQuery] = {}
+        submitted = 0
+        for query in queries:
+            submitted += 1
+            unique_queries.setdefault(json.dumps(asdict(query), sort_keys=True), query)
+        logger.info(f"Starting research batch: {len(unique_queries)} unique of {submitted} queries")
+        
+        tasks = [asyncio.ensure_future(self.conduct_research(query)) for query in unique_queries.values()]
         try:
-            async with httpx.AsyncClient() as client:
-                # Main research query
-                main_response = await self._make_research_request(client, query)
+            for next_result in asyncio.as_completed(tasks):
+                yield await next_result
+        finally:
+            # Abandoned iteration must not leave requests running in the background
+            for pending in tasks:
+                pending.cancel()
+    
+    async def conduct_research(self, query: ResearchQuery,
+                               completed_follow_ups: Optional[Dict[str, FollowUpInsight]] = None,
+                               on_follow_up: Optional[Callable[[ResearchQuery, FollowUpInsight], None]] = None,
+                               topic: Optional[str] = None) -> ResearchResult:
+        """Conduct comprehensive research using Perplexity Sonar
+        
+        Follow-ups found in completed_follow_ups (keyed by query text) are reused instead
+        of requested, and on_follow_up is called as each new follow-up insight arrives.
+        Sources cited by the main response and follow-ups are counted in source_index
+        under topic, which defaults to the query text.
+        """
+        with self.instrumentation.span("conduct_research", model=query.model, depth=query.depth_level):
+            logger.info(f"Starting research: {query.query}")
+            
+            if not self.api_key:
+                return self._mock_research_result(query)
+            
+            completed_follow_ups = completed_follow_ups or {}
+            topic = topic or query.query
+            
+            try:
+                client = self._get_client()
+                
+                async def research_follow_up(follow_up_query: ResearchQuery) -> FollowUpInsight:
+                    if follow_up_query.query in completed_follow_ups:
+                        return completed_follow_ups[follow_up_query.query]
+                    follow_up_result, latency, _ = await self._timed_research_request(
+                        client, self._route_follow_up(follow_up_query)
+                    )
+                    # Follow-up citations only feed the source index; insights keep just the text
+                    self._extract_sources(follow_up_result, topic)
+                    insight = FollowUpInsight(
+                        query=follow_up_query.query,
+                        content=follow_up_result.get("choices", [{}])[0].get("message", {}).get("content", ""),
+                        latency=latency
+                    )
+                    if on_follow_up is not None:
+                        on_follow_up(follow_up_query, insight)
+                    return insight
                 
                 # Follow-up queries for deeper insights
-                follow_up_results = []
-                for follow_up in query.follow_up_queries:
-                    follow_up_query = ResearchQuery(
-                        query=follow_up,
-                        focus_areas=query.focus_areas,
-                        depth_level=query.depth_level,
-                        model=query.model
+                follow_up_tasks = [
+                    research_follow_up(follow_up_query)
+                    for follow_up_query in self._build_follow_up_queries(query)
+                ]
+                
+                if self.overlap_main_request:
+                    # Main query shares the concurrency budget with its follow-ups
+                    timed_results = await asyncio.gather(
+                        self._timed_research_request(client, query), *follow_up_tasks,
+                        return_exceptions=True
                     )
-                    follow_up_result = await self._make_research_request(client, follow_up_query)
-                    follow_up_results.append({
-                        "query": follow_up,
-                        "result": follow_up_result
-                    })
+                    main_timing, follow_up_outcomes = timed_results[0], timed_results[1:]
+                    if isinstance(main_timing, BaseException):
+                        raise main_timing
+                    main_response, main_latency, main_model = main_timing
+                else:
+                    main_response, main_latency, main_model = await self._timed_research_request(client, query)
+                    follow_up_outcomes = await asyncio.gather(*follow_up_tasks, return_exceptions=True)
+                
+                # gather preserves submission order, so insights follow query.follow_up_queries;
+                # a failed follow-up is dropped rather than discarding the whole topic
+                follow_up_results = []
+                for follow_up, outcome in zip(query.follow_up_queries, follow_up_outcomes):
+                    if isinstance(outcome, BaseException):
+                        logger.error(f"Follow-up research failed: {follow_up}: {str(outcome)}")
+                        continue
+                    follow_up_results.append(outcome)
                 
                 return ResearchResult(
                     query=query.query,
                     response=main_response.get("choices", [{}])[0].get("message", {}).get("content", ""),
-                    sources=self._extract_sources(main_response),
+                    sources=self._extract_sources(main_response, topic),
                     timestamp=datetime.now(),
-                    model_used=query.model,
-                    follow_up_insights=follow_up_results
+                    model_used=main_model,
+                    follow_up_insights=follow_up_results,
+                    latency=main_latency
                 )
                 
+            except Exception as e:
+                logger.error(f"Research failed: {str(e)}")
+                self.metrics.fallbacks_to_mock += 1
+                self.instrumentation.increment("fallbacks_to_mock_total")
+                return self._mock_research_result(query)
+        
+    async def stream_research(self, query: ResearchQuery,
+                              sources: Optional[List[Dict[str, Any]]] = None,
+                              topic: Optional[str] = None) -> AsyncIterator[str]:
+        """Stream the main research response as text chunks from server-sent events
+        
+        A cached response is replayed in one chunk instead of being requested, and a
+        stream read to the end is cached like a regular response. Cited sources are
+        counted in source_index under topic, if given, and copied into sources if a
+        list is passed.
+        """
+        logger.info(f"Streaming research: {query.query}")
+        
+        if not self.api_key:
+            mock_result = self._mock_research_result(query)
+            if sources is not None:
+                sources.extend(mock_result.sources)
+            paragraphs = mock_result.response.split("\n\n")
+            for paragraph in paragraphs[:-1]:
+                yield paragraph + "\n\n"
+            yield paragraphs[-1]
+            return
+        
+        request_payload = self._build_research_payload(query)
+        if self.response_cache is not None:
+            cached = self.response_cache.get(request_payload)
+            if cached is not None:
+                self.instrumentation.increment("cache_hits_total")
+                cited = self._extract_sources(cached, topic)
+                if sources is not None:
+                    sources[:] = cited
+                yield cached.get("choices", [{}])[0].get("message", {}).get("content", "")
+                return
+            self.instrumentation.increment("cache_misses_total")
+        
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+            "Accept": "text/event-stream"
+        }
+        payload = {**request_payload, "stream": True}
+        emitted = False
+        citations = None
+        # The whole response is only kept when it will be cached
+        content_parts: Optional[List[str]] = [] if self.response_cache is not None else None
+        
+        try:
+            async with self.rate_limiter:
+                # Failures before the first chunk are retried like any other request
+                for attempt in range(self.max_retries + 1):
+                    if not self.circuit_breaker.allow_request():
+                        self.metrics.circuit_rejections += 1
+                        raise CircuitOpenError("Circuit breaker is open; skipping streaming request")
+                    probe = self.circuit_breaker.state == "half_open"
+                    rate_limited = False
+                    
+                    try:
+                        self.metrics.requests += 1
+                        try:
+                            async with self._get_client().stream("POST", f"{self.base_url}/chat/completions",
+                                                                 headers=headers,
+                                                                 json=payload,
+                                                                 timeout=self._request_timeout()) as response:
+                                if response.status_code == 429:
+                                    self.metrics.rate_limited += 1
+                                    if attempt == self.max_retries:
+                                        response.raise_for_status()
+                                    delay = self._retry_after_seconds(response, attempt)
+                                    reason = "HTTP 429"
+                                    rate_limited = True
+                                elif response.status_code in self.RETRYABLE_STATUS_CODES:
+                                    self.circuit_breaker.record_failure()
+                                    self.metrics.server_errors += 1
+                                    if attempt == self.max_retries:
+                                        response.raise_for_status()
+                                    delay = self._backoff_delay(attempt)
+                                    reason = f"HTTP {response.status_code}"
+                                else:
+                                    self.circuit_breaker.record_success()
+                                    response.raise_for_status()
+                                    async for line in response.aiter_lines():
+                                        if not line.startswith("data:"):
+                                            continue
+                                        data = line[len("data:"):].strip()
+                                        if data == "[DONE]":
+                                            break
+                                        
+                                        chunk = json.loads(data)
+                                        citations = chunk.get("citations") or citations
+                                        content = chunk.get("choices", [{}])[0].get("delta", {}).get("content")
+                                        if content:
+                                            emitted = True
+                                            if content_parts is not None:
+                                                content_parts.append(content)
+                                            yield content
+                                    
+                                    if content_parts is not None:
+                                        self.response_cache.put(request_payload, {
+                                            "choices": [{"message": {"role": "assistant",
+                                                                     "content": "".join(content_parts)}}],
+                                            "citations": citations or []
+                                        })
+                                    return
+                        except httpx.TransportError as e:
+                            self.circuit_breaker.record_failure()
+                            if isinstance(e, httpx.TimeoutException):
+                                self.metrics.timeouts += 1
+                            # Chunks already handed out cannot be taken back, so only a clean start is retried
+                            if emitted or attempt == self.max_retries:
+                                raise
+                            delay = self._backoff_delay(attempt)
+                            reason = type(e).__name__
+                    finally:
+                        if probe:
+                            self.circuit_breaker.release_probe()
+                    
+                    await self._wait_before_retry(query, delay, reason, rate_limited)
+                            
         except Exception as e:
-            logger.error(f"Research failed: {str(e)}")
-            return self._mock_research_result(query)
+            logger.error(f"Streaming research failed: {str(e)}")
+            if not emitted:
+                self.metrics.fallbacks_to_mock += 1
+                self.instrumentation.increment("fallbacks_to_mock_total")
+                # Nothing was written yet, so the mock response can stand in cleanly
+                mock_result = self._mock_research_result(query)
+                if sources is not None:
+                    sources.extend(mock_result.sources)
+                yield mock_result.response
+        finally:
+            # Citations are counted once per stream, even one closed early by the reader
+            if emitted and citations:
+                cited = self._extract_sources({"citations": citations}, topic)
+                if sources is not None:
+                    sources[:] = cited
+    
+    def _build_follow_up_queries(self, query: ResearchQuery) -> List[ResearchQuery]:
+        """Derive follow-up queries that inherit the parent query's settings"""
+        return [
+            ResearchQuery(
+                query=follow_up,
+                focus_areas=query.focus_areas,
+                depth_level=query.depth_level,
+                model=query.model
+            )
+            for follow_up in query.follow_up_queries
+        ]
+    
+    async def _timed_research_request(self, client: httpx.AsyncClient,
+                                      query: ResearchQuery) -> Tuple[Dict[str, Any], float, str]:
+        """Make a research request under the concurrency limit
+        
+        Returns the response, its latency and the model alias that produced it, which
+        differs from query.model when the budget forced a downgrade.
+        """
+        payload = self._build_research_payload(query)
+        
+        # Cache hits skip the rate limiter entirely
+        if self.response_cache is not None:
+            started = time.perf_counter()
+            cached = self.response_cache.get(payload)
+            if cached is not None:
+                self.instrumentation.increment("cache_hits_total")
+                return cached, time.perf_counter() - started, query.model
+            self.instrumentation.increment("cache_misses_total")
+        
+        # Single flight: concurrent callers with the same payload share one request
+        key = ResponseCache.payload_key(payload)
+        in_flight = self._in_flight_requests.get(key)
+        if in_flight is not None:
+            self.metrics.coalesced_requests += 1
+        else:
+            in_flight = asyncio.ensure_future(self._fetch_research(client, query, payload))
+            self._in_flight_requests[key] = in_flight
+            in_flight.add_done_callback(lambda done: self._forget_in_flight(key, done))
+        
+        # Shielded so one caller's cancellation does not cancel the request for the others,
+        # but the last caller to give up cancels it rather than leave it running unobserved
+        self._in_flight_waiters[in_flight] = self._in_flight_waiters.get(in_flight, 0) + 1
+        try:
+            return await asyncio.shield(in_flight)
+        except asyncio.CancelledError:
+            if self._in_flight_waiters[in_flight] == 1 and not in_flight.done():
+                self._forget_in_flight(key, in_flight)
+                in_flight.cancel()
+            raise
+        finally:
+            waiters = self._in_flight_waiters.pop(in_flight) - 1
+            if waiters:
+                self._in_flight_waiters[in_flight] = waiters
+    
+    def _forget_in_flight(self, key: str, in_flight: asyncio.Future):
+        """Stop coalescing onto in_flight, unless a newer request already took its key"""
+        if self._in_flight_requests.get(key) is in_flight:
+            del self._in_flight_requests[key]
+    
+    async def _fetch_research(self, client: httpx.AsyncClient, query: ResearchQuery,
+                              payload: Dict[str, Any]) -> Tuple[Dict[str, Any], float, str]:
+        """Send a research request through the rate limiter and cache the response"""
+        self._outstanding_requests += 1
+        try:
+            async with self.rate_limiter:
+                # Budget is checked once the request is actually about to be sent
+                if self._budget_remaining() <= 0:
+                    self.metrics.budget_rejections += 1
+                    raise BudgetExceededError(f"Research budget exhausted; skipping request: {query.query}")
+                budgeted_query = self._apply_budget(query)
+                if budgeted_query is not query:
+                    query = budgeted_query
+                    payload = self._build_research_payload(query)
+                started = time.perf_counter()
+                response, query, payload = await self._hedged_research_request(client, query, payload)
+                latency = time.perf_counter() - started
+        finally:
+            self._outstanding_requests -= 1
+        
+        self.usage.record(query.model, payload, response, latency)
+        
+        # A downgraded response is cached under the payload actually sent, so the
+        # full-quality request is still made once budget allows
+        if self.response_cache is not None:
+            self.response_cache.put(payload, response)
+        return response, latency, query.model
     
-    async def _make_research_request(self, client: httpx.AsyncClient, query: ResearchQuery) -> Dict[str, Any]:
+    async def _make_research_request(self, client: httpx.AsyncClient, query: ResearchQuery,
+                                     payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Make API request to Perplexity"""
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
         
+        if payload is None:
+            payload = self._build_research_payload(query)
+        instrumentation = self.instrumentation
+        
+        with instrumentation.span("make_research_request", model=payload["model"]):
+            for attempt in range(self.max_retries + 1):
+                if not self.circuit_breaker.allow_request():
+                    self.metrics.circuit_rejections += 1
+                    raise CircuitOpenError(f"Circuit breaker is open; skipping request: {query.query}")
+                # A half-open breaker has just admitted this attempt as its single probe
+                probe = self.circuit_breaker.state == "half_open"
+                rate_limited = False
+                
+                try:
+                    self.metrics.requests += 1
+                    instrumentation.increment("requests_total", model=payload["model"])
+                    started = time.perf_counter()
+                    try:
+                        response = await client.post(f"{self.base_url}/chat/completions", 
+                                                   headers=headers, 
+                                                   json=payload,
+                                                   timeout=self._request_timeout())
+                    except httpx.TransportError as e:
+                        instrumentation.increment("request_errors_total", reason=type(e).__name__)
+                        self.circuit_breaker.record_failure()
+                        if isinstance(e, httpx.TimeoutException):
+                            self.metrics.timeouts += 1
+                        if attempt == self.max_retries:
+                            raise
+                        delay = self._backoff_delay(attempt)
+                        reason = type(e).__name__
+                    else:
+                        if instrumentation.enabled:
+                            instrumentation.observe("request_latency_seconds", time.perf_counter() - started,
+                                                    model=payload["model"], status=str(response.status_code))
+                            instrumentation.observe("response_size_bytes", len(response.content))
+                        if response.status_code == 429:
+                            # Rate limiting says nothing about upstream health, so the breaker is not told
+                            self.metrics.rate_limited += 1
+                            if attempt == self.max_retries:
+                                break
+                            delay = self._retry_after_seconds(response, attempt)
+                            reason = "HTTP 429"
+                            rate_limited = True
+                        elif response.status_code not in self.RETRYABLE_STATUS_CODES:
+                            self.circuit_breaker.record_success()
+                            break
+                        else:
+                            self.circuit_breaker.record_failure()
+                            self.metrics.server_errors += 1
+                            if attempt == self.max_retries:
+                                break
+                            delay = self._backoff_delay(attempt)
+                            reason = f"HTTP {response.status_code}"
+                finally:
+                    # A probe that ended without a verdict must not keep the breaker half-open forever
+                    if probe:
+                        self.circuit_breaker.release_probe()
+                
+                await self._wait_before_retry(query, delay, reason, rate_limited)
+            
+            response.raise_for_status()
+            return response.json()
+    
+    async def _wait_before_retry(self, query: ResearchQuery, delay: float, reason: str,
+                                 rate_limited: bool = False):
+        """Wait out a retry delay, then take a fresh rate-limit token like any other request
+        
+        A 429 delay is applied to the shared limiter so every caller holds back, not just this one.
+        """
+        if rate_limited:
+            self.rate_limiter.backoff(delay)
+            logger.warning(f"Rate limited by Perplexity, retrying in {delay:.1f}s: {query.query}")
+        else:
+            logger.warning(f"Research request failed ({reason}), retrying in {delay:.1f}s: {query.query}")
+        self.metrics.retries += 1
+        self.instrumentation.increment("retries_total", reason=reason)
+        self._check_deadline(delay)
+        if not rate_limited:
+            await asyncio.sleep(delay)
+        await self.rate_limiter.throttle()
+    
+    def _route_follow_up(self, query: ResearchQuery) -> ResearchQuery:
+        """Move a follow-up to the fastest healthy tier allowed for its depth"""
+        if not self.adaptive_routing:
+            return query
+        model = self.model_router.route(query)
+        # Aliases of one backend model are the same tier, so only a backend change counts
+        if self.models.get(model, model) == self.models.get(query.model, query.model):
+            return query
+        self.metrics.routed_follow_ups += 1
+        return replace(query, model=model)
+    
+    async def _observed_research_request(self, client: httpx.AsyncClient, query: ResearchQuery,
+                                         payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Make a research request and feed its latency and outcome to the model router"""
+        started = time.perf_counter()
+        try:
+            response = await self._make_research_request(client, query, payload)
+        except Exception:
+            self.model_router.record(payload["model"], time.perf_counter() - started, False)
+            raise
+        self.model_router.record(payload["model"], time.perf_counter() - started, True)
+        return response
+    
+    async def _hedged_research_request(self, client: httpx.AsyncClient, query: ResearchQuery,
+                                       payload: Dict[str, Any]
+                                       ) -> Tuple[Dict[str, Any], ResearchQuery, Dict[str, Any]]:
+        """Send a request, duplicating it to a faster tier if it outlives its model's p95
+        
+        Returns the first successful response with the query and payload that produced it.
+        """
+        primary = asyncio.ensure_future(self._observed_research_request(client, query, payload))
+        secondary = None
+        try:
+            hedge = self.model_router.hedge_target(query) if self.adaptive_routing else None
+            if hedge is None:
+                return await primary, query, payload
+            
+            hedge_model, hedge_after = hedge
+            done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+            if done:
+                return primary.result(), query, payload
+            
+            hedge_query = replace(query, model=hedge_model)
+            hedge_payload = self._build_research_payload(hedge_query)
+            logger.info(f"Hedging slow {query.model} request with {hedge_model} after {hedge_after:.2f}s: {query.query}")
+            self.metrics.hedged_requests += 1
+            
+            # The hedge rides on the primary's in-flight slot but still spends a rate token
+            await self.rate_limiter.throttle()
+            secondary = asyncio.ensure_future(self._observed_research_request(client, hedge_query, hedge_payload))
+            attempts = {primary: (query, payload), secondary: (hedge_query, hedge_payload)}
+            pending = set(attempts)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for finished in done:
+                    if finished.exception() is None:
+                        if finished is secondary:
+                            self.metrics.hedge_wins += 1
+                        return (finished.result(), *attempts[finished])
+            # Both attempts failed; surface the original request's error
+            return primary.result(), query, payload
+        finally:
+            # Covers the loser of a race and a caller cancelled while either attempt runs
+            for attempt in (primary, secondary):
+                if attempt is not None and not attempt.done():
+                    attempt.cancel()
+    
+    def _budget_remaining(self) -> float:
+        """Smallest remaining share of the token and cost limits (1.0 without a budget)"""
+        if self.budget is None:
+            return 1.0
+        remaining = 1.0
+        if self.budget.max_tokens:
+            remaining = min(remaining, 1 - self.usage.total_tokens / self.budget.max_tokens)
+        if self.budget.max_cost:
+            remaining = min(remaining, 1 - self.usage.total_cost / self.budget.max_cost)
+        return remaining
+    
+    def _apply_budget(self, query: ResearchQuery) -> ResearchQuery:
+        """Downgrade model tier and depth once the budget is running low"""
+        if self.budget is None or self._budget_remaining() >= self.budget.downgrade_threshold:
+            return query
+        
+        depth_index = self.DEPTH_LEVELS.index(query.depth_level) if query.depth_level in self.DEPTH_LEVELS else 0
+        depth_level = self.DEPTH_LEVELS[max(0, depth_index - 1)]
+        if query.model == self.budget.downgrade_model and depth_level == query.depth_level:
+            return query
+        
+        logger.info(f"Budget low, downgrading {query.model}/{query.depth_level} to "
+                    f"{self.budget.downgrade_model}/{depth_level}: {query.query}")
+        self.metrics.budget_downgrades += 1
+        return replace(query, depth_level=depth_level, model=self.budget.downgrade_model)
+    
+    def _backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff with full jitter"""
+        return random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * (2 ** attempt)))
+    
+    def _check_deadline(self, delay: float = 0.0):
+        """Fail fast if waiting delay seconds would overrun the sweep deadline"""
+        if self._deadline is not None and time.monotonic() + delay >= self._deadline:
+            self.metrics.deadline_exceeded += 1
+            raise DeadlineExceededError("Sweep deadline budget exhausted")
+    
+    def _request_timeout(self) -> float:
+        """Per-request timeout, spreading the remaining sweep budget over outstanding requests"""
+        if self._deadline is None:
+            return self.request_timeout
+        
+        self._check_deadline()
+        remaining = self._deadline - time.monotonic()
+        # Requests run in waves of max_concurrency, each wave gets an equal share
+        waves = max(1, math.ceil(self._outstanding_requests / self.max_concurrency))
+        return min(self.request_timeout, remaining / waves)
+    
+    def _retry_after_seconds(self, response: httpx.Response, attempt: int) -> float:
+        """Read the Retry-After header, falling back to exponential backoff"""
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                pass
+            try:
+                retry_at = parsedate_to_datetime(retry_after)
+                return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+            except (TypeError, ValueError):
+                pass
+        return min(2.0 ** attempt, 60.0)
+    
+    def _build_research_payload(self, query: ResearchQuery) -> Dict[str, Any]:
+        """Build the chat completion payload for a research query"""
         # Enhanced prompt for comprehensive research
         enhanced_prompt = self._create_enhanced_prompt(query)
         
-        payload = {
+        return {
             "model": self.models.get(query.model, "llama-3.1-sonar-large-128k-online"),
             "messages": [
                 {
@@ -131,13 +1943,6 @@ class EnhancedPerplexityResearch:
             "search_domain_filter": ["github.com", "medium.com", "dev.to", "arxiv.org", "stackoverflow.com"],
             "search_recency_filter": "month"
         }
-        
-        response = await client.post(f"{self.base_url}/chat/completions", 
-                                   headers=headers, 
-                                   json=payload,
-                                   timeout=120.0)
-        response.raise_for_status()
-        return response.json()
     
     def _create_enhanced_prompt(self, query: ResearchQuery) -> str:
         """Create enhanced research prompt with specific focus areas"""
@@ -170,19 +1975,16 @@ Prioritize authoritative sources and practical insights over theoretical concept
 """
         return prompt
     
-    def _extract_sources(self, response: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Extract and format sources from Perplexity response"""
-        sources = []
-        citations = response.get("citations", [])
+    def _extract_sources(self, response: Dict[str, Any], topic: Optional[str] = None) -> SourceList:
+        """Extract and format sources from Perplexity response
         
-        for citation in citations:
-            sources.append({
-                "url": citation.get("url", ""),
-                "title": citation.get("title", ""),
-                "snippet": citation.get("text", "")[:200] + "..." if len(citation.get("text", "")) > 200 else citation.get("text", "")
-            })
-        
-        return sources
+        With a topic, the sources are cited in source_index and returned as references into it.
+        """
+        with self.instrumentation.span("extract_sources"):
+            sources = SourceList.from_citations(response.get("citations", []))
+            if topic is None:
+                return sources
+            return self.source_index.add(sources.entries(), topic)
     
     def _mock_research_result(self, query: ResearchQuery) -> ResearchResult:
         """Generate mock research result for demonstration"""
@@ -214,30 +2016,130 @@ Specific, implementable recommendations for development teams.
             response=mock_response,
             sources=[{"url": "mock://source", "title": "Mock Source", "snippet": "Mock source content"}],
             timestamp=datetime.now(),
-            model_used=query.model
+            model_used=query.model,
+            is_mock=True
         )
 
 class SpecKitResearchAgent:
     """Specialized research agent for SpecKit methodology"""
     
-    def __init__(self):
-        self.perplexity = EnhancedPerplexityResearch()
-        self.research_history = []
+    # Characters of each follow-up insight shown in the documentation
+    INSIGHT_PREVIEW_CHARS = 500
+    
+    def __init__(self, requests_per_second: Optional[float] = 1.0, max_in_flight: int = 4,
+                 cache_dir: Optional[str] = None, enable_cache: bool = True,
+                 sweep_deadline: Optional[float] = None, history_limit: Optional[int] = None,
+                 history_spill_path: Optional[str] = None, checkpoint_path: Optional[str] = None,
+                 resume: bool = False, budget: Optional[ResearchBudget] = None,
+                 adaptive_routing: bool = False, instrumentation: Optional[Instrumentation] = None,
+                 topics: Optional[Sequence[str]] = None, shard_index: int = 0, shard_count: int = 1,
+                 search_index_path: Optional[str] = None):
+        if shard_count < 1 or not 0 <= shard_index < shard_count:
+            raise ValueError(f"Invalid shard {shard_index} of {shard_count}")
+        self.topics = list(topics) if topics else None
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+        
+        self.sweep_deadline = sweep_deadline
+        self.perplexity = EnhancedPerplexityResearch(
+            max_concurrency=max_in_flight,
+            requests_per_second=requests_per_second,
+            cache_dir=cache_dir,
+            enable_cache=enable_cache,
+            budget=budget,
+            adaptive_routing=adaptive_routing,
+            instrumentation=instrumentation
+        )
+        # Opt-in full-text index, searchable even once results have been spilled or discarded
+        self.search_index = ResearchSearchIndex(search_index_path) if search_index_path else None
+        self.research_history = ResearchHistory(history_limit, history_spill_path, self.search_index)
+        self.checkpoint_journal = CheckpointJournal(checkpoint_path, resume) if checkpoint_path else None
+        self.last_sweep_usage: Dict[str, Any] = self.perplexity.usage.sweep_summary()
+    
+    async def aclose(self):
+        """Release the research client's pooled connections"""
+        await self.perplexity.aclose()
+    
+    def search(self, query: str, top_k: int = 5) -> List[SearchHit]:
+        """Past research results best matching query, by BM25 over responses and sources"""
+        if self.search_index is None:
+            raise ValueError("SpecKitResearchAgent was created without a search_index_path")
+        return self.search_index.search(query, top_k)
+    
+    def top_sources(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Sources cited most often across every topic and follow-up researched so far"""
+        return self.perplexity.source_index.top_sources(limit)
+    
+    def research_queries(self) -> Dict[str, ResearchQuery]:
+        """Research queries selected by this agent's topic filter and shard, in definition order
+        
+        The filtered topics are dealt to shards round-robin, so every shard gets a
+        near-equal share and shards run with the same filter cover each topic once.
+        """
+        research_queries = self._define_research_queries()
+        if self.topics is not None:
+            unknown = [topic for topic in self.topics if topic not in research_queries]
+            if unknown:
+                raise ValueError(f"Unknown research topics: {', '.join(unknown)} "
+                                 f"(available: {', '.join(research_queries)})")
+        selected = [name for name in research_queries if self.topics is None or name in self.topics]
+        return {
+            name: research_queries[name]
+            for position, name in enumerate(selected)
+            if position % self.shard_count == self.shard_index
+        }
         
     async def comprehensive_speckit_research(self) -> Dict[str, ResearchResult]:
         """Conduct comprehensive SpecKit research across multiple dimensions"""
         
-        research_queries = self._define_research_queries()
-        results = {}
+        return await self._research_topics(self.research_queries())
+    
+    async def _research_topics(self, research_queries: Dict[str, ResearchQuery]) -> Dict[str, ResearchResult]:
+        """Research topics concurrently, checkpointing each topic and follow-up as it completes"""
+        journal = self.checkpoint_journal
         
-        for query_name, query in research_queries.items():
-            logger.info(f"Conducting research: {query_name}")
-            result = await self.perplexity.conduct_research(query)
-            results[query_name] = result
-            self.research_history.append(result)
+        # Topics run concurrently; the shared rate limiter paces the actual requests
+        async def research_topic(query_name: str, query: ResearchQuery) -> ResearchResult:
+            if journal is None:
+                logger.info(f"Conducting research: {query_name}")
+                return await self.perplexity.conduct_research(query, topic=query_name)
             
-            # Brief pause between requests to respect rate limits
-            await asyncio.sleep(2)
+            completed = journal.completed_result(query_name, query)
+            if completed is not None:
+                logger.info(f"Skipping research already in checkpoint: {query_name}")
+                # Checkpointed sources still count towards this sweep's source ranking
+                completed.sources = self.perplexity.source_index.add(completed.sources.entries(), query_name)
+                return completed
+            
+            logger.info(f"Conducting research: {query_name}")
+            result = await self.perplexity.conduct_research(
+                query,
+                completed_follow_ups=journal.completed_follow_ups(
+                    query_name, self.perplexity._build_follow_up_queries(query)
+                ),
+                on_follow_up=lambda follow_up_query, insight: journal.record_follow_up(
+                    query_name, follow_up_query, insight
+                ),
+                topic=query_name
+            )
+            # Placeholder results are never checkpointed, so a resume retries them
+            if not result.is_mock:
+                journal.record_topic(query_name, query, result)
+            return result
+        
+        self.perplexity.usage.start_sweep()
+        with self.perplexity.sweep_deadline(self.sweep_deadline):
+            topic_results = await asyncio.gather(
+                *(research_topic(query_name, query) for query_name, query in research_queries.items())
+            )
+        
+        results = dict(zip(research_queries.keys(), topic_results))
+        self.research_history.extend(topic_results)
+        
+        self.last_sweep_usage = self.perplexity.usage.sweep_summary()
+        logger.info(f"Sweep usage: {self.last_sweep_usage['requests']} requests, "
+                    f"{self.last_sweep_usage['prompt_tokens'] + self.last_sweep_usage['completion_tokens']} tokens, "
+                    f"${self.last_sweep_usage['cost']:.4f} estimated")
         
         return results
     
@@ -348,48 +2250,265 @@ class SpecKitResearchAgent:
             )
         }
     
-    def generate_documentation(self, results: Dict[str, ResearchResult]) -> str:
+    def generate_documentation(self, results: Dict[str, ResearchResult],
+                               generated_at: Optional[datetime] = None) -> str:
         """Generate comprehensive documentation from research results"""
+        buffer = io.StringIO()
+        self.render_documentation(results, buffer, generated_at)
+        return buffer.getvalue()
+    
+    def write_documentation(self, results: Union[Mapping[str, ResearchResult], Iterable[Tuple[str, ResearchResult]]],
+                            output_path: str, generated_at: Optional[datetime] = None):
+        """Render documentation straight to a file without building it in memory"""
+        with open(output_path, 'w') as f:
+            self.render_documentation(results, f, generated_at)
+    
+    def write_results_json(self, results: Union[Mapping[str, ResearchResult], Iterable[Tuple[str, ResearchResult]]],
+                           output_path: str):
+        """Write one JSON line per topic, carrying its position in the full topic list for merging"""
+        positions = {name: position for position, name in enumerate(self._define_research_queries())}
+        section_items = results.items() if isinstance(results, Mapping) else results
+        temp_path = f"{output_path}.tmp"
+        with open(temp_path, 'w') as f:
+            for section_name, result in section_items:
+                f.write(json.dumps({
+                    "topic": section_name,
+                    "position": positions.get(section_name),
+                    "result": result.to_dict()
+                }) + "\n")
+        os.replace(temp_path, output_path)
+    
+    def render_documentation(self, results: Union[Mapping[str, ResearchResult], Iterable[Tuple[str, ResearchResult]]],
+                             sink: TextIO, generated_at: Optional[datetime] = None):
+        """Write documentation section by section to any text sink
         
-        doc = f"""# SpecKit Methodology: Comprehensive Research Analysis
-
-*Generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*
-
-## Executive Summary
-
-This comprehensive research analysis explores GitHub's SpecKit methodology and specification-driven development patterns using advanced AI research capabilities. The analysis covers fundamental concepts, implementation strategies, competitive landscape, and advanced architectural patterns.
-
-"""
+        results may be a mapping or any iterable of (section name, result) pairs, so
+        sections can be produced lazily and never held in memory together. The header
+        is stamped with generated_at, or the current time.
+        """
+        with self.perplexity.instrumentation.span("render_documentation"):
+            sink.write(self._documentation_header(generated_at))
+            
+            section_items = results.items() if isinstance(results, Mapping) else results
+            for section_name, result in section_items:
+                self._write_section(sink, section_name, result)
+            
+            # Add implementation roadmap
+            sink.write(self._generate_implementation_roadmap())
+    
+    def _write_section(self, sink: TextIO, section_name: str, result: ResearchResult):
+        sink.write(self._section_preamble(section_name, result.query))
+        sink.write(result.response)
+        self._write_key_sources(sink, result.sources)
+        
+        self._write_insights(sink, result.follow_up_insights)
+        sink.write("\n---\n")
+    
+    def _write_insights(self, sink: TextIO, insights: Sequence[FollowUpInsight]):
+        if insights:
+            sink.write("\n### Advanced Insights\n")
+            for insight in insights:
+                sink.write(f"\n**{insight.query}**\n")
+                content = insight.content
+                if len(content) > self.INSIGHT_PREVIEW_CHARS:
+                    sink.write(f"{content[:self.INSIGHT_PREVIEW_CHARS]}...\n")
+                else:
+                    sink.write(f"{content}\n")
+    
+    def _write_key_sources(self, sink: TextIO, sources: Sequence[Dict[str, Any]]):
+        sink.write("\n\n### Key Sources\n")
+        for source in sources[:3]:  # Top 3 sources
+            sink.write(f"- [{source['title']}]({source['url']}): {source['snippet']}\n")
+    
+    async def stream_documentation(self, output_path: str) -> Dict[str, int]:
+        """Research every topic and append its section to output_path as chunks arrive
+        
+        Sections match those of render_documentation. Only the chunk in hand is held in
+        memory unless the response cache needs the whole response; returns characters of
+        analysis per topic.
+        """
+        research_queries = self.research_queries()
+        summary = {}
+        
+        with open(output_path, 'w') as f:
+            f.write(self._documentation_header())
+            f.flush()
+            
+            for section_name, query in research_queries.items():
+                logger.info(f"Streaming research section: {section_name}")
+                f.write(self._section_preamble(section_name, query.query))
+                
+                sources: List[Dict[str, Any]] = []
+                analysis_chars = 0
+                async with aclosing(self.perplexity.stream_research(query, sources, section_name)) as stream:
+                    async for chunk in stream:
+                        f.write(chunk)
+                        f.flush()
+                        analysis_chars += len(chunk)
+                
+                self._write_key_sources(f, sources)
+                
+                insights = []
+                # Mock results carry no follow-up insights, so none are streamed without a key
+                follow_up_queries = self.perplexity._build_follow_up_queries(query) if self.perplexity.api_key else []
+                for follow_up_query in follow_up_queries:
+                    # Insights are rendered as a preview, so stop reading once it is known to be cut;
+                    # closing the stream frees its rate-limiter slot and connection right away
+                    content = ""
+                    async with aclosing(self.perplexity.stream_research(follow_up_query, topic=section_name)) as stream:
+                        async for chunk in stream:
+                            content += chunk
+                            if len(content) > self.INSIGHT_PREVIEW_CHARS:
+                                break
+                    insights.append(FollowUpInsight(query=follow_up_query.query, content=content))
+                self._write_insights(f, insights)
+                
+                f.write("\n---\n")
+                f.flush()
+                summary[section_name] = analysis_chars
+            
+            f.write(self._generate_implementation_roadmap())
+        
+        return summary
+    
+    async def update_documentation(self, output_path: str) -> Dict[str, Optional[ResearchResult]]:
+        """Regenerate only the documentation sections whose inputs changed
+        
+        A manifest beside output_path records a fingerprint and length for every
+        rendered section. Topics whose query is unchanged and whose cached response
+        still matches keep their existing text; the rest, including every section
+        rendered from a mock result, are researched and rendered, and the file is
+        patched from the pieces. Returns the fresh result per topic,
+        or None where the existing section was reused.
+        
+        Topics outside this agent's filter or shard keep the section the document
+        already has, so a partial run never drops the rest of the document.
+        """
+        research_queries = self.research_queries()
+        manifest_path = Path(f"{output_path}.manifest.json")
+        previous_sections = self._load_section_manifest(output_path, manifest_path)
+        section_names = [
+            section_name for section_name in self._define_research_queries()
+            if section_name in research_queries or section_name in previous_sections
+        ]
+        
+        stale_queries = {
+            section_name: query
+            for section_name, query in research_queries.items()
+            if not self._section_is_current(query, previous_sections.get(section_name))
+        }
+        fresh_results: Dict[str, ResearchResult] = {}
+        if stale_queries:
+            logger.info(f"Re-researching {len(stale_queries)} of {len(research_queries)} sections: "
+                        f"{', '.join(stale_queries)}")
+            fresh_results = await self._research_topics(stale_queries)
+        elif list(previous_sections) == section_names:
+            logger.info("Documentation is up to date")
+            return {section_name: None for section_name in research_queries}
+        
+        header = self._documentation_header()
+        roadmap = self._generate_implementation_roadmap()
+        manifest = {"header_length": len(header), "roadmap_length": len(roadmap), "sections": []}
+        section_texts = []
+        
+        for section_name in section_names:
+            if section_name in fresh_results:
+                result = fresh_results[section_name]
+                buffer = io.StringIO()
+                self._write_section(buffer, section_name, result)
+                text = buffer.getvalue()
+                entry = {
+                    "name": section_name,
+                    "query_fingerprint": content_fingerprint(asdict(research_queries[section_name])),
+                    "response_fingerprint": content_fingerprint(result.response),
+                    "is_mock": result.is_mock,
+                    "length": len(text)
+                }
+            else:
+                entry, text = previous_sections[section_name]
+            manifest["sections"].append(entry)
+            section_texts.append(text)
+        
+        document = header + "".join(section_texts) + roadmap
+        manifest["document_fingerprint"] = content_fingerprint(document)
         
-        for section_name, result in results.items():
-            doc += f"""
+        # Replace atomically so an interrupted run never leaves a half-written file
+        temp_path = Path(f"{output_path}.tmp")
+        temp_path.write_text(document)
+        os.replace(temp_path, output_path)
+        manifest_path.write_text(json.dumps(manifest, indent=2))
+        
+        return {section_name: fresh_results.get(section_name) for section_name in research_queries}
+    
+    def _load_section_manifest(self, output_path: str,
+                               manifest_path: Path) -> Dict[str, Tuple[Dict[str, Any], str]]:
+        """Split the existing document into sections using its manifest
+        
+        Returns an empty mapping when either file is missing or the document no longer
+        matches the manifest, which forces a full rebuild.
+        """
+        try:
+            manifest = json.loads(manifest_path.read_text())
+            document = Path(output_path).read_text()
+        except (OSError, ValueError):
+            return {}
+        if manifest.get("document_fingerprint") != content_fingerprint(document):
+            logger.info("Documentation changed since the manifest was written; rebuilding all sections")
+            return {}
+        
+        sections = {}
+        position = manifest["header_length"]
+        for entry in manifest["sections"]:
+            sections[entry["name"]] = (entry, document[position:position + entry["length"]])
+            position += entry["length"]
+        return sections
+    
+    def _section_is_current(self, query: ResearchQuery, previous: Optional[Tuple[Dict[str, Any], str]]) -> bool:
+        """Whether a rendered section still reflects its query and cached response"""
+        if previous is None:
+            return False
+        entry, _ = previous
+        # Placeholder text is never current; entries from before is_mock was recorded count as mock
+        if entry.get("is_mock", True):
+            return False
+        if entry["query_fingerprint"] != content_fingerprint(asdict(query)):
+            return False
+        
+        # Without an API key a rebuild could only swap real research for mock text
+        if not self.perplexity.api_key:
+            return True
+        # With no cache, or an evicted or expired entry, nothing can vouch for the section
+        response_cache = self.perplexity.response_cache
+        if response_cache is None:
+            return False
+        cached = response_cache.get(self.perplexity._build_research_payload(query))
+        if cached is None:
+            return False
+        content = cached.get("choices", [{}])[0].get("message", {}).get("content", "")
+        return content_fingerprint(content) == entry["response_fingerprint"]
+    
+    def _section_preamble(self, section_name: str, query: str) -> str:
+        """Heading and query block that opens each documentation section"""
+        return f"""
 ## {section_name.replace('_', ' ').title()}
 
 ### Research Query
-**Focus**: {result.query}
+**Focus**: {query}
 
 ### Analysis
-{result.response}
+"""
+    
+    def _documentation_header(self, generated_at: Optional[datetime] = None) -> str:
+        """Title and executive summary for the research documentation"""
+        return f"""# SpecKit Methodology: Comprehensive Research Analysis
+
+*Generated on {(generated_at or datetime.now()).strftime('%Y-%m-%d %H:%M:%S')}*
+
+## Executive Summary
+
+This comprehensive research analysis explores GitHub's SpecKit methodology and specification-driven development patterns using advanced AI research capabilities. The analysis covers fundamental concepts, implementation strategies, competitive landscape, and advanced architectural patterns.
 
-### Key Sources
 """
-            for source in result.sources[:3]:  # Top 3 sources
-                doc += f"- [{source['title']}]({source['url']}): {source['snippet']}\n"
-            
-            if result.follow_up_insights:
-                doc += "\n### Advanced Insights\n"
-                for insight in result.follow_up_insights:
-                    doc += f"\n**{insight['query']}**\n"
-                    if isinstance(insight['result'], dict):
-                        content = insight['result'].get('choices', [{}])[0].get('message', {}).get('content', '')
-                        doc += f"{content[:500]}...\n" if len(content) > 500 else f"{content}\n"
-            
-            doc += "\n---\n"
-        
-        # Add implementation roadmap
-        doc += self._generate_implementation_roadmap()
-        
-        return doc
     
     def _generate_implementation_roadmap(self) -> str:
         """Generate implementation roadmap based on research"""
@@ -439,33 +2558,188 @@ This comprehensive research analysis explores GitHub's SpecKit methodology and s
 *This analysis was generated using Enhanced Perplexity Research with Sonar reasoning capabilities for comprehensive methodology exploration.*
 """
 
-async def main():
+def _build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="SpecKit Research & Documentation Agent",
+        epilog="Shards deal the selected topics round-robin, so N workers run with --shard-count N, "
+               "--shard-index 0..N-1 and the same --topics together cover every selected topic once."
+    )
+    parser.add_argument("-o", "--output", default=os.getenv('SPECKIT_RESEARCH_OUTPUT'),
+                        help="Documentation or JSON results path "
+                             "(default: comprehensive-research-analysis.md/.jsonl in the current directory)")
+    parser.add_argument("--format", choices=["markdown", "json"], default="markdown",
+                        help="Write rendered documentation, or one JSON line of results per topic")
+    parser.add_argument("--topics", nargs="+", metavar="TOPIC",
+                        help="Research only these topics (see --list-topics)")
+    parser.add_argument("--list-topics", action="store_true", help="Print the available topics and exit")
+    parser.add_argument("--shard-index", type=int, default=0, help="This worker's shard, from 0")
+    parser.add_argument("--shard-count", type=int, default=1, help="Number of workers splitting the topics")
+    parser.add_argument("--concurrency", type=int, default=4, help="Maximum research requests in flight")
+    parser.add_argument("--requests-per-second", type=float, default=1.0,
+                        help="Sustained request rate; 0 disables rate limiting")
+    parser.add_argument("--cache-dir", default=None,
+                        help="Response cache directory (default: $SPECKIT_RESEARCH_CACHE_DIR or ~/.cache/speckit-research)")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the response cache")
+    parser.add_argument("--stream", action="store_true", default=bool(os.getenv('SPECKIT_RESEARCH_STREAM')),
+                        help="Write each markdown section as it arrives instead of after the sweep")
+    parser.add_argument("--metrics", default=os.getenv('SPECKIT_RESEARCH_METRICS'),
+                        help="Export metrics to a Prometheus text file, or OTLP/JSON lines for a .json/.jsonl path")
+    parser.add_argument("--checkpoint", nargs="?", const="", default=None, metavar="PATH",
+                        help="Journal completed topics and follow-ups so an interrupted sweep can resume "
+                             "(default path: beside the output with a .checkpoint.jsonl suffix)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip topics and follow-ups already recorded in the checkpoint journal")
+    parser.add_argument("--search-index", default=None,
+                        help="Index results for full-text search in this file; --search reads it "
+                             "(default: beside the output with a .search.sqlite3 suffix)")
+    parser.add_argument("--search", metavar="TEXT",
+                        help="Search past research in the index instead of running a sweep")
+    parser.add_argument("--top-k", type=int, default=5, help="Number of --search results")
+    return parser
+
+async def main(argv: Optional[Sequence[str]] = None):
     """Main execution function for SpecKit research"""
-    print("🔍 Deploying SpecKit Research & Documentation Agent...")
+    parser = _build_arg_parser()
+    args = parser.parse_args(argv)
+    if args.format == "json" and args.stream:
+        parser.error("--stream only applies to markdown output")
     
-    agent = SpecKitResearchAgent()
+    default_name = "comprehensive-research-analysis" + (".jsonl" if args.format == "json" else ".md")
+    output_path = args.output or default_name
+    checkpoint_path = None
+    if (args.checkpoint is not None or args.resume) and not (args.list_topics or args.search):
+        checkpoint_path = args.checkpoint or f"{output_path}.checkpoint.jsonl"
+    search_index_path = args.search_index or (f"{output_path}.search.sqlite3" if args.search else None)
+    if args.search and not Path(search_index_path).exists():
+        parser.error(f"No search index at {search_index_path}; run a sweep with --search-index first")
+    if args.stream and (args.topics or args.shard_count > 1) and Path(output_path).exists():
+        # Streaming rewrites the whole document, which would drop every other topic's section
+        parser.error(f"--stream with --topics or shards would overwrite {output_path}; run without "
+                     "--stream to update only those sections, or use --format json and research-merge.py")
+    recorder = MetricsRecorder() if args.metrics else None
+    try:
+        agent = SpecKitResearchAgent(
+            requests_per_second=args.requests_per_second or None,
+            max_in_flight=args.concurrency,
+            cache_dir=args.cache_dir,
+            enable_cache=not args.no_cache,
+            checkpoint_path=checkpoint_path,
+            resume=args.resume,
+            instrumentation=recorder,
+            topics=args.topics,
+            shard_index=args.shard_index,
+            shard_count=args.shard_count,
+            search_index_path=search_index_path
+        )
+        research_queries = agent.research_queries()
+    except ValueError as e:
+        parser.error(str(e))
     
-    print("📊 Conducting comprehensive SpecKit methodology research...")
-    results = await agent.comprehensive_speckit_research()
+    if args.list_topics:
+        for topic, query in agent._define_research_queries().items():
+            print(f"{topic}: {query.query}")
+        return research_queries
+    
+    if args.search:
+        hits = agent.search(args.search, args.top_k)
+        if args.format == "json":
+            print(json.dumps([hit.to_dict() for hit in hits], indent=2))
+            return hits
+        print(f"🔎 {len(hits)} past results for: {args.search}")
+        for hit in hits:
+            print(f"  - [{hit.score:.2f}] {hit.query} "
+                  f"({hit.generated_at.strftime('%Y-%m-%d %H:%M')}, {hit.model_used})")
+        return hits
     
-    print("📄 Generating enhanced documentation...")
-    documentation = agent.generate_documentation(results)
+    if args.format == "json":
+        # Machine-readable mode: results go to output_path, a JSON summary to stdout
+        try:
+            results = await agent._research_topics(research_queries)
+            agent.write_results_json(results, output_path)
+        finally:
+            await agent.aclose()
+            if recorder is not None:
+                recorder.export(args.metrics)
+        print(json.dumps({
+            "output": output_path,
+            "shard": {"index": args.shard_index, "count": args.shard_count},
+            "topics": {
+                topic: {
+                    "characters": len(result.response),
+                    "sources": len(result.sources),
+                    "follow_ups": len(result.follow_up_insights),
+                    "is_mock": result.is_mock
+                }
+                for topic, result in results.items()
+            },
+            "top_sources": agent.top_sources(10),
+            "usage": agent.last_sweep_usage,
+            "metrics": agent.perplexity.get_metrics()
+        }, indent=2))
+        return results
+    
+    print("🔍 Deploying SpecKit Research & Documentation Agent...")
+    if args.shard_count > 1:
+        print(f"🧩 Shard {args.shard_index + 1} of {args.shard_count}: {', '.join(research_queries) or 'no topics'}")
+    if args.resume:
+        print("♻️  Resuming from checkpoint journal...")
+    
+    if args.stream:
+        # Streaming mode writes each section as it arrives instead of after the whole sweep
+        print("📡 Streaming comprehensive SpecKit methodology research...")
+        try:
+            summary = await agent.stream_documentation(output_path)
+        finally:
+            await agent.aclose()
+            if recorder is not None:
+                recorder.export(args.metrics)
+    
+        print(f"✅ Research completed! Documentation saved to: {output_path}")
+        print("\n📋 Research Summary:")
+        for query_name, characters in summary.items():
+            print(f"  - {query_name}: {characters} characters of analysis")
+        return summary
     
-    # Save documentation
-    output_path = "/Users/apple/Desktop/UBOS_2.0/UBOS_AGENTS/General-Tools/frameworks/spec-kit/comprehensive-research-analysis.md"
-    with open(output_path, 'w') as f:
-        f.write(documentation)
+    print("📊 Conducting comprehensive SpecKit methodology research...")
+    print("📄 Updating enhanced documentation for changed topics...")
+    try:
+        results = await agent.update_documentation(output_path)
+    finally:
+        await agent.aclose()
+        if recorder is not None:
+            recorder.export(args.metrics)
     
     print(f"✅ Research completed! Documentation saved to: {output_path}")
     
     # Generate research summary
     print("\n📋 Research Summary:")
     for query_name, result in results.items():
+        if result is None:
+            print(f"  - {query_name}: unchanged, existing section kept")
+            continue
         print(f"  - {query_name}: {len(result.response)} characters of analysis")
         print(f"    Sources: {len(result.sources)} references")
         print(f"    Follow-ups: {len(result.follow_up_insights)} additional insights")
     
+    top_sources = agent.top_sources(5)
+    if top_sources:
+        print("\n🔗 Most Cited Sources:")
+        for source in top_sources:
+            print(f"  - {source['title'] or source['url']} ({source['url']}): "
+                  f"{source['hits']} citations across {len(source['topics'])} topics")
+    
+    print("\n💰 Sweep Usage:")
+    for model, usage in agent.last_sweep_usage["by_model"].items():
+        print(f"  - {model}: {usage['requests']} requests, "
+              f"{usage['prompt_tokens'] + usage['completion_tokens']} tokens, "
+              f"${usage['cost']:.4f}, {usage['mean_latency']:.2f}s mean latency")
+    print(f"  Total estimated cost: ${agent.last_sweep_usage['cost']:.4f}")
+    
+    print("\n🩺 Reliability Metrics:")
+    for metric, value in agent.perplexity.get_metrics().items():
+        print(f"  - {metric}: {value}")
+    
     return results
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+SpecKit Research Agent Benchmarks
+Latency measurements for the research agent against a local mock server
+
+Run directly to print a summary; no Perplexity API key or network access is needed.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, Iterator, List, Any, Sequence, Tuple
+
+import httpx
+
+from script_loader import load_script
+
+research_agent = load_script("research-agent.py", "research_agent")
+mock_server = load_script("mock-perplexity-server.py", "mock_perplexity_server")
+
+def _bench_research(base_url: str, **kwargs) -> Any:
+    research = research_agent.EnhancedPerplexityResearch(
+        api_key="benchmark", enable_cache=False, requests_per_second=None, **kwargs
+    )
+    research.base_url = base_url
+    return research
+
+async def benchmark_connection_pooling(base_url: str, requests: int = 200) -> Dict[str, float]:
+    """Compare a fresh client per request against the shared pooled client"""
+    query = research_agent.ResearchQuery(query="connection pooling benchmark", focus_areas=["latency"])
+
+    research = _bench_research(base_url)
+    fresh_latencies: List[float] = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        async with httpx.AsyncClient() as client:
+            await research._make_research_request(client, query)
+        fresh_latencies.append(time.perf_counter() - started)
+
+    pooled_latencies: List[float] = []
+    async with research:
+        client = research._get_client()
+        for _ in range(requests):
+            started = time.perf_counter()
+            await research._make_research_request(client, query)
+            pooled_latencies.append(time.perf_counter() - started)
+
+    fresh_ms = statistics.mean(fresh_latencies) * 1000
+    pooled_ms = statistics.mean(pooled_latencies) * 1000
+    return {
+        "requests": requests,
+        "fresh_client_ms": fresh_ms,
+        "pooled_client_ms": pooled_ms,
+        "saved_per_request_ms": fresh_ms - pooled_ms
+    }
+
+def _record_latencies(research: Any, latencies: List[float]):
+    """Wrap the research client's HTTP call so every attempt's latency is recorded"""
+    make_request = research._make_research_request
+
+    async def timed_request(client, query, payload=None):
+        started = time.perf_counter()
+        try:
+            return await make_request(client, query, payload)
+        finally:
+            latencies.append(time.perf_counter() - started)
+
+    research._make_research_request = timed_request
+
+def latency_percentiles(latencies: Sequence[float]) -> Dict[str, float]:
+    """p50/p95/p99 latency in milliseconds"""
+    if not latencies:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0}
+    if len(latencies) == 1:
+        value = latencies[0] * 1000
+        return {"p50_ms": value, "p95_ms": value, "p99_ms": value}
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {"p50_ms": cuts[49] * 1000, "p95_ms": cuts[94] * 1000, "p99_ms": cuts[98] * 1000}
+
+async def benchmark_sweep(base_url: str, max_in_flight: int, requests_per_second: float = None,
+                          adaptive_routing: bool = False) -> Dict[str, float]:
+    """Time one comprehensive_speckit_research sweep against the mock server"""
+    agent = research_agent.SpecKitResearchAgent(
+        requests_per_second=requests_per_second, max_in_flight=max_in_flight, enable_cache=False,
+        adaptive_routing=adaptive_routing
+    )
+    agent.perplexity.api_key = "benchmark"
+    agent.perplexity.base_url = base_url
+
+    latencies: List[float] = []
+    _record_latencies(agent.perplexity, latencies)
+
+    started = time.perf_counter()
+    try:
+        await agent.comprehensive_speckit_research()
+    finally:
+        await agent.aclose()
+    sweep_seconds = time.perf_counter() - started
+    metrics = agent.perplexity.get_metrics()
+
+    return {
+        "max_in_flight": max_in_flight,
+        "requests": len(latencies),
+        "sweep_seconds": sweep_seconds,
+        "requests_per_second": len(latencies) / sweep_seconds if sweep_seconds else 0.0,
+        "retries": metrics["retries"],
+        "fallbacks_to_mock": metrics["fallbacks_to_mock"],
+        "hedged_requests": metrics["hedged_requests"],
+        "routed_follow_ups": metrics["routed_follow_ups"],
+        **latency_percentiles(latencies)
+    }
+
+def _synthetic_sections(count: int, response_size: int = 4000) -> Iterator[Tuple[str, Any]]:
+    """Lazily produce documentation sections shaped like real research results"""
+    response = ("Synthetic research analysis paragraph. " * (response_size // 39 + 1))[:response_size]
+    citations = [
+        {"url": f"https://example.com/source-{index}", "title": f"Source {index}", "text": "Citation text. " * 20}
+        for index in range(5)
+    ]
+    for index in range(count):
+        yield f"topic_{index}", research_agent.ResearchResult(
+            query=f"Synthetic research query {index}",
+            response=response,
+            sources=research_agent.SourceList.from_citations(citations),
+            timestamp=time.time(),
+            model_used="sonar-reasoning",
+            follow_up_insights=[
+                research_agent.FollowUpInsight(query=f"Follow-up {index}.{n}", content=response[:800])
+                for n in range(3)
+            ]
+        )
+
+def _concatenated_documentation(agent: Any, sections: Iterator[Tuple[str, Any]]) -> str:
+    """The original repeated-concatenation renderer, kept as a baseline"""
+    doc = agent._documentation_header()
+    for section_name, result in sections:
+        doc += agent._section_preamble(section_name, result.query)
+        doc += f"{result.response}\n\n### Key Sources\n"
+        for source in result.sources[:3]:
+            doc += f"- [{source['title']}]({source['url']}): {source['snippet']}\n"
+        if result.follow_up_insights:
+            doc += "\n### Advanced Insights\n"
+            for insight in result.follow_up_insights:
+                doc += f"\n**{insight.query}**\n"
+                content = insight.content
+                doc += f"{content[:500]}...\n" if len(content) > 500 else f"{content}\n"
+        doc += "\n---\n"
+    doc += agent._generate_implementation_roadmap()
+    return doc
+
+def _measure(render: Callable[[], Any]) -> Dict[str, float]:
+    """Wall time and traced peak memory of one render"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    render()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": elapsed, "peak_mib": peak / (1024 * 1024)}
+
+def benchmark_documentation(sections: int = 5000) -> Dict[str, Dict[str, float]]:
+    """Compare string-building renderers with streaming sections to a file"""
+    agent = research_agent.SpecKitResearchAgent(enable_cache=False)
+    with tempfile.TemporaryDirectory() as output_dir:
+        output_path = os.path.join(output_dir, "benchmark-analysis.md")
+        return {
+            "string concatenation": _measure(
+                lambda: _concatenated_documentation(agent, _synthetic_sections(sections))
+            ),
+            "generate_documentation": _measure(
+                lambda: agent.generate_documentation(dict(_synthetic_sections(sections)))
+            ),
+            "write_documentation": _measure(
+                lambda: agent.write_documentation(_synthetic_sections(sections), output_path)
+            )
+        }
+
+def _print_sweep(result: Dict[str, float]):
+    print(f"  - max_in_flight={result['max_in_flight']}: "
+          f"{result['sweep_seconds']:.2f}s sweep, {result['requests']} requests, "
+          f"{result['requests_per_second']:.1f} req/s, "
+          f"p50 {result['p50_ms']:.1f} ms, p95 {result['p95_ms']:.1f} ms, p99 {result['p99_ms']:.1f} ms, "
+          f"{result['retries']} retries, {result['fallbacks_to_mock']} mock fallbacks, "
+          f"{result['routed_follow_ups']} routed, {result['hedged_requests']} hedged")
+
+async def _run_sweep_benchmarks(args: argparse.Namespace, config: Any):
+    with mock_server.MockPerplexityServer(config=config) as server:
+        print(f"🧪 Mock Perplexity server at {server.url}")
+        print("\n📊 Research sweep (comprehensive_speckit_research)")
+        for max_in_flight in args.concurrency:
+            _print_sweep(await benchmark_sweep(
+                server.url, max_in_flight, args.requests_per_second, args.adaptive_routing
+            ))
+        print(f"  Server answered {server.stats.requests} requests "
+              f"({server.stats.rate_limited} rate limited, {server.stats.errors} errors)")
+
+async def _run_pooling_benchmark(args: argparse.Namespace):
+    # Pooling is measured without injected latency so handshake cost dominates
+    with mock_server.MockPerplexityServer() as server:
+        pooling = await benchmark_connection_pooling(server.url, args.pooling_requests)
+        print("\n📊 Connection pooling")
+        print(f"  - Requests: {pooling['requests']}")
+        print(f"  - Fresh client per request: {pooling['fresh_client_ms']:.2f} ms/request")
+        print(f"  - Shared pooled client: {pooling['pooled_client_ms']:.2f} ms/request")
+        print(f"  - Saved per request: {pooling['saved_per_request_ms']:.2f} ms")
+
+async def main():
+    """Run all benchmarks against a throwaway mock server"""
+    parser = argparse.ArgumentParser(description="Benchmark the SpecKit research agent against a mock server")
+    parser.add_argument("--latency", type=float, default=0.05, help="Mock server seconds per response")
+    parser.add_argument("--latency-jitter", type=float, default=0.05, help="Extra random seconds per response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of a 502 response")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Probability of a 429 response")
+    parser.add_argument("--retry-after", type=float, default=0.1, help="Retry-After seconds for 429 responses")
+    parser.add_argument("--response-size", type=int, default=4000, help="Completion length in characters")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16],
+                        help="max_in_flight settings to sweep")
+    parser.add_argument("--requests-per-second", type=float, default=None,
+                        help="Token-bucket rate for sweeps (unlimited by default)")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Probability of a tail-latency response")
+    parser.add_argument("--slow-latency", type=float, default=1.0, help="Extra seconds for tail-latency responses")
+    parser.add_argument("--adaptive-routing", action="store_true",
+                        help="Route follow-ups and hedge slow requests during sweeps")
+    parser.add_argument("--pooling-requests", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--doc-sections", type=int, default=5000,
+                        help="Sections rendered by the documentation benchmark")
+    parser.add_argument("--benchmarks", nargs="+", choices=["sweep", "pooling", "documentation"],
+                        default=["sweep", "pooling", "documentation"])
+    args = parser.parse_args()
+
+    config = mock_server.MockServerConfig(
+        latency=args.latency,
+        latency_jitter=args.latency_jitter,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        response_size=args.response_size,
+        slow_rate=args.slow_rate,
+        slow_latency=args.slow_latency,
+        seed=args.seed
+    )
+
+    if "sweep" in args.benchmarks:
+        await _run_sweep_benchmarks(args, config)
+    if "pooling" in args.benchmarks:
+        await _run_pooling_benchmark(args)
+    if "documentation" in args.benchmarks:
+        print(f"\n📊 Documentation rendering ({args.doc_sections} sections)")
+        for renderer, result in benchmark_documentation(args.doc_sections).items():
+            print(f"  - {renderer}: {result['seconds']:.2f}s, peak {result['peak_mib']:.1f} MiB")
+
+if __name__ == "__main__":
+    asyncio.run(main())
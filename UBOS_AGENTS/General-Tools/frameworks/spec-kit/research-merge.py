@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+SpecKit Research Merge
+Combine sharded research sweeps into one documentation file and one JSON index
+
+Each input is a JSON-lines results file written by `research-agent.py --format json`.
+Inputs are merged in two streaming passes: the first reads every line once and keeps
+only a small locator per topic, the second seeks back to each winning line and renders
+it, so memory stays bounded by one result plus the source table however many results
+are merged.
+"""
+
+import argparse
+import json
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from script_loader import load_script
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+research_agent = load_script("research-agent.py", "research_agent")
+
+@dataclass(slots=True)
+class TopicLocation:
+    """Where the winning result for one topic lives among the input files"""
+    topic: str
+    position: Optional[int]
+    timestamp: float
+    path: str
+    offset: int
+
+    def sort_key(self) -> Tuple[int, int, str]:
+        # Topics unknown to the agent that wrote them follow the known ones, by name
+        return (0, self.position, self.topic) if self.position is not None else (1, 0, self.topic)
+
+def locate_topics(paths: Iterable[str]) -> Tuple[List[TopicLocation], int]:
+    """First pass: find the newest result per topic, returning locations in document order
+
+    When several inputs carry the same topic the result with the latest timestamp wins;
+    ties go to the input listed last. Also returns the number of result lines read.
+    """
+    winners: Dict[str, TopicLocation] = {}
+    lines_read = 0
+    for path in paths:
+        with open(path, 'rb') as f:
+            offset = 0
+            for line in f:
+                line_offset, offset = offset, offset + len(line)
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                lines_read += 1
+                location = TopicLocation(
+                    topic=record["topic"],
+                    position=record.get("position"),
+                    timestamp=record["result"]["timestamp"],
+                    path=path,
+                    offset=line_offset
+                )
+                current = winners.get(location.topic)
+                if current is None or location.timestamp >= current.timestamp:
+                    if current is not None:
+                        logger.debug(f"Newer result for {location.topic} in {path} supersedes {current.path}")
+                    winners[location.topic] = location
+    return sorted(winners.values(), key=TopicLocation.sort_key), lines_read
+
+def read_results(locations: Sequence[TopicLocation]) -> Iterator[Tuple[str, Any]]:
+    """Second pass: load each winning result in order, holding one at a time"""
+    handles: Dict[str, Any] = {}
+    try:
+        for location in locations:
+            f = handles.get(location.path)
+            if f is None:
+                f = handles[location.path] = open(location.path, 'rb')
+            f.seek(location.offset)
+            record = json.loads(f.readline())
+            yield location.topic, research_agent.ResearchResult.from_dict(record["result"])
+    finally:
+        for f in handles.values():
+            f.close()
+
+class SourceTable:
+    """Sources deduplicated by URL across topics, with the topics citing each one
+
+    When two results describe the same URL differently, the newer result's title and
+    snippet are kept.
+    """
+
+    def __init__(self):
+        self._sources: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, topic: str, timestamp: float, sources: Iterable[Dict[str, Any]]) -> List[str]:
+        """Record a result's sources and return their URLs in citation order"""
+        urls = []
+        for source in sources:
+            url = source["url"]
+            entry = self._sources.get(url)
+            if entry is None:
+                entry = self._sources[url] = {**source, "timestamp": timestamp, "topics": []}
+            elif timestamp > entry["timestamp"]:
+                entry.update(title=source["title"], snippet=source["snippet"], timestamp=timestamp)
+            if topic not in entry["topics"]:
+                entry["topics"].append(topic)
+            urls.append(url)
+        return urls
+
+    def __len__(self) -> int:
+        return len(self._sources)
+
+    def entries(self) -> Iterator[Dict[str, Any]]:
+        """Sources ordered by how many topics cite them, then URL"""
+        for url, entry in sorted(self._sources.items(), key=lambda item: (-len(item[1]["topics"]), item[0])):
+            yield {
+                "url": url,
+                "title": entry["title"],
+                "snippet": entry["snippet"],
+                "topics": entry["topics"]
+            }
+
+def merge_results(paths: Sequence[str], output_path: str, index_path: str,
+                  generated_at: Optional[datetime] = None) -> Dict[str, int]:
+    """Merge result files into documentation at output_path and a JSON index at index_path
+
+    The documentation is rendered by the research agent itself, so it matches what a
+    single process researching every topic would have written. The header is stamped
+    with generated_at, or the newest merged result's time.
+    """
+    locations, lines_read = locate_topics(paths)
+    if generated_at is None and locations:
+        generated_at = datetime.fromtimestamp(max(location.timestamp for location in locations))
+
+    agent = research_agent.SpecKitResearchAgent(enable_cache=False)
+    sources = SourceTable()
+
+    with open(index_path, 'w') as index:
+        index.write('{"generated_at": %s, "inputs": %s,\n "topics": [' % (
+            json.dumps(generated_at.isoformat() if generated_at else None), json.dumps(list(paths))
+        ))
+
+        # Topic entries are written to the index as each section is rendered
+        def indexed_results() -> Iterator[Tuple[str, Any]]:
+            for count, ((topic, result), location) in enumerate(zip(read_results(locations), locations)):
+                index.write(("\n" if count == 0 else ",\n") + json.dumps({
+                    "topic": topic,
+                    "position": location.position,
+                    "query": result.query,
+                    "timestamp": result.timestamp,
+                    "model_used": result.model_used,
+                    "is_mock": result.is_mock,
+                    "follow_ups": len(result.follow_up_insights),
+                    "source_urls": sources.add(topic, result.timestamp, result.sources),
+                    "input": location.path
+                }))
+                yield topic, result
+
+        agent.write_documentation(indexed_results(), output_path, generated_at)
+
+        index.write('\n ],\n "sources": [\n')
+        index.write(",\n".join(json.dumps(entry) for entry in sources.entries()))
+        index.write('\n ]}\n')
+
+    return {
+        "inputs": len(paths),
+        "results_read": lines_read,
+        "topics": len(locations),
+        "duplicates_dropped": lines_read - len(locations),
+        "unique_sources": len(sources)
+    }
+
+def main(argv: Optional[Sequence[str]] = None):
+    """Merge sharded research results from the command line"""
+    parser = argparse.ArgumentParser(description="Merge sharded SpecKit research results")
+    parser.add_argument("inputs", nargs="+", help="JSON-lines results from research-agent.py --format json")
+    parser.add_argument("-o", "--output", default="comprehensive-research-analysis.md",
+                        help="Merged documentation path")
+    parser.add_argument("--index", default=None,
+                        help="Merged JSON index path (default: the output path with an .index.json suffix)")
+    args = parser.parse_args(argv)
+
+    index_path = args.index or str(Path(args.output).with_suffix(".index.json"))
+    summary = merge_results(args.inputs, args.output, index_path)
+
+    print(f"✅ Merged {summary['topics']} topics from {summary['inputs']} inputs into {args.output}")
+    print(f"  - Results read: {summary['results_read']} ({summary['duplicates_dropped']} superseded)")
+    print(f"  - Unique sources: {summary['unique_sources']}")
+    print(f"  - Index: {index_path}")
+    return summary
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""
+SpecKit Script Loader
+Import the hyphen-named SpecKit scripts in this directory as modules
+"""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+def load_script(filename: str, module_name: str):
+    """Import a sibling script whose file name is not a valid module name
+
+    Like import, a script already loaded under module_name is reused, so every
+    importer shares one copy of its classes and module state.
+    """
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    spec = importlib.util.spec_from_file_location(module_name, Path(__file__).with_name(filename))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
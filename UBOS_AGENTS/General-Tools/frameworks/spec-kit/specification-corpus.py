@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+SpecKit Specification Corpus Validator
+Validate every specifications/*.md file under many SpecKit project trees
+
+Project trees are walked lazily and files are handed to a process pool in batches,
+each worker reading its files through mmap. Results stream out as JSON lines in
+discovery order. A SQLite cache keyed by content hash and rule set lets unchanged
+specifications skip validation on the next run.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import mmap
+import os
+import sqlite3
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from script_loader import load_script
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+implementation_toolkit = load_script("implementation-toolkit.py", "implementation_toolkit")
+
+SPECIFICATION_DIRECTORY = "specifications"
+
+# Files smaller than this are read outright; mapping them costs more than it saves
+MMAP_THRESHOLD = 64 * 1024
+
+def iter_specification_files(roots: Iterable[str]) -> Iterator[str]:
+    """Lazily yield specifications/*.md paths under each root, sorted within a directory
+
+    Hidden directories such as .git are not descended into.
+    """
+    for root in roots:
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = sorted(name for name in dirnames if not name.startswith("."))
+            if os.path.basename(dirpath) == SPECIFICATION_DIRECTORY:
+                for filename in sorted(filenames):
+                    if filename.endswith(".md"):
+                        yield os.path.join(dirpath, filename)
+
+class ValidationCache:
+    """Validation results keyed by specification content hash and rule set
+
+    Workers open it read-only for lookups; the parent process is its single writer.
+    """
+
+    def __init__(self, db_path: str, read_only: bool = False):
+        self.db_path = db_path
+        self._reader: Optional[sqlite3.Connection] = None
+        if read_only:
+            uri = f"{Path(db_path).resolve().as_uri()}?mode=ro"
+            self._reader = sqlite3.connect(uri, uri=True, timeout=30.0)
+            return
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS results (
+                    content_hash TEXT NOT NULL,
+                    rules TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    PRIMARY KEY (content_hash, rules)
+                )
+            """)
+
+    @contextmanager
+    def _connection(self):
+        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get(self, content_hash: str, rules: str) -> Optional[Dict[str, Any]]:
+        row = self._reader.execute(
+            "SELECT result FROM results WHERE content_hash = ? AND rules = ?", (content_hash, rules)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_many(self, entries: Iterable[Tuple[str, str, Dict[str, Any]]]):
+        """Store (content_hash, rules, result) entries in one transaction"""
+        with self._connection() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO results (content_hash, rules, result) VALUES (?, ?, ?)",
+                [(content_hash, rules, json.dumps(result)) for content_hash, rules, result in entries]
+            )
+
+# Per-process state set up by _init_worker
+_validator = None
+_rules_key = ""
+_cache: Optional[ValidationCache] = None
+
+def _check_rules(rules: Optional[List[str]]):
+    """Reject rule names the validator would only warn about and skip"""
+    unknown = [rule for rule in rules or () if rule not in implementation_toolkit.SpecificationValidator.RULES]
+    if unknown:
+        raise ValueError(f"Unknown validation rules: {', '.join(unknown)}")
+
+def _init_worker(rules: Optional[List[str]], cache_path: Optional[str]):
+    global _validator, _rules_key, _cache
+    _validator = implementation_toolkit.SpecificationValidator(rules)
+    _rules_key = json.dumps({"rules": _validator.rules, "required_sections": _validator.required_sections})
+    _cache = ValidationCache(cache_path, read_only=True) if cache_path else None
+
+def _validate_contents(contents: Any) -> Tuple[str, Dict[str, Any], bool]:
+    """Hash one file's contents and validate them unless the cache already has a result"""
+    content_hash = hashlib.sha256(contents).hexdigest()
+    if _cache is not None:
+        cached = _cache.get(content_hash, _rules_key)
+        if cached is not None:
+            return content_hash, cached, True
+
+    diagnostics = _validator.validate(contents)
+    result = {
+        "valid": not any(diagnostic.severity == "error" for diagnostic in diagnostics),
+        "errors": sum(diagnostic.severity == "error" for diagnostic in diagnostics),
+        "warnings": sum(diagnostic.severity == "warning" for diagnostic in diagnostics),
+        "diagnostics": [asdict(diagnostic) for diagnostic in diagnostics]
+    }
+    return content_hash, result, False
+
+def _validate_file(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < MMAP_THRESHOLD:
+                content_hash, result, cached = _validate_contents(f.read())
+            else:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as contents:
+                    content_hash, result, cached = _validate_contents(contents)
+    except OSError as e:
+        return {"path": path, "error": str(e)}
+    return {"path": path, "sha256": content_hash, "bytes": size, "cached": cached, **result}
+
+def _validate_batch(paths: List[str]) -> List[Dict[str, Any]]:
+    return [_validate_file(path) for path in paths]
+
+def _batches(paths: Iterator[str], batch_size: int) -> Iterator[List[str]]:
+    batch = []
+    for path in paths:
+        batch.append(path)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def validate_corpus(roots: Sequence[str], rules: Optional[List[str]] = None, cache_path: Optional[str] = None,
+                    max_workers: Optional[int] = None, batch_size: int = 32) -> Iterator[Dict[str, Any]]:
+    """Validate every specification under roots, yielding one result per file in discovery order
+
+    With max_workers of 1 everything runs in this process. Otherwise at most a few
+    batches per worker are in flight, so memory stays flat however large the corpus is.
+    New results are written to the cache after each batch.
+    Unknown rule names raise ValueError before any file is read.
+    """
+    _check_rules(rules)
+    cache = ValidationCache(cache_path) if cache_path else None
+    batches = _batches(iter_specification_files(roots), batch_size)
+
+    def finish(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if cache is not None:
+            cache.put_many(
+                (result["sha256"], _rules_key, {key: result[key] for key in ("valid", "errors", "warnings", "diagnostics")})
+                for result in results if "error" not in result and not result["cached"]
+            )
+        return results
+
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1:
+        _init_worker(rules, cache_path)
+        for batch in batches:
+            yield from finish(_validate_batch(batch))
+        return
+
+    # The parent needs the same rule key as the workers to write cache entries
+    _init_worker(rules, None)
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(rules, cache_path)) as executor:
+        in_flight = deque()
+        for batch in batches:
+            in_flight.append(executor.submit(_validate_batch, batch))
+            if len(in_flight) >= max_workers * 4:
+                yield from finish(in_flight.popleft().result())
+        while in_flight:
+            yield from finish(in_flight.popleft().result())
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Validate specification corpora from the command line, exiting 1 if any file fails"""
+    parser = argparse.ArgumentParser(description="Validate specifications/*.md across SpecKit project trees")
+    parser.add_argument("roots", nargs="+", help="Directories containing SpecKit projects")
+    parser.add_argument("-o", "--output", default="-", help="JSON-lines results path (default: stdout)")
+    parser.add_argument("--rules", nargs="+", metavar="RULE",
+                        choices=list(implementation_toolkit.SpecificationValidator.RULES),
+                        help="Rule sets to apply (default: all of "
+                             f"{', '.join(implementation_toolkit.SpecificationValidator.RULES)})")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--batch-size", type=int, default=32, help="Files sent to a worker at a time")
+    parser.add_argument("--cache", default=os.getenv('SPECKIT_VALIDATION_CACHE'),
+                        help="SQLite cache of results by content hash")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    counts = {"files": 0, "invalid": 0, "cached": 0, "unreadable": 0}
+    output = sys.stdout if args.output == "-" else open(args.output, 'w')
+    try:
+        for result in validate_corpus(args.roots, args.rules, args.cache, args.workers, args.batch_size):
+            output.write(json.dumps(result) + "\n")
+            counts["files"] += 1
+            if "error" in result:
+                counts["unreadable"] += 1
+            else:
+                counts["invalid"] += not result["valid"]
+                counts["cached"] += result["cached"]
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    logger.info(f"Validated {counts['files']} specifications in {time.perf_counter() - started:.2f}s: "
+                f"{counts['invalid']} invalid, {counts['unreadable']} unreadable, {counts['cached']} from cache")
+    return 1 if counts["invalid"] or counts["unreadable"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,279 @@
+"""Regression tests for the implementation toolkit's validation, bulk initialization and workflow"""
+
+import asyncio
+import json
+import logging
+import mmap
+import time
+
+import pytest
+
+from script_loader import load_script
+
+implementation_toolkit = load_script("implementation-toolkit.py", "implementation_toolkit")
+
+VALID_SPECIFICATION = """# Checkout
+
+## Project Overview
+Let shoppers pay for their basket.
+
+## User Stories
+As a shopper, I want to pay by card so that I can finish my order.
+
+## Success Criteria
+- [ ] Card payments succeed
+
+## Scope and Boundaries
+
+### In Scope
+Card payments.
+
+### Out of Scope
+Refunds.
+
+## Technical Constraints
+PCI compliance.
+"""
+
+def _messages(diagnostics):
+    return [diagnostic.message for diagnostic in diagnostics]
+
+def test_unknown_validation_rules_are_ignored_with_a_warning(caplog):
+    with caplog.at_level(logging.WARNING, logger="implementation_toolkit"):
+        validator = implementation_toolkit.SpecificationValidator(["syntax", "spelling"])
+    assert validator.rules == ["syntax"]
+    assert "spelling" in caplog.text
+
+@pytest.mark.parametrize("specification", [
+    VALID_SPECIFICATION.replace("## Project Overview", "## 1. Project Overview"),
+    VALID_SPECIFICATION.replace("### In Scope", "**In Scope**"),
+], ids=["numbered-heading", "bold-label"])
+def test_sections_are_matched_like_a_substring_check(specification):
+    validator = implementation_toolkit.SpecificationValidator(["completeness"])
+    assert not [d for d in validator.validate(specification) if d.severity == "error"]
+
+def test_indented_code_fences_are_closed():
+    specification = VALID_SPECIFICATION.replace(
+        "Card payments.\n", "Card payments:\n\n  ```\n# not a heading\n  ```\n"
+    )
+    diagnostics = implementation_toolkit.SpecificationValidator().validate(specification)
+    assert "Code fence is never closed" not in _messages(diagnostics)
+    assert not any("not a heading" in message for message in _messages(diagnostics))
+
+PHASE_INPUTS = {
+    "specify": {"requirements": "As a shopper, I want to pay by card."},
+    "plan": {"specification": "Checkout", "constraints": ["Web-based"]},
+    "tasks": {"architecture": "REST API", "strategy": "Iterative"},
+    "implement": {"tasks": ["UI components", "API endpoints", "Database schema"], "tests": ["Unit tests"]}
+}
+
+def _toolkit(tmp_path):
+    config = implementation_toolkit.SpecificationConfig(project_name="Checkout", output_directory=str(tmp_path))
+    return implementation_toolkit.SpecKitImplementationToolkit(config)
+
+def test_fanned_out_phase_keeps_every_job_result_key(tmp_path):
+    results = _toolkit(tmp_path).execute_workflow(PHASE_INPUTS).phase_results["implement"]["results"]
+    assert results["code_files_generated"] == 15
+    assert results["test_coverage"] == "85%"
+    assert len(results["jobs"]) == 3
+
+def test_upstream_results_are_kept_apart_from_caller_inputs(tmp_path):
+    phase_results = _toolkit(tmp_path).execute_workflow(PHASE_INPUTS).phase_results
+    plan = phase_results["plan"]["results"]
+    assert plan["inputs_processed"] == ["specification", "constraints"]
+    assert plan["upstream_inputs"] == ["specification_document"]
+    assert "upstream_inputs" not in phase_results["specify"]["results"]
+
+def _projects(tmp_path, count):
+    return [
+        (implementation_toolkit.SpecificationConfig(project_name=f"Project {index}",
+                                                    output_directory=str(tmp_path / f"project-{index}")),
+         "As a user, I want to track my tasks.")
+        for index in range(count)
+    ]
+
+@pytest.mark.parametrize("use_processes", [False, True], ids=["threads", "processes"])
+def test_bulk_initialization_reports_failures_in_input_order(tmp_path, use_processes):
+    projects = _projects(tmp_path, 6)
+    # A file where the project directory should go makes that one project fail
+    (tmp_path / "project-3").write_text("not a directory")
+
+    results = implementation_toolkit.SpecKitImplementationToolkit.initialize_projects(
+        projects, max_workers=2, use_processes=use_processes
+    )
+    assert [result.project_name for result in results] == [config.project_name for config, _ in projects]
+    assert [result.error is not None for result in results] == [False, False, False, True, False, False]
+    assert results[3].error.startswith("FileExistsError")
+    assert results[0].config and (tmp_path / "project-0" / "specifications" / "initial-spec.md").exists()
+
+def test_thread_pool_initializes_projects_in_batches(tmp_path, monkeypatch):
+    batch_sizes = []
+    initialize_batch = implementation_toolkit._initialize_project_batch
+
+    def record_batch(batch):
+        batch_sizes.append(len(batch))
+        return initialize_batch(batch)
+
+    monkeypatch.setattr(implementation_toolkit, "_initialize_project_batch", record_batch)
+    results = implementation_toolkit.SpecKitImplementationToolkit.initialize_projects(
+        _projects(tmp_path, 16), max_workers=2
+    )
+    assert len(results) == 16 and not any(result.error for result in results)
+    assert batch_sizes == [2] * 8
+
+def test_unchanged_phases_are_skipped_on_rerun(tmp_path):
+    toolkit = _toolkit(tmp_path)
+    assert toolkit.execute_workflow(PHASE_INPUTS).skipped == []
+
+    rerun = toolkit.execute_workflow(PHASE_INPUTS)
+    assert rerun.skipped == list(PHASE_INPUTS)
+    assert rerun.phase_results["implement"]["results"]["code_files_generated"] == 15
+
+    # A changed input reruns its phase and everything downstream of it
+    changed = {**PHASE_INPUTS, "plan": {**PHASE_INPUTS["plan"], "constraints": ["Mobile"]}}
+    assert _toolkit(tmp_path).execute_workflow(changed).skipped == ["specify"]
+    assert _toolkit(tmp_path).execute_workflow(changed, force=True).skipped == []
+
+def _phase(name, inputs, outputs):
+    return implementation_toolkit.SpecificationPhase(
+        name=name, description=name, inputs=inputs, outputs=outputs, validation_criteria=[], ai_prompts={}
+    )
+
+def test_independent_phases_run_concurrently_and_the_slowest_chain_is_critical(tmp_path, monkeypatch):
+    toolkit = _toolkit(tmp_path)
+    toolkit.phases = {
+        "design": _phase("design", [], ["design"]),
+        "backend": _phase("backend", ["design"], ["backend"]),
+        "frontend": _phase("frontend", ["design"], ["frontend"]),
+        "release": _phase("release", ["backend", "frontend"], ["release"])
+    }
+    delays = {"design": 0.05, "backend": 0.3, "frontend": 0.1, "release": 0.05}
+    execute_phase_logic = toolkit._execute_phase_logic
+
+    def slow_phase_logic(phase, inputs, upstream=None):
+        time.sleep(delays[phase.name])
+        return execute_phase_logic(phase, inputs, upstream)
+
+    monkeypatch.setattr(toolkit, "_execute_phase_logic", slow_phase_logic)
+    report = toolkit.execute_workflow()
+
+    assert toolkit.build_phase_graph()["release"] == ["backend", "frontend"]
+    assert report.critical_path == ["design", "backend", "release"]
+    assert report.critical_path_seconds >= 0.4
+    # Backend and frontend overlap, so the run takes about as long as its critical path
+    assert report.wall_seconds < sum(delays.values())
+    assert report.timings["frontend"].started < report.timings["backend"].finished
+    assert "* backend" in report.format_timing()
+
+def test_cyclic_phase_dependencies_are_rejected(tmp_path):
+    toolkit = _toolkit(tmp_path)
+    toolkit.phases = {"draft": _phase("draft", ["review"], ["draft"]), "review": _phase("review", ["draft"], ["review"])}
+    with pytest.raises(ValueError, match="cycle"):
+        toolkit.execute_workflow()
+
+def _toolkit_at(path):
+    config = implementation_toolkit.SpecificationConfig(project_name="Checkout", output_directory=str(path))
+    return implementation_toolkit.SpecKitImplementationToolkit(config)
+
+def test_async_api_writes_what_the_sync_api_writes(tmp_path):
+    requirements = PHASE_INPUTS["specify"]["requirements"]
+    sync_toolkit, async_toolkit = _toolkit_at(tmp_path / "sync"), _toolkit_at(tmp_path / "async")
+
+    sync_config = sync_toolkit.initialize_project(requirements)
+    sync_phase = sync_toolkit.execute_phase("specify", PHASE_INPUTS["specify"])
+
+    async def scenario():
+        config = await async_toolkit.ainitialize_project(requirements)
+        phase = await async_toolkit.aexecute_phase("specify", PHASE_INPUTS["specify"])
+        await async_toolkit.agenerate_implementation_report()
+        return config, phase
+
+    async_config, async_phase = asyncio.run(scenario())
+    # Only the creation time differs
+    assert {**async_config, "created_at": None} == {**sync_config, "created_at": None}
+    assert json.loads((tmp_path / "async" / "speckit-config.json").read_text()) == async_config
+    spec_path = "specifications/initial-spec.md"
+    assert (tmp_path / "async" / spec_path).read_text() == (tmp_path / "sync" / spec_path).read_text()
+    assert async_phase["validation"] == sync_phase["validation"]
+    assert (tmp_path / "async" / "specify" / "specify-results.json").exists()
+    assert (tmp_path / "async" / "implementation-report.md").exists()
+
+def test_async_file_writes_do_not_stall_the_event_loop(tmp_path, monkeypatch):
+    toolkit = _toolkit_at(tmp_path)
+    write_text = toolkit._write_text
+
+    def slow_write_text(path, text):
+        time.sleep(0.2)
+        write_text(path, text)
+
+    monkeypatch.setattr(toolkit, "_write_text", slow_write_text)
+
+    async def scenario():
+        gaps = []
+
+        async def heartbeat():
+            while True:
+                started = time.perf_counter()
+                await asyncio.sleep(0.01)
+                gaps.append(time.perf_counter() - started)
+
+        ticking = asyncio.create_task(heartbeat())
+        await toolkit.ainitialize_project("As a user, I want to track my tasks.")
+        ticking.cancel()
+        return gaps
+
+    gaps = asyncio.run(scenario())
+    assert len(gaps) > 5 and max(gaps) < 0.1
+
+PROBLEM_SPECIFICATION = """# Checkout
+
+## Project Overview
+Let shoppers pay.
+
+#### Payment Providers
+Stripe.
+
+##Notes
+
+## User Stories
+Shoppers pay by card.
+
+## Project Overview
+Again.
+
+## Success Criteria
+- [ ] Card payments succeed
+
+```python
+# not a heading
+"""
+
+def test_diagnostics_point_at_the_line_and_column_of_each_problem(tmp_path):
+    validator = implementation_toolkit.SpecificationValidator()
+    diagnostics = [str(diagnostic) for diagnostic in validator.validate(PROBLEM_SPECIFICATION)]
+    assert diagnostics == [
+        "1:1: error: Missing required section: Scope and Boundaries [completeness]",
+        "1:1: error: Missing required section: Technical Constraints [completeness]",
+        "1:1: error: Missing scope boundaries definition [completeness]",
+        "6:1: warning: Heading level jumps from 2 to 4 [syntax]",
+        "9:1: warning: Heading marker needs a space after it; treated as text: Notes [syntax]",
+        "11:1: error: No user stories found (should contain 'As a' patterns) [completeness]",
+        "14:1: warning: Duplicate section: Project Overview (first at line 3) [consistency]",
+        "20:1: error: Code fence is never closed [syntax]",
+    ]
+
+    syntax = implementation_toolkit.SpecificationValidator(["syntax"]).validate("# Title\n\n  ~~~\n")
+    assert [str(diagnostic) for diagnostic in syntax] == ["3:3: error: Code fence is never closed [syntax]"]
+
+    # Bytes and memory-mapped files are validated the same way
+    path = tmp_path / "spec.md"
+    path.write_text(PROBLEM_SPECIFICATION)
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        assert [str(diagnostic) for diagnostic in validator.validate(mapped)] == diagnostics
+    assert [str(diagnostic) for diagnostic in validator.validate(path.read_bytes())] == diagnostics
+
+def test_valid_specification_passes_through_the_toolkit(tmp_path):
+    is_valid, messages = _toolkit(tmp_path).validate_specification(VALID_SPECIFICATION)
+    assert is_valid and messages == ["Specification validation passed"]
+    is_valid, messages = _toolkit(tmp_path).validate_specification(PROBLEM_SPECIFICATION)
+    assert not is_valid and "Specification validation passed" not in messages
@@ -0,0 +1,70 @@
+"""Tests for the mock Perplexity server and the research benchmarks that run against it"""
+
+import asyncio
+import json
+
+import httpx
+
+from script_loader import load_script
+
+mock_server = load_script("mock-perplexity-server.py", "mock_perplexity_server")
+research_benchmark = load_script("research-benchmark.py", "research_benchmark")
+
+PAYLOAD = {"model": "sonar", "messages": [{"role": "user", "content": "Mock question"}]}
+
+def _post(server, payload=PAYLOAD):
+    return httpx.post(f"{server.url}/chat/completions", json=payload, timeout=5.0)
+
+def test_completions_echo_the_prompt_and_are_padded_to_the_response_size():
+    config = mock_server.MockServerConfig(response_size=2000)
+    with mock_server.MockPerplexityServer(config=config) as server:
+        response = _post(server)
+        assert server.stats.requests == 1
+
+    completion = response.json()
+    content = completion["choices"][0]["message"]["content"]
+    assert "Mock question" in content and len(content) >= 2000
+    assert completion["citations"] and completion["usage"]["total_tokens"] > 0
+
+def test_errors_and_rate_limits_are_injected_and_counted():
+    config = mock_server.MockServerConfig(rate_limit_rate=1.0, retry_after=2.5)
+    with mock_server.MockPerplexityServer(config=config) as server:
+        limited = _post(server)
+        # The config is read per request, so it can change while the server runs
+        config.rate_limit_rate, config.error_rate = 0.0, 1.0
+        failed = _post(server)
+        stats = server.stats
+
+    assert limited.status_code == 429 and limited.headers["Retry-After"] == "2.5"
+    assert failed.status_code == 502
+    assert (stats.requests, stats.rate_limited, stats.errors) == (2, 1, 1)
+
+def test_seeded_servers_fail_the_same_requests():
+    def outcomes():
+        config = mock_server.MockServerConfig(error_rate=0.5, seed=3)
+        with mock_server.MockPerplexityServer(config=config) as server:
+            return [_post(server).status_code for _ in range(20)]
+
+    first = outcomes()
+    assert first == outcomes()
+    assert {200, 502} <= set(first)
+
+def test_streamed_completions_carry_the_whole_content():
+    config = mock_server.MockServerConfig(response_size=300)
+    with mock_server.MockPerplexityServer(config=config) as server:
+        complete = _post(server).json()["choices"][0]["message"]["content"]
+        with httpx.stream("POST", f"{server.url}/chat/completions", json={**PAYLOAD, "stream": True}) as response:
+            events = [line[len("data:"):].strip() for line in response.iter_lines() if line.startswith("data:")]
+
+    assert events[-1] == "[DONE]"
+    chunks = [json.loads(event)["choices"][0]["delta"]["content"] for event in events[:-1]]
+    assert len(chunks) > 1 and "".join(chunks) == complete
+
+def test_sweep_benchmark_reports_every_request():
+    with mock_server.MockPerplexityServer() as server:
+        result = asyncio.run(research_benchmark.benchmark_sweep(server.url, max_in_flight=8))
+        requests = server.stats.requests
+
+    assert result["requests"] == requests > 0
+    assert result["fallbacks_to_mock"] == 0
+    assert 0 < result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
@@ -0,0 +1,638 @@
+"""Regression tests for the research agent's request handling, run against the mock server"""
+
+import asyncio
+import io
+import json
+import random
+import shutil
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+from script_loader import load_script
+
+research_agent = load_script("research-agent.py", "research_agent")
+mock_server = load_script("mock-perplexity-server.py", "mock_perplexity_server")
+research_benchmark = load_script("research-benchmark.py", "research_benchmark")
+
+def _research(server, **kwargs):
+    research = research_agent.EnhancedPerplexityResearch(
+        api_key="test-key", enable_cache=False, requests_per_second=None,
+        retry_base_delay=0.0, **kwargs
+    )
+    research.base_url = server.url
+    return research
+
+async def _open_breaker(research, query):
+    """Trip the breaker with failing requests, then wait until it admits a probe"""
+    breaker = research.circuit_breaker
+    for _ in range(breaker.min_requests):
+        with pytest.raises(httpx.HTTPStatusError):
+            await research._make_research_request(research._get_client(), query)
+    assert breaker.state == "open"
+    await asyncio.sleep(breaker.reset_timeout)
+
+def test_rate_limited_probe_does_not_wedge_half_open_breaker():
+    config = mock_server.MockServerConfig(error_rate=1.0, retry_after=0.0)
+    query = research_agent.ResearchQuery(query="Circuit breaker probe", focus_areas=[])
+
+    async def scenario():
+        research = _research(server, max_retries=0,
+                             circuit_breaker=research_agent.CircuitBreaker(min_requests=2, reset_timeout=0.05))
+        async with research:
+            await _open_breaker(research, query)
+
+            config.error_rate, config.rate_limit_rate = 0.0, 1.0
+            with pytest.raises(httpx.HTTPStatusError):
+                await research._make_research_request(research._get_client(), query)
+            assert research.circuit_breaker.state == "half_open"
+
+            config.rate_limit_rate = 0.0
+            await research._make_research_request(research._get_client(), query)
+            assert research.circuit_breaker.state == "closed"
+
+    with mock_server.MockPerplexityServer(config=config) as server:
+        asyncio.run(scenario())
+
+def test_cancelled_probe_does_not_wedge_half_open_breaker():
+    config = mock_server.MockServerConfig(error_rate=1.0)
+    query = research_agent.ResearchQuery(query="Circuit breaker probe", focus_areas=[])
+
+    async def scenario():
+        research = _research(server, max_retries=0,
+                             circuit_breaker=research_agent.CircuitBreaker(min_requests=2, reset_timeout=0.05))
+        async with research:
+            await _open_breaker(research, query)
+
+            config.error_rate, config.latency = 0.0, 0.5
+            probe = asyncio.ensure_future(research._make_research_request(research._get_client(), query))
+            await asyncio.sleep(0.1)
+            probe.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await probe
+
+            config.latency = 0.0
+            await research._make_research_request(research._get_client(), query)
+            assert research.circuit_breaker.state == "closed"
+
+    with mock_server.MockPerplexityServer(config=config) as server:
+        asyncio.run(scenario())
+
+def test_rate_limited_stream_backs_off_and_retries():
+    config = mock_server.MockServerConfig(rate_limit_rate=1.0, retry_after=0.0)
+    query = research_agent.ResearchQuery(query="Streaming backoff", focus_areas=[])
+
+    async def scenario():
+        research = _research(server, max_retries=2)
+        async with research:
+            async with research_agent.aclosing(research.stream_research(query)) as stream:
+                chunks = [chunk async for chunk in stream]
+        assert server.stats.rate_limited == 3
+        assert research.metrics.retries == 2
+        assert research.metrics.fallbacks_to_mock == 1
+        assert research.circuit_breaker.state == "closed"
+        assert not research.circuit_breaker._outcomes
+        return chunks
+
+    with mock_server.MockPerplexityServer(config=config) as server:
+        assert asyncio.run(scenario())
+
+def test_closing_a_stream_early_frees_its_rate_limiter_slot():
+    config = mock_server.MockServerConfig(response_size=4096)
+    query = research_agent.ResearchQuery(query="Early close", focus_areas=[])
+
+    async def scenario():
+        research = _research(server, max_concurrency=1)
+        async with research:
+            async with research_agent.aclosing(research.stream_research(query)) as stream:
+                async for _ in stream:
+                    break
+            # The only slot is free again without waiting for garbage collection
+            await asyncio.wait_for(research.rate_limiter.acquire(), timeout=1.0)
+            research.rate_limiter.release()
+
+    with mock_server.MockPerplexityServer(config=config) as server:
+        asyncio.run(scenario())
+
+def test_coalesced_request_is_cancelled_with_its_last_waiter():
+    config = mock_server.MockServerConfig(latency=0.5)
+    query = research_agent.ResearchQuery(query="Coalesced cancellation", focus_areas=[])
+
+    async def scenario():
+        research = _research(server)
+        async with research:
+            client = research._get_client()
+            waiters = [asyncio.ensure_future(research._timed_research_request(client, query)) for _ in range(2)]
+            await asyncio.sleep(0.1)
+            [in_flight] = research._in_flight_requests.values()
+
+            waiters[0].cancel()
+            await asyncio.sleep(0.05)
+            assert not in_flight.cancelled() and not in_flight.done()
+
+            waiters[1].cancel()
+            await asyncio.gather(*waiters, return_exceptions=True)
+            await asyncio.wait({in_flight}, timeout=0.2)
+            assert in_flight.cancelled()
+            assert not research._in_flight_requests and not research._in_flight_waiters
+
+    with mock_server.MockPerplexityServer(config=config) as server:
+        asyncio.run(scenario())
+
+def _documentation_agent(tmp_path, server=None):
+    agent = research_agent.SpecKitResearchAgent(requests_per_second=None, cache_dir=str(tmp_path / "cache"))
+    if server is not None:
+        agent.perplexity.base_url = server.url
+    return agent
+
+def test_mock_sections_are_always_researched_again(tmp_path, monkeypatch):
+    monkeypatch.delenv("PERPLEXITY_API_KEY", raising=False)
+    output_path = str(tmp_path / "research.md")
+
+    asyncio.run(_documentation_agent(tmp_path).update_documentation(output_path))
+    results = asyncio.run(_documentation_agent(tmp_path).update_documentation(output_path))
+    assert results and all(result is not None and result.is_mock for result in results.values())
+
+def test_sections_without_a_cached_response_are_researched_again(tmp_path, monkeypatch):
+    monkeypatch.setenv("PERPLEXITY_API_KEY", "test-key")
+    output_path = str(tmp_path / "research.md")
+
+    with mock_server.MockPerplexityServer() as server:
+        asyncio.run(_documentation_agent(tmp_path, server).update_documentation(output_path))
+        results = asyncio.run(_documentation_agent(tmp_path, server).update_documentation(output_path))
+        assert all(result is None for result in results.values())
+
+        shutil.rmtree(tmp_path / "cache")
+        results = asyncio.run(_documentation_agent(tmp_path, server).update_documentation(output_path))
+        assert all(result is not None and not result.is_mock for result in results.values())
+
+def test_usage_tracker_keeps_running_totals_per_sweep():
+    usage = research_agent.UsageTracker()
+    payload = {"model": "llama-3.1-sonar-small-128k-online", "messages": []}
+    response = {"usage": {"prompt_tokens": 10, "completion_tokens": 30}}
+    for _ in range(1000):
+        usage.record("sonar-small", payload, response, 0.1)
+    usage.start_sweep()
+    usage.record("sonar-small", payload, response, 0.3)
+
+    summary = usage.sweep_summary()
+    assert summary["requests"] == 1
+    assert summary["by_model"]["sonar-small"]["mean_latency"] == pytest.approx(0.3)
+    assert usage.total_tokens == 1001 * 40
+    assert not hasattr(usage, "records")
+
+def test_router_explores_unmeasured_backends_and_hedges_within_a_tier():
+    models = {
+        "sonar-reasoning": "llama-3.1-sonar-large-128k-online",
+        "sonar-large": "llama-3.1-sonar-large-128k-online",
+        "sonar-huge": "llama-3.1-sonar-huge-128k-online"
+    }
+    router = research_agent.ModelRouter(models, min_samples=3, explore_rate=0.0, seed=1)
+    query = research_agent.ResearchQuery(query="Routing", focus_areas=[], depth_level="deep")
+    for _ in range(3):
+        router.record(models["sonar-reasoning"], 0.1, True)
+
+    # sonar-large is the same backend as sonar-reasoning, so only sonar-huge is left to explore
+    assert [router.route(query) for _ in range(3)] == ["sonar-huge"] * 3
+    assert router.route(query) == "sonar-reasoning"
+
+    for _ in range(3):
+        router.record(models["sonar-huge"], 0.5, True)
+    assert router.hedge_target(query) == ("sonar-reasoning", 0.1)
+
+def test_filtered_update_keeps_the_other_sections(tmp_path, monkeypatch):
+    monkeypatch.setenv("PERPLEXITY_API_KEY", "test-key")
+    output_path = str(tmp_path / "research.md")
+
+    manifest_path = Path(f"{output_path}.manifest.json")
+
+    def section_texts(agent):
+        sections = agent._load_section_manifest(output_path, manifest_path)
+        return {section_name: text for section_name, (_, text) in sections.items()}
+
+    with mock_server.MockPerplexityServer() as server:
+        agent = _documentation_agent(tmp_path, server)
+        asyncio.run(agent.update_documentation(output_path))
+        before = section_texts(agent)
+
+        shutil.rmtree(tmp_path / "cache")
+        agent = _documentation_agent(tmp_path, server)
+        agent.topics = ["competitive_analysis"]
+        results = asyncio.run(agent.update_documentation(output_path))
+        after = section_texts(agent)
+
+    assert list(results) == ["competitive_analysis"] and results["competitive_analysis"] is not None
+    # The document header is dated, so sections are compared rather than the whole file
+    assert after == before
+
+def test_shards_split_the_filtered_topics_evenly():
+    topics = ["speckit_fundamentals", "ai_agent_coordination"]
+    shards = [
+        research_agent.SpecKitResearchAgent(enable_cache=False, topics=topics, shard_index=index,
+                                            shard_count=2).research_queries()
+        for index in range(2)
+    ]
+    assert [list(shard) for shard in shards] == [["speckit_fundamentals"], ["ai_agent_coordination"]]
+
+def _result(index):
+    return research_agent.ResearchResult(
+        query=f"Specification pattern {index}", response=f"Executable specifications response {index}",
+        sources=[{"url": f"https://example.com/{index}", "title": "Example", "snippet": "living documentation"}],
+        timestamp=1_700_000_000.0 + index, model_used="sonar-large"
+    )
+
+def test_search_index_stores_text_and_a_fingerprint_only(tmp_path):
+    index = research_agent.ResearchSearchIndex(str(tmp_path / "search.sqlite3"))
+    index.add_many(_result(index_number) for index_number in range(3))
+
+    [hit] = index.search("pattern 2", top_k=1)
+    assert hit.query == "Specification pattern 2" and hit.model_used == "sonar-large"
+    assert hit.fingerprint == research_agent.content_fingerprint([hit.query, hit.response])
+    columns = {row[1] for row in index._conn.execute("PRAGMA table_info(results)")}
+    assert columns == {"id", "fingerprint", "model_used", "timestamp"}
+
+def test_agent_search_index_is_opt_in():
+    agent = research_agent.SpecKitResearchAgent(enable_cache=False)
+    assert agent.search_index is None and agent.research_history.search_index is None
+    with pytest.raises(ValueError):
+        agent.search("specifications")
+
+def test_cancelled_hedged_request_cancels_its_attempts():
+    config = mock_server.MockServerConfig(latency=0.5)
+    query = research_agent.ResearchQuery(query="Hedge cancellation", focus_areas=[])
+
+    async def scenario():
+        research = _research(server, adaptive_routing=True)
+        backend_model = research.models[query.model]
+        for _ in range(research.model_router.min_samples):
+            research.model_router.record(backend_model, 0.05, True)
+        async with research:
+            payload = research._build_research_payload(query)
+            caller = asyncio.ensure_future(research._hedged_research_request(research._get_client(), query, payload))
+            await asyncio.sleep(0.02)
+            caller.cancel()
+            await asyncio.gather(caller, return_exceptions=True)
+            await asyncio.sleep(0.05)
+            attempts = [task for task in asyncio.all_tasks()
+                        if "_observed_research_request" in repr(task.get_coro())]
+            assert not attempts
+
+    with mock_server.MockPerplexityServer(config=config) as server:
+        asyncio.run(scenario())
+
+def test_sections_are_researched_again_without_a_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("PERPLEXITY_API_KEY", "test-key")
+    output_path = str(tmp_path / "research.md")
+
+    def agent():
+        agent = research_agent.SpecKitResearchAgent(requests_per_second=None, enable_cache=False)
+        agent.perplexity.base_url = server.url
+        return agent
+
+    with mock_server.MockPerplexityServer() as server:
+        asyncio.run(agent().update_documentation(output_path))
+        results = asyncio.run(agent().update_documentation(output_path))
+    assert results and all(result is not None for result in results.values())
+
+def _stream_and_render(agent, output_path):
+    async def scenario():
+        summary = await agent.stream_documentation(str(output_path))
+        streamed_sources = agent.top_sources()
+        results = await agent.comprehensive_speckit_research()
+        return summary, streamed_sources, results
+
+    summary, streamed_sources, results = asyncio.run(scenario())
+    streamed = output_path.read_text()
+    rendered = agent.generate_documentation(results)
+    # Only the header carries a timestamp
+    return summary, streamed_sources, results, streamed[streamed.index("\n## "):], rendered[rendered.index("\n## "):]
+
+@pytest.mark.parametrize("with_key", [False, True])
+def test_streamed_documentation_matches_rendered_documentation(tmp_path, monkeypatch, with_key):
+    if with_key:
+        monkeypatch.setenv("PERPLEXITY_API_KEY", "test-key")
+    else:
+        monkeypatch.delenv("PERPLEXITY_API_KEY", raising=False)
+    config = mock_server.MockServerConfig(latency=0.0, response_size=1200, seed=7)
+
+    with mock_server.MockPerplexityServer(config=config) as server:
+        agent = _documentation_agent(tmp_path, server)
+        summary, streamed_sources, results, streamed, rendered = _stream_and_render(agent, tmp_path / "research.md")
+        requests_after_stream = server.stats.requests
+
+    assert streamed == rendered
+    assert summary == {name: len(result.response) for name, result in results.items()}
+    if with_key:
+        # The non-streaming pass is served from the responses the stream cached
+        assert requests_after_stream == server.stats.requests
+        # Streamed citations are ranked like those of regular requests
+        assert streamed_sources and streamed_sources[0]["topics"]
+
+def test_follow_up_of_exactly_the_preview_length_is_not_marked_as_cut(tmp_path):
+    agent = _documentation_agent(tmp_path)
+    insight = research_agent.FollowUpInsight(query="q", content="x" * agent.INSIGHT_PREVIEW_CHARS)
+    sink = io.StringIO()
+    agent._write_insights(sink, [insight])
+    assert sink.getvalue().endswith("x\n")
+
+def test_follow_ups_run_concurrently_and_keep_their_order():
+    follow_ups = [f"Follow-up question {index}" for index in range(4)]
+    query = research_agent.ResearchQuery("Main question", ["testing"], follow_up_queries=follow_ups)
+
+    async def scenario():
+        async with _research(server, max_concurrency=8) as research:
+            started = time.perf_counter()
+            result = await research.conduct_research(query)
+            return result, time.perf_counter() - started
+
+    config = mock_server.MockServerConfig(latency=0.3)
+    with mock_server.MockPerplexityServer(config=config) as server:
+        result, elapsed = asyncio.run(scenario())
+
+    # One request after another would take five latencies
+    assert elapsed < 0.3 * 3
+    assert [insight.query for insight in result.follow_up_insights] == follow_ups
+    assert all(insight.query in insight.content for insight in result.follow_up_insights)
+
+def test_topics_are_researched_concurrently_in_definition_order(tmp_path, monkeypatch):
+    monkeypatch.setenv("PERPLEXITY_API_KEY", "test-key")
+    config = mock_server.MockServerConfig(latency=0.2)
+
+    with mock_server.MockPerplexityServer(config=config) as server:
+        agent = research_agent.SpecKitResearchAgent(requests_per_second=None, max_in_flight=32, enable_cache=False)
+        agent.perplexity.base_url = server.url
+        started = time.perf_counter()
+        results = asyncio.run(agent.comprehensive_speckit_research())
+        elapsed = time.perf_counter() - started
+        requests = server.stats.requests
+
+    assert list(results) == list(agent.research_queries())
+    assert not any(result.is_mock for result in results.values())
+    # Sequential requests would take one latency each
+    assert elapsed < requests * 0.2 / 2
+
+def test_rate_limiter_paces_requests_and_bounds_those_in_flight():
+    limiter = research_agent.TokenBucketRateLimiter(requests_per_second=20, max_in_flight=2, burst=1)
+    in_flight = peak = 0
+
+    async def request():
+        nonlocal in_flight, peak
+        async with limiter:
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+    async def scenario():
+        started = time.perf_counter()
+        await asyncio.gather(*(request() for _ in range(6)))
+        return time.perf_counter() - started
+
+    # The first token is available at once, the other five arrive 50ms apart
+    assert asyncio.run(scenario()) >= 0.25 * 0.9
+    assert peak <= 2
+
+def _completion(text):
+    return {"choices": [{"message": {"role": "assistant", "content": text}}], "citations": []}
+
+def test_response_cache_evicts_expired_and_least_recently_used_entries(tmp_path):
+    cache = research_agent.ResponseCache(str(tmp_path), max_entries=2, default_ttl=0.2)
+    first, second, third = ({"model": "sonar", "prompt": name} for name in ("first", "second", "third"))
+
+    cache.put(first, _completion("first"))
+    cache.put(second, _completion("second"))
+    # Key order does not matter, and a read counts as a use
+    assert cache.get({"prompt": "first", "model": "sonar"}) == _completion("first")
+    cache.put(third, _completion("third"))
+    assert cache.get(second) is None
+    # Entries persist for other instances sharing the directory
+    assert research_agent.ResponseCache(str(tmp_path)).get(first) == _completion("first")
+
+    time.sleep(0.25)
+    assert cache.get(first) is None and cache.get(third) is None
+    monthly = {**first, "search_recency_filter": "month"}
+    cache.put(monthly, _completion("monthly"))
+    assert cache.get(monthly) == _completion("monthly")
+
+def test_repeated_research_is_served_from_the_response_cache(tmp_path):
+    query = research_agent.ResearchQuery("Cached question", ["testing"], follow_up_queries=["Cached follow-up"])
+
+    async def scenario():
+        async with _research(server) as research:
+            research.response_cache = research_agent.ResponseCache(str(tmp_path))
+            return [await research.conduct_research(query) for _ in range(2)]
+
+    with mock_server.MockPerplexityServer() as server:
+        first, second = asyncio.run(scenario())
+        assert server.stats.requests == 2
+    assert second.response == first.response
+    assert second.follow_up_insights[0].content == first.follow_up_insights[0].content
+
+def test_research_calls_share_one_pooled_client():
+    queries = [research_agent.ResearchQuery(f"Pooled question {index}", ["testing"]) for index in range(6)]
+
+    async def scenario():
+        research = _research(server, max_concurrency=6, max_connections=2)
+        async with research:
+            client = research._get_client()
+            started = time.perf_counter()
+            await asyncio.gather(*(research.conduct_research(query) for query in queries))
+            elapsed = time.perf_counter() - started
+            assert research._get_client() is client
+        assert client.is_closed and research._client is None
+        return elapsed
+
+    config = mock_server.MockServerConfig(latency=0.1)
+    with mock_server.MockPerplexityServer(config=config) as server:
+        # Six requests over two pooled connections take three rounds
+        assert asyncio.run(scenario()) >= 0.3 * 0.9
+
+def _batch(server, queries):
+    async def scenario():
+        async with _research(server, max_concurrency=8) as research:
+            return [result async for result in research.conduct_research_batch(queries)]
+    return asyncio.run(scenario())
+
+def test_batch_yields_unique_queries_in_completion_order():
+    slow = research_agent.ResearchQuery("Slow question", ["testing"], model="sonar-huge")
+    fast = research_agent.ResearchQuery("Fast question", ["testing"], model="sonar-small")
+
+    config = mock_server.MockServerConfig(
+        latency=0.05, model_latency={"llama-3.1-sonar-huge-128k-online": 0.3}
+    )
+    with mock_server.MockPerplexityServer(config=config) as server:
+        results = _batch(server, [slow, fast, slow])
+        assert server.stats.requests == 2
+
+    assert [result.query for result in results] == ["Fast question", "Slow question"]
+
+def test_batch_sends_follow_ups_shared_by_its_queries_once():
+    queries = [
+        research_agent.ResearchQuery(f"Question {index}", ["testing"], follow_up_queries=["Shared follow-up"])
+        for index in range(3)
+    ]
+
+    config = mock_server.MockServerConfig(latency=0.1)
+    with mock_server.MockPerplexityServer(config=config) as server:
+        results = _batch(server, queries)
+        assert server.stats.requests == 3 + 1
+
+    assert all(result.follow_up_insights[0].query == "Shared follow-up" for result in results)
+
+def test_research_records_are_slotted_and_round_trip_through_dicts():
+    citations = [{"url": "https://a.example", "title": "A", "text": "x" * 300}, "https://b.example"]
+    result = research_agent.ResearchResult(
+        query="Slotted question", response="Answer",
+        sources=research_agent.SourceList.from_citations(citations),
+        timestamp=1700000000.0, model_used="sonar",
+        follow_up_insights=[research_agent.FollowUpInsight("Follow-up", "Insight")]
+    )
+    assert not hasattr(result, "__dict__")
+    assert not hasattr(research_agent.ResearchQuery("q", []), "__dict__")
+
+    assert result.sources[0]["snippet"] == "x" * research_agent.SourceList.SNIPPET_LENGTH + "..."
+    assert result.sources[1] == {"url": "https://b.example", "title": "https://b.example", "snippet": ""}
+    restored = research_agent.ResearchResult.from_dict(result.to_dict())
+    assert restored.to_dict() == result.to_dict() and restored.sources == result.sources
+
+def test_history_beyond_its_limit_is_spilled_and_read_back_in_order(tmp_path):
+    history = research_agent.ResearchHistory(max_in_memory=2, spill_path=str(tmp_path / "history.jsonl"))
+    history.extend(_result(index) for index in range(5))
+
+    assert len(history) == 5 and len(history._recent) == 2
+    assert [result.query for result in history] == [_result(index).query for index in range(5)]
+
+def test_streaming_renderer_matches_string_concatenation(tmp_path):
+    agent = research_agent.SpecKitResearchAgent(enable_cache=False)
+    generated_at = research_agent.datetime(2025, 1, 1)
+    sections = list(research_benchmark._synthetic_sections(3))
+    sections[0][1].follow_up_insights[0].content = "Short insight"
+
+    expected = research_benchmark._concatenated_documentation(agent, iter(sections))
+    header = agent._documentation_header(generated_at)
+    # The baseline stamps its header with the current time, which has the same length
+    expected = header + expected[len(header):]
+    assert agent.generate_documentation(dict(sections), generated_at) == expected
+
+    # Sections may come from a generator, rendered as they are produced
+    output_path = tmp_path / "research.md"
+    agent.write_documentation((section for section in sections), str(output_path), generated_at)
+    assert output_path.read_text() == expected
+
+def test_checkpoint_journal_drops_a_torn_final_line_on_resume(tmp_path):
+    path = tmp_path / "sweep.jsonl"
+    query = research_agent.ResearchQuery("Journal question", ["testing"], follow_up_queries=["Journal follow-up"])
+    follow_up = research_agent.EnhancedPerplexityResearch(enable_cache=False)._build_follow_up_queries(query)[0]
+
+    journal = research_agent.CheckpointJournal(str(path))
+    journal.record_topic("journal", query, _result(1))
+    with open(path, 'a') as f:
+        f.write('{"type": "follow_up", "topic": "jour')
+
+    resumed = research_agent.CheckpointJournal(str(path), resume=True)
+    assert resumed.completed_result("journal", query).to_dict() == _result(1).to_dict()
+    assert path.read_text().endswith("}\n")
+    resumed.record_follow_up("journal", follow_up, research_agent.FollowUpInsight("Journal follow-up", "Insight"))
+    assert research_agent.CheckpointJournal(str(path), resume=True).completed_follow_ups("journal", [follow_up])
+
+    # Edited queries are researched again, and a fresh journal starts empty
+    edited = research_agent.ResearchQuery("Edited question", ["testing"])
+    assert resumed.completed_result("journal", edited) is None
+    research_agent.CheckpointJournal(str(path))
+    assert path.read_text() == ""
+
+def test_resumed_sweep_repeats_no_completed_requests(tmp_path, monkeypatch):
+    monkeypatch.setenv("PERPLEXITY_API_KEY", "test-key")
+
+    def sweep(server, resume):
+        agent = research_agent.SpecKitResearchAgent(
+            requests_per_second=None, enable_cache=False, topics=["speckit_fundamentals"],
+            checkpoint_path=str(tmp_path / "sweep.jsonl"), resume=resume
+        )
+        agent.perplexity.base_url = server.url
+        return asyncio.run(agent.comprehensive_speckit_research())
+
+    with mock_server.MockPerplexityServer() as server:
+        first = sweep(server, resume=False)
+        requests = server.stats.requests
+        resumed = sweep(server, resume=True)
+        assert server.stats.requests == requests
+
+    assert resumed["speckit_fundamentals"].to_dict() == first["speckit_fundamentals"].to_dict()
+
+def test_metrics_render_as_prometheus_text(tmp_path):
+    recorder = research_agent.MetricsRecorder(namespace="test")
+    recorder.increment("requests_total", model="sonar")
+    recorder.increment("requests_total", 2, model="sonar")
+    recorder.increment("retries_total", reason='HTTP "429"')
+    for latency in (0.02, 0.2, 200.0):
+        recorder.observe("request_latency_seconds", latency)
+    recorder.observe("response_size_bytes", 2000)
+
+    path = tmp_path / "metrics.prom"
+    recorder.export(str(path))
+    lines = path.read_text().splitlines()
+    assert "# TYPE test_requests_total counter" in lines
+    assert 'test_requests_total{model="sonar"} 3' in lines
+    assert 'test_retries_total{reason="HTTP \\"429\\""} 1' in lines
+    assert "# TYPE test_request_latency_seconds histogram" in lines
+    assert 'test_request_latency_seconds_bucket{le="0.025"} 1' in lines
+    assert 'test_request_latency_seconds_bucket{le="120"} 2' in lines
+    assert 'test_request_latency_seconds_bucket{le="+Inf"} 3' in lines
+    assert "test_request_latency_seconds_count 3" in lines
+    assert 'test_response_size_bytes_bucket{le="4096"} 1' in lines
+
+def test_research_spans_and_metrics_export_as_otlp(tmp_path):
+    recorder = research_agent.MetricsRecorder()
+    query = research_agent.ResearchQuery("Traced question", ["testing"], follow_up_queries=["Traced follow-up"])
+
+    async def scenario():
+        async with _research(server, instrumentation=recorder) as research:
+            await research.conduct_research(query)
+
+    with mock_server.MockPerplexityServer() as server:
+        asyncio.run(scenario())
+
+    path = tmp_path / "telemetry.jsonl"
+    recorder.export(str(path))
+    metrics_line, spans_line = (json.loads(line) for line in path.read_text().splitlines())
+    metrics = {metric["name"]: metric for metric in metrics_line["resourceMetrics"][0]["scopeMetrics"][0]["metrics"]}
+    assert sum(point["asDouble"] for point in metrics["speckit_research_requests_total"]["sum"]["dataPoints"]) == 2
+    assert "histogram" in metrics["speckit_research_request_latency_seconds"]
+
+    spans = spans_line["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    root = next(span for span in spans if span["name"] == "conduct_research")
+    requests = [span for span in spans if span["name"] == "make_research_request"]
+    assert len(requests) == 2
+    assert all(span["traceId"] == root["traceId"] and span["parentSpanId"] == root["spanId"] for span in requests)
+
+    # Spans are exported once; the next export carries metrics only
+    recorder.export(str(path))
+    assert len(path.read_text().splitlines()) == 3
+
+def test_source_index_ranks_sources_by_hits_as_they_are_cited():
+    index = research_agent.SourceIndex()
+    rng = random.Random(5)
+    expected_hits = {}
+    for step in range(500):
+        url = f"https://example.com/{min(int(rng.expovariate(0.3)), 20)}"
+        index.add([(url, "Title", "Snippet")], topic=f"topic-{step % 3}")
+        expected_hits[url] = expected_hits.get(url, 0) + 1
+
+        if step % 50 == 0:
+            top = index.top_sources(limit=len(expected_hits))
+            assert [source["hits"] for source in top] == sorted(expected_hits.values(), reverse=True)
+    assert all(index.hits(url) == hits for url, hits in expected_hits.items())
+    assert index.top_sources(1)[0]["hits"] == max(expected_hits.values())
+    assert len(index) == len(expected_hits) and "https://example.com/999" not in index
+
+def test_source_index_keeps_the_first_description_and_fills_blanks():
+    index = research_agent.SourceIndex()
+    first = index.add([("https://a.example", "", "First snippet")], topic="one")
+    second = index.add([("https://a.example", "Title", "Other snippet"), ("https://b.example", "B", "")], topic="two")
+
+    assert first[0] == second[0] == {"url": "https://a.example", "title": "Title", "snippet": "First snippet"}
+    assert index.topics("https://a.example") == ["one", "two"]
+    assert index.hits("https://a.example") == 2 and len(index) == 2
@@ -0,0 +1,56 @@
+"""Tests for merging sharded research results"""
+
+import asyncio
+import json
+from datetime import datetime
+
+from script_loader import load_script
+
+research_agent = load_script("research-agent.py", "research_agent")
+mock_server = load_script("mock-perplexity-server.py", "mock_perplexity_server")
+research_merge = load_script("research-merge.py", "research_merge")
+
+GENERATED_AT = datetime(2025, 1, 1)
+
+def _sweep(server, **kwargs):
+    agent = research_agent.SpecKitResearchAgent(requests_per_second=None, enable_cache=False, **kwargs)
+    agent.perplexity.base_url = server.url
+    return agent, asyncio.run(agent.comprehensive_speckit_research())
+
+def test_merged_shards_match_a_single_process_run(tmp_path, monkeypatch):
+    monkeypatch.setenv("PERPLEXITY_API_KEY", "test-key")
+    with mock_server.MockPerplexityServer() as server:
+        agent, results = _sweep(server)
+        agent.write_documentation(results, str(tmp_path / "single.md"), GENERATED_AT)
+
+        shard_paths = []
+        # Shards listed out of order still merge into definition order
+        for shard_index in (2, 0, 1):
+            shard_agent, shard_results = _sweep(server, shard_index=shard_index, shard_count=3)
+            shard_paths.append(str(tmp_path / f"shard-{shard_index}.jsonl"))
+            shard_agent.write_results_json(shard_results, shard_paths[-1])
+
+    summary = research_merge.merge_results(shard_paths, str(tmp_path / "merged.md"),
+                                           str(tmp_path / "merged.index.json"), GENERATED_AT)
+    assert (tmp_path / "merged.md").read_text() == (tmp_path / "single.md").read_text()
+    assert summary["topics"] == len(results) and summary["duplicates_dropped"] == 0
+
+    index = json.loads((tmp_path / "merged.index.json").read_text())
+    assert [entry["topic"] for entry in index["topics"]] == list(results)
+    # Every topic cites the mock server's one source, listed once
+    assert len(index["sources"]) == 1 and index["sources"][0]["topics"] == list(results)
+
+def test_newest_result_for_a_topic_wins(tmp_path):
+    def write(path, response, timestamp):
+        result = research_agent.ResearchResult(query="Question", response=response, sources=[],
+                                               timestamp=timestamp, model_used="sonar")
+        path.write_text(json.dumps({"topic": "topic", "position": 0, "result": result.to_dict()}) + "\n")
+        return str(path)
+
+    paths = [write(tmp_path / "new.jsonl", "Newer answer", 2.0), write(tmp_path / "old.jsonl", "Older answer", 1.0)]
+    summary = research_merge.main([*paths, "-o", str(tmp_path / "merged.md")])
+
+    assert summary["duplicates_dropped"] == 1
+    merged = (tmp_path / "merged.md").read_text()
+    assert "Newer answer" in merged and "Older answer" not in merged
+    assert json.loads((tmp_path / "merged.index.json").read_text())["topics"][0]["input"] == paths[0]
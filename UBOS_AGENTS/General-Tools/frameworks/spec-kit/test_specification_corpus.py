@@ -0,0 +1,80 @@
+"""Regression tests for the specification corpus validator"""
+
+import json
+
+import pytest
+
+from script_loader import load_script
+
+specification_corpus = load_script("specification-corpus.py", "specification_corpus")
+
+def test_unknown_rules_are_rejected_before_any_file_is_read(tmp_path):
+    with pytest.raises(ValueError, match="spelling"):
+        next(specification_corpus.validate_corpus([str(tmp_path / "missing")], ["syntax", "spelling"]))
+    with pytest.raises(SystemExit) as exited:
+        specification_corpus.main([str(tmp_path), "--rules", "spelling"])
+    assert exited.value.code == 2
+
+VALID_SPECIFICATION = """# Checkout
+
+## Project Overview
+Let shoppers pay for their basket.
+
+## User Stories
+As a shopper, I want to pay by card.
+
+## Success Criteria
+- [ ] Card payments succeed
+
+## Scope and Boundaries
+**In Scope**: card payments. **Out of Scope**: refunds.
+
+## Technical Constraints
+PCI compliance.
+"""
+
+def _corpus(root):
+    """Write a corpus of SpecKit project trees, returning the specifications expected in discovery order"""
+    files = {
+        "alpha/specifications/checkout.md": VALID_SPECIFICATION,
+        "alpha/specifications/notes.txt": "not a specification",
+        "beta/specifications/broken.md": "# Checkout\n",
+        "beta/specifications/checkout.md": VALID_SPECIFICATION,
+        ".git/specifications/hidden.md": "# Hidden\n"
+    }
+    for relative, text in files.items():
+        (root / relative).parent.mkdir(parents=True, exist_ok=True)
+        (root / relative).write_text(text)
+    return [str(root / relative) for relative in (
+        "alpha/specifications/checkout.md", "beta/specifications/broken.md", "beta/specifications/checkout.md"
+    )]
+
+def _run(argv, capsys):
+    exit_code = specification_corpus.main(argv)
+    return exit_code, [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+def test_invalid_specifications_fail_the_run_and_unchanged_ones_come_from_the_cache(tmp_path, capsys):
+    corpus = tmp_path / "corpus"
+    paths = _corpus(corpus)
+    argv = [str(corpus), "--cache", str(tmp_path / "cache.sqlite3"), "--workers", "1"]
+
+    exit_code, results = _run(argv, capsys)
+    assert exit_code == 1
+    assert [result["path"] for result in results] == paths
+    assert [result["valid"] for result in results] == [True, False, True]
+    assert not any(result["cached"] for result in results)
+
+    (corpus / "beta/specifications/broken.md").write_text((corpus / "beta/specifications/checkout.md").read_text())
+    exit_code, rerun = _run(argv, capsys)
+    assert exit_code == 0
+    # Identical content is cached once, whichever file it came from
+    assert [result["cached"] for result in rerun] == [True, True, True]
+
+def test_worker_processes_and_mapped_files_give_the_same_results(tmp_path, capsys, monkeypatch):
+    corpus = tmp_path / "corpus"
+    _corpus(corpus)
+    _, in_process = _run([str(corpus), "--workers", "1"], capsys)
+    monkeypatch.setattr(specification_corpus, "MMAP_THRESHOLD", 0)
+    _, mapped = _run([str(corpus), "--workers", "1"], capsys)
+    workers = list(specification_corpus.validate_corpus([str(corpus)], max_workers=2, batch_size=1))
+    assert in_process == mapped == workers
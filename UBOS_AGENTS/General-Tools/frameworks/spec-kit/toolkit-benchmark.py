@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+SpecKit Implementation Toolkit Benchmarks
+Throughput of the synchronous and asyncio toolkit APIs for many projects in one
+process, and scaling of specification validation with corpus size
+
+Run directly to print a summary. File writes and phase logic can be given simulated
+latency to model network filesystems and AI agent calls.
+"""
+
+import argparse
+import asyncio
+import logging
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Sequence
+
+from script_loader import load_script
+
+implementation_toolkit = load_script("implementation-toolkit.py", "implementation_toolkit")
+Toolkit = implementation_toolkit.SpecKitImplementationToolkit
+
+REQUIREMENTS = """
+Create a web application that helps users manage their daily tasks.
+Users should be able to set due dates, priorities, and categories for tasks.
+"""
+
+PHASE_INPUTS = {
+    "specify": {"requirements": REQUIREMENTS},
+    "plan": {"specification": "Generated specification", "constraints": ["Web-based"]},
+    "tasks": {"architecture": "MVC architecture with REST API", "strategy": "Iterative"},
+    "implement": {"tasks": ["UI components", "API endpoints"], "tests": ["Unit tests"]}
+}
+
+@contextmanager
+def simulated_latency(io_latency: float = 0.0, phase_latency: float = 0.0) -> Iterator[None]:
+    """Add fixed delays to every toolkit file write and phase execution"""
+    write_text, write_json = Toolkit._write_text, Toolkit._write_json
+    execute_phase_logic = Toolkit._execute_phase_logic
+
+    def slow_write_text(path, text):
+        time.sleep(io_latency)
+        write_text(path, text)
+
+    def slow_write_json(path, data):
+        time.sleep(io_latency)
+        write_json(path, data)
+
+    def slow_phase_logic(self, phase, inputs, upstream=None):
+        time.sleep(phase_latency)
+        return execute_phase_logic(self, phase, inputs, upstream)
+
+    Toolkit._write_text = staticmethod(slow_write_text)
+    Toolkit._write_json = staticmethod(slow_write_json)
+    Toolkit._execute_phase_logic = slow_phase_logic
+    try:
+        yield
+    finally:
+        Toolkit._write_text = staticmethod(write_text)
+        Toolkit._write_json = staticmethod(write_json)
+        Toolkit._execute_phase_logic = execute_phase_logic
+
+def _project_config(root: str, index: int) -> Any:
+    return implementation_toolkit.SpecificationConfig(
+        project_name=f"Benchmark Project {index}", output_directory=f"{root}/project-{index}"
+    )
+
+def run_project_sync(config: Any):
+    toolkit = Toolkit(config)
+    toolkit.initialize_project(REQUIREMENTS)
+    for phase_name, inputs in PHASE_INPUTS.items():
+        toolkit.execute_phase(phase_name, inputs)
+    toolkit.generate_implementation_report()
+
+async def run_project_async(config: Any):
+    toolkit = Toolkit(config)
+    await toolkit.ainitialize_project(REQUIREMENTS)
+    for phase_name, inputs in PHASE_INPUTS.items():
+        await toolkit.aexecute_phase(phase_name, inputs)
+    await toolkit.agenerate_implementation_report()
+
+async def _worst_loop_lag(interval: float, stop: asyncio.Event) -> float:
+    """Largest delay, beyond interval, before a periodic task got to run"""
+    worst = 0.0
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - expected)
+    return worst
+
+async def _timed(workload, projects: int) -> Dict[str, float]:
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(_worst_loop_lag(0.01, stop))
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    await workload()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    return {
+        "seconds": elapsed,
+        "projects_per_second": projects / elapsed if elapsed else 0.0,
+        "max_loop_lag_ms": await monitor * 1000
+    }
+
+async def benchmark_throughput(projects: int = 200, io_latency: float = 0.0,
+                               phase_latency: float = 0.0) -> Dict[str, Dict[str, float]]:
+    """Initialize, run every phase and report on many projects, sequentially then concurrently
+
+    The sync path runs inside a coroutine, as a blocking call from an async service
+    would, so its loop lag shows how long other tasks were starved.
+    """
+    with simulated_latency(io_latency, phase_latency), tempfile.TemporaryDirectory() as root:
+        async def sync_workload():
+            for index in range(projects):
+                run_project_sync(_project_config(f"{root}/sync", index))
+
+        async def async_workload():
+            await asyncio.gather(*(
+                run_project_async(_project_config(f"{root}/async", index)) for index in range(projects)
+            ))
+
+        return {
+            "sync": await _timed(sync_workload, projects),
+            "async": await _timed(async_workload, projects)
+        }
+
+def _synthetic_corpus(size_bytes: int) -> str:
+    """Concatenated initial specifications, one per project, up to roughly size_bytes"""
+    toolkit = Toolkit.__new__(Toolkit)
+    parts, total, index = [], 0, 0
+    while total < size_bytes:
+        toolkit.config = implementation_toolkit.SpecificationConfig(project_name=f"Benchmark Project {index}")
+        part = toolkit._render_initial_specification(REQUIREMENTS * 4)
+        parts.append(part)
+        total += len(part)
+        index += 1
+    return "".join(parts)
+
+def _best_of(runs: int, validate: Callable[[], Any]) -> float:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        validate()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+def benchmark_validation(sizes_mb: Sequence[float] = (1, 2, 5, 10), runs: int = 3) -> List[Dict[str, float]]:
+    """Validation time per corpus size; a flat ms/MiB column means linear scaling"""
+    validator = implementation_toolkit.SpecificationValidator()
+    results = []
+    for size_mb in sizes_mb:
+        corpus = _synthetic_corpus(int(size_mb * 1024 * 1024))
+        corpus_mb = len(corpus) / (1024 * 1024)
+        seconds = _best_of(runs, lambda: validator.validate(corpus))
+        results.append({
+            "size_mb": corpus_mb,
+            "seconds": seconds,
+            "ms_per_mb": seconds * 1000 / corpus_mb,
+            "diagnostics": len(validator.validate(corpus))
+        })
+    return results
+
+async def _run_throughput_benchmark(args: argparse.Namespace):
+    if args.threads:
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=args.threads))
+
+    print(f"\n📊 Project throughput ({args.projects} projects, {args.io_latency * 1000:g} ms per write, "
+          f"{args.phase_latency * 1000:g} ms per phase)")
+    results = await benchmark_throughput(args.projects, args.io_latency, args.phase_latency)
+    for api, result in results.items():
+        print(f"  - {api}: {result['seconds']:.2f}s, {result['projects_per_second']:.1f} projects/s, "
+              f"worst event loop stall {result['max_loop_lag_ms']:.1f} ms")
+    print(f"  Async speedup: {results['sync']['seconds'] / results['async']['seconds']:.1f}x")
+
+def _run_validation_benchmark(args: argparse.Namespace):
+    print("\n📊 Specification validation (concatenated initial specifications)")
+    for result in benchmark_validation(args.validation_sizes):
+        print(f"  - {result['size_mb']:.1f} MiB: {result['seconds'] * 1000:.0f} ms "
+              f"({result['ms_per_mb']:.1f} ms/MiB, {result['diagnostics']} diagnostics)")
+
+async def main():
+    """Run the toolkit benchmarks"""
+    parser = argparse.ArgumentParser(description="Benchmark the SpecKit implementation toolkit")
+    parser.add_argument("--projects", type=int, default=200, help="Projects per run")
+    parser.add_argument("--io-latency", type=float, default=0.0, help="Simulated seconds per file write")
+    parser.add_argument("--phase-latency", type=float, default=0.0, help="Simulated seconds per phase execution")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="Worker threads behind the async API (default: asyncio's default executor)")
+    parser.add_argument("--validation-sizes", type=float, nargs="+", default=[1, 2, 5, 10],
+                        help="Corpus sizes in MiB for the validation benchmark")
+    parser.add_argument("--benchmarks", nargs="+", choices=["throughput", "validation"],
+                        default=["throughput", "validation"])
+    args = parser.parse_args()
+
+    # Per-project progress logging would dominate the timings
+    implementation_toolkit.logger.setLevel(logging.WARNING)
+
+    if "throughput" in args.benchmarks:
+        await _run_throughput_benchmark(args)
+    if "validation" in args.benchmarks:
+        _run_validation_benchmark(args)
+
+if __name__ == "__main__":
+    asyncio.run(main())